@@ -0,0 +1,92 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+#******************************************************************************
+# ZYNTHIAN PROJECT: Zynthian GUI
+#
+# Controller value change microbenchmark
+#
+# Copyright (C) 2015-2024 Fernando Moyano <jofemodo@zynthian.org>
+#
+#******************************************************************************
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License as
+# published by the Free Software Foundation; either version 2 of
+# the License, or any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# For a full copy of the GNU General Public License see the LICENSE.txt file.
+#
+#******************************************************************************
+#
+# Measures the time per value change of zynthian_controller, for each send
+# method: engine method, OSC path & MIDI CC, plus MIDI CC input scaling.
+# OSC messages are sent to an unused local port. MIDI CC messages are sent to
+# the UI MIDI input, so zynthian UI service should be stopped.
+#
+# Usage: benchmark_controller.py [-n COUNT]
+#
+#******************************************************************************
+
+import os
+import sys
+import argparse
+from timeit import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import liblo
+from zyncoder.zyncore import lib_zyncore_init
+from zyngine.zynthian_controller import zynthian_controller
+
+#------------------------------------------------------------------------------
+# Benchmark engines
+#------------------------------------------------------------------------------
+
+
+class engine_method:
+	"""Engine implementing its own send method"""
+
+	def send_controller_value(self, zctrl):
+		pass
+
+
+class engine_osc:
+	"""Engine sending values by controller's OSC path"""
+
+	osc_target = liblo.Address("localhost", 9999, liblo.UDP)
+
+#------------------------------------------------------------------------------
+# Main
+#------------------------------------------------------------------------------
+
+
+parser = argparse.ArgumentParser(description="Measure controller value change time")
+parser.add_argument("-n", "--count", type=int, default=100000, help="Value changes per test (default: 100000)")
+args = parser.parse_args()
+
+lib_zyncore_init()
+
+tests = [
+	("engine method", zynthian_controller(engine_method(), "test", {'value_min': 0.0, 'value_max': 1.0})),
+	("OSC path", zynthian_controller(engine_osc(), "test", {'value_min': 0.0, 'value_max': 1.0, 'osc_path': "/test"})),
+	("MIDI CC", zynthian_controller(engine_osc(), "test", {'value_min': 0, 'value_max': 127, 'midi_chan': 15, 'midi_cc': 3})),
+	("MIDI CC input (log)", zynthian_controller(engine_method(), "test", {'value_min': 20.0, 'value_max': 20000.0, 'is_logarithmic': True}))
+]
+
+print(f"{'test':<24}{'us/change':>12}")
+for name, zctrl in tests:
+	values = [zctrl.value_min + zctrl.value_range * (i % 100) / 100 for i in range(args.count)]
+	if name.startswith("MIDI CC input"):
+		values = [i % 128 for i in range(args.count)]
+		func = lambda: [zctrl.midi_control_change(v) for v in values]
+	else:
+		func = lambda: [zctrl.set_value(v) for v in values]
+	dt = timeit(func, number=1)
+	print(f"{name:<24}{1000000 * dt / args.count:>12.3f}")
+
+#------------------------------------------------------------------------------
@@ -0,0 +1,214 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+#******************************************************************************
+# ZYNTHIAN PROJECT: Zynthian GUI
+#
+# Snapshot & ZS3 load benchmark
+#
+# Copyright (C) 2015-2024 Fernando Moyano <jofemodo@zynthian.org>
+#
+#******************************************************************************
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License as
+# published by the Free Software Foundation; either version 2 of
+# the License, or any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# For a full copy of the GNU General Public License see the LICENSE.txt file.
+#
+#******************************************************************************
+#
+# Replays a directory of snapshots (.zss) with a headless state manager and
+# prints per-phase load time statistics.
+# By default, engines are replaced by stand-in engines that don't start any
+# process, but expose the banks, presets & controllers used by the snapshots,
+# so the benchmark measures the UI overhead. Use --real-engines for measuring
+# real engine startup & preset loading.
+# Zynthian UI service must be stopped, but jackd must be running.
+#
+# Usage: benchmark_snapshot_load.py [-r REPEAT] [--zs3] [--real-engines] SNAPSHOT_DIR
+#
+#******************************************************************************
+
+import os
+import sys
+import logging
+import argparse
+from glob import glob
+from time import sleep
+from json import JSONDecoder
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from zyncoder.zyncore import lib_zyncore_init
+from zyngui import zynthian_gui_config
+from zyngine import zynthian_state_manager
+from zyngine.zynthian_engine import zynthian_engine
+from zyngine.zynthian_scheduler import zynsched
+from zyngine.zynthian_load_profiler import zynloadprof
+
+#------------------------------------------------------------------------------
+# Stand-in engine
+#------------------------------------------------------------------------------
+
+
+class zynthian_engine_standin(zynthian_engine):
+	"""Engine without process, exposing the banks, presets & controllers found in snapshots"""
+
+	eng_code = None
+	start_delay = 0.0  # Simulated engine start time (seconds)
+	ctrls = {}  # Set of controller symbols indexed by engine code
+	banks = {}  # List of bank_info indexed by engine code
+	presets = {}  # List of preset_info indexed by (engine code, bank name)
+
+	def __init__(self, *args):
+		# Accept the arguments used by chain manager for any engine class
+		if isinstance(args[0], str):
+			args = args[1:]
+		super().__init__(args[0])
+		info = self.state_manager.chain_manager.engine_info[self.eng_code]
+		self.name = f"Standin/{info['NAME']}"
+		self.nickname = self.eng_code
+		self.type = info["TYPE"]
+		if len(args) > 1 and isinstance(args[-1], str):
+			self.jackname = args[-1]
+		else:
+			self.jackname = f"standin_{self.eng_code}"
+		self._ctrls = [[symbol, None, 0, 127] for symbol in sorted(self.ctrls.get(self.eng_code, []))]
+		self._ctrl_screens = []
+		if self.start_delay:
+			sleep(self.start_delay)
+
+	def get_bank_list(self, processor=None):
+		return self.banks.get(self.eng_code, [])
+
+	def set_bank(self, processor, bank):
+		return True
+
+	def get_preset_list(self, bank):
+		# Copy, as processor marks favourites in preset list entries
+		return [list(preset) for preset in self.presets.get((self.eng_code, bank[2]), [])]
+
+	def set_preset(self, processor, preset, preload=False):
+		return True
+
+	def send_controller_value(self, zctrl):
+		pass
+
+
+def get_standin_class(eng_code):
+	return type(f"zynthian_engine_standin_{eng_code}", (zynthian_engine_standin,), {"eng_code": eng_code})
+
+
+def scan_snapshots(fpaths):
+	"""Collect banks, presets & controllers used by snapshot processors"""
+
+	for fpath in fpaths:
+		try:
+			with open(fpath, "r") as fh:
+				state = JSONDecoder().decode(fh.read())
+		except Exception as e:
+			logging.error(f"Can't read snapshot '{fpath}' => {e}")
+			continue
+		eng_codes = {}
+		for chain_state in state.get("chains", {}).values():
+			for slot_state in chain_state.get("slots", []):
+				for proc_id, eng_code in slot_state.items():
+					eng_codes[str(proc_id)] = eng_code
+		for zs3_state in state.get("zs3", {}).values():
+			for proc_id, proc_state in zs3_state.get("processors", {}).items():
+				eng_code = eng_codes.get(str(proc_id))
+				if eng_code is None:
+					continue
+				zynthian_engine_standin.ctrls.setdefault(eng_code, set()).update(proc_state.get("controllers", {}).keys())
+				bank_info = proc_state.get("bank_info")
+				if bank_info:
+					banks = zynthian_engine_standin.banks.setdefault(eng_code, [])
+					if bank_info not in banks:
+						banks.append(bank_info)
+					preset_info = proc_state.get("preset_info")
+					if preset_info:
+						presets = zynthian_engine_standin.presets.setdefault((eng_code, bank_info[2]), [])
+						if preset_info not in presets:
+							presets.append(preset_info)
+
+#------------------------------------------------------------------------------
+# Report
+#------------------------------------------------------------------------------
+
+
+def print_stats(kind):
+	stats = zynloadprof.get_phase_stats(kind)
+	if not stats:
+		return
+	print(f"\n{kind.upper()} LOAD ({stats['total']['n']} loads)")
+	print(f"{'phase':<48}{'n':>6}{'mean(ms)':>11}{'p50(ms)':>11}{'max(ms)':>11}")
+	for path in ["total"] + sorted(p for p in stats if p != "total"):
+		data = stats[path]
+		name = "  " * path.count("/") + path.split("/")[-1]
+		print(f"{name:<48}{data['n']:>6}{1000 * data['mean']:>11.2f}{1000 * data['p50']:>11.2f}{1000 * data['max']:>11.2f}")
+
+#------------------------------------------------------------------------------
+# Main
+#------------------------------------------------------------------------------
+
+
+parser = argparse.ArgumentParser(description="Replay snapshots and print per-phase load time statistics")
+parser.add_argument("snapshot_dir", help="Directory containing .zss files")
+parser.add_argument("-r", "--repeat", type=int, default=3, help="Times to replay the snapshot set (default: 3)")
+parser.add_argument("--zs3", action="store_true", help="Also recall every ZS3 in each snapshot")
+parser.add_argument("--real-engines", action="store_true", help="Use real engines instead of stand-ins")
+parser.add_argument("--start-delay", type=float, default=0.0, help="Simulated stand-in engine start time in seconds")
+parser.add_argument("--no-differential", action="store_true", help="Rebuild all chains on every snapshot load")
+parser.add_argument("-v", "--verbose", action="store_true", help="Print log messages")
+args = parser.parse_args()
+
+logging.basicConfig(level=logging.INFO if args.verbose else logging.ERROR, stream=sys.stderr)
+
+fpaths = sorted(glob(os.path.join(args.snapshot_dir, "*.zss")))
+if not fpaths:
+	print(f"No snapshots found in '{args.snapshot_dir}'")
+	sys.exit(1)
+
+try:
+	lib_zyncore = lib_zyncore_init()
+	zynthian_gui_config.num_zynswitches = lib_zyncore.get_num_zynswitches()
+	zynthian_gui_config.last_zynswitch_index = lib_zyncore.get_last_zynswitch_index()
+	zynthian_gui_config.num_zynpots = lib_zyncore.get_num_zynpots()
+except Exception as e:
+	logging.error(f"ERROR configuring control I/O subsytem: {e}")
+
+state_manager = zynthian_state_manager.zynthian_state_manager()
+chain_manager = state_manager.chain_manager
+if args.no_differential:
+	chain_manager.differential_state = False
+
+if not args.real_engines:
+	scan_snapshots(fpaths)
+	zynthian_engine_standin.start_delay = args.start_delay
+	chain_manager.engine_pool.size = 0
+	for eng_code, info in chain_manager.engine_info.items():
+		if info.get("ENGINE"):
+			info["ENGINE"] = get_standin_class(eng_code)
+
+zynloadprof.reset()
+try:
+	for i in range(args.repeat):
+		for fpath in fpaths:
+			print(f"[{i + 1}/{args.repeat}] {os.path.basename(fpath)}", file=sys.stderr)
+			state_manager.load_snapshot(fpath)
+			if args.zs3:
+				for zs3_id in list(state_manager.zs3.keys()):
+					state_manager.load_zs3(zs3_id)
+finally:
+	print_stats("snapshot")
+	print_stats("zs3")
+	state_manager.stop()
+	zynsched.stop()
+
+#------------------------------------------------------------------------------
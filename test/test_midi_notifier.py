@@ -0,0 +1,158 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+#******************************************************************************
+# ZYNTHIAN PROJECT: Zynthian GUI
+#
+# Zynthian MIDI notifier tests
+#
+# Copyright (C) 2015-2024 Fernando Moyano <jofemodo@zynthian.org>
+#
+#******************************************************************************
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License as
+# published by the Free Software Foundation; either version 2 of
+# the License, or any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# For a full copy of the GNU General Public License see the LICENSE.txt file.
+#
+#******************************************************************************
+#
+# Drives wait() & wake() of zynthian_midi_notifier with fake zyncore libraries:
+# one exporting an eventfd, one exporting only a callback setter and one
+# exporting neither. The module is loaded from its file, so the zyngine package
+# dependencies are not needed.
+#
+#******************************************************************************
+
+import os
+import unittest
+import importlib.util
+from time import monotonic
+from threading import Thread
+
+module_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "zyngine", "zynthian_midi_notifier.py")
+spec = importlib.util.spec_from_file_location("zynthian_midi_notifier", module_path)
+zynthian_midi_notifier = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(zynthian_midi_notifier)
+notifier_class = zynthian_midi_notifier.zynthian_midi_notifier
+
+
+class fake_lib_eventfd:
+    """zyncore exporting an eventfd"""
+
+    def __init__(self):
+        self.evfd = os.eventfd(0, os.EFD_NONBLOCK)
+
+    def get_zynmidi_eventfd(self):
+        return self.evfd
+
+    def write_midi(self):
+        os.eventfd_write(self.evfd, 1)
+
+    def close(self):
+        os.close(self.evfd)
+
+
+class fake_lib_callback:
+    """zyncore exporting only a callback setter, that must not be used"""
+
+    def __init__(self):
+        self.cb = None
+
+    def setup_zynmidi_cb(self, cb):
+        self.cb = cb
+
+
+class fake_lib_none:
+    """zyncore exporting neither"""
+    pass
+
+
+class test_midi_notifier(unittest.TestCase):
+
+    def wait_in_thread(self, notifier, timeout):
+        res = {}
+
+        def run():
+            ts = monotonic()
+            res["ret"] = notifier.wait(timeout)
+            res["elapsed"] = monotonic() - ts
+
+        thread = Thread(target=run)
+        thread.start()
+        return thread, res
+
+    @unittest.skipUnless(hasattr(os, "eventfd"), "os.eventfd not available")
+    def test_eventfd(self):
+        lib = fake_lib_eventfd()
+        notifier = notifier_class(lib)
+        self.assertEqual(notifier.mode, notifier.MODE_EVENTFD)
+
+        # Timeout without events
+        ts = monotonic()
+        self.assertTrue(notifier.wait(0.05))
+        self.assertGreaterEqual(monotonic() - ts, 0.04)
+
+        # MIDI written => wait returns at once and resets the counter
+        lib.write_midi()
+        ts = monotonic()
+        self.assertTrue(notifier.wait(1))
+        self.assertLess(monotonic() - ts, 0.5)
+        with self.assertRaises(BlockingIOError):
+            os.eventfd_read(lib.evfd)
+
+        # wake() releases a blocked waiter
+        thread, res = self.wait_in_thread(notifier, 5)
+        notifier.wake()
+        thread.join(2)
+        self.assertFalse(thread.is_alive())
+        self.assertTrue(res["ret"])
+        self.assertLess(res["elapsed"], 1)
+
+        # close() releases a blocked waiter, that gets False
+        thread, res = self.wait_in_thread(notifier, 5)
+        notifier.close()
+        thread.join(2)
+        self.assertFalse(thread.is_alive())
+        self.assertFalse(res["ret"])
+
+        notifier.release()
+        self.assertIsNone(notifier.wake_fds)
+        lib.close()
+
+    def test_callback_not_used(self):
+        lib = fake_lib_callback()
+        notifier = notifier_class(lib, poll_interval=0.01)
+        self.assertEqual(notifier.mode, notifier.MODE_POLL)
+        self.assertIsNone(lib.cb)
+        self.check_poll(notifier)
+
+    def test_poll(self):
+        notifier = notifier_class(fake_lib_none(), poll_interval=0.01)
+        self.assertEqual(notifier.mode, notifier.MODE_POLL)
+        self.check_poll(notifier)
+
+    def check_poll(self, notifier):
+        # Sleeps poll interval, not the full timeout
+        ts = monotonic()
+        self.assertTrue(notifier.wait(1))
+        self.assertLess(monotonic() - ts, 0.5)
+        # Sleeps timeout if shorter than poll interval
+        ts = monotonic()
+        self.assertTrue(notifier.wait(0))
+        self.assertLess(monotonic() - ts, 0.01)
+        # wake() is harmless. Waiter returns after poll interval.
+        notifier.wake()
+        notifier.close()
+        self.assertFalse(notifier.wait(None))
+        notifier.release()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,109 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+#******************************************************************************
+# ZYNTHIAN PROJECT: Zynthian GUI
+#
+# Zynthian preset index tests
+#
+# Copyright (C) 2015-2024 Fernando Moyano <jofemodo@zynthian.org>
+#
+#******************************************************************************
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License as
+# published by the Free Software Foundation; either version 2 of
+# the License, or any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# For a full copy of the GNU General Public License see the LICENSE.txt file.
+#
+#******************************************************************************
+#
+# Checks that zynthian_preset_index keeps watched directories up to date when
+# they are deleted & recreated or renamed away & back, so the kernel drops the
+# inotify watch. The zyngine modules are loaded from their files, so the zyngine
+# package dependencies are not needed.
+#
+#******************************************************************************
+
+import os
+import sys
+import types
+import shutil
+import tempfile
+import unittest
+from time import sleep, monotonic
+
+zyngine_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "zyngine")
+if "zyngine" not in sys.modules:
+    # Bare package, so importing its modules doesn't run zyngine/__init__.py
+    zyngine = types.ModuleType("zyngine")
+    zyngine.__path__ = [zyngine_dir]
+    sys.modules["zyngine"] = zyngine
+from zyngine.zynthian_preset_index import zynthian_preset_index
+
+
+class test_preset_index(unittest.TestCase):
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.bank = os.path.join(self.root, "bank")
+        os.mkdir(self.bank)
+        self.touch("a.xiz")
+        self.index = zynthian_preset_index()
+
+    def tearDown(self):
+        if self.index.watcher:
+            self.index.watcher.close()
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    def touch(self, fname):
+        open(os.path.join(self.bank, fname), "w").close()
+
+    def wait_files(self, files, timeout=2.0):
+        """Wait until the index returns the expected files, as inotify events are asynchronous"""
+
+        ts = monotonic()
+        while True:
+            res = self.index.get_files(self.bank)
+            if res == files or monotonic() - ts > timeout:
+                return res
+            sleep(0.02)
+
+    def test_delete_recreate(self):
+        self.assertEqual(self.index.get_files(self.bank), ["a.xiz"])
+        if not self.index.watcher:
+            self.skipTest("inotify not available")
+        self.assertIn(self.bank, self.index.watched)
+
+        shutil.rmtree(self.bank)
+        os.mkdir(self.bank)
+        self.assertEqual(self.wait_files([]), [])
+
+        # New files in the recreated directory must be found
+        self.touch("b.xiz")
+        self.assertEqual(self.wait_files(["b.xiz"]), ["b.xiz"])
+        self.assertIn(self.bank, self.index.watched)
+        self.assertIn(self.bank, self.index.watcher.path_wds)
+
+    def test_rename_away_and_back(self):
+        self.assertEqual(self.index.get_files(self.bank), ["a.xiz"])
+        if not self.index.watcher:
+            self.skipTest("inotify not available")
+
+        tmp_path = os.path.join(self.root, "moved")
+        os.rename(self.bank, tmp_path)
+        self.assertEqual(self.wait_files([]), [])
+        os.rename(tmp_path, self.bank)
+        self.assertEqual(self.wait_files(["a.xiz"]), ["a.xiz"])
+
+        self.touch("b.xiz")
+        self.assertEqual(self.wait_files(["a.xiz", "b.xiz"]), ["a.xiz", "b.xiz"])
+
+
+if __name__ == "__main__":
+    unittest.main()
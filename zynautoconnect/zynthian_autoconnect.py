@@ -30,11 +30,12 @@ import logging
 import alsa_midi
 import json
 from time import sleep
-from threading import Thread, Lock
+from threading import Lock
 from subprocess import check_output
 
 # Zynthian specific modules
 from zyncoder.zyncore import lib_zyncore
+from zyngine.zynthian_scheduler import zynsched
 from zyngui import zynthian_gui_config
 import zynconf
 
@@ -58,7 +59,7 @@ MAIN_MIX_CHAN = 17 				# TODO: Get this from mixer
 
 jclient = None					# JACK client
 aclient = None					# ALSA client
-thread = None					# Thread to check for changed MIDI ports
+task = None						# Scheduler task to check for changed MIDI ports
 lock = None						# Manage concurrence
 exit_flag = False				# True to exit thread
 paused_flag = False				# True id autoconnect task is paused
@@ -275,6 +276,8 @@ def update_midi_in_dev_mode(idev):
 	"""
 	if 0 <= idev < len(devices_in_mode):
 		devices_in_mode[idev] = lib_zyncore.zmip_get_flag_active_chain(idev)
+		if chain_manager:
+			chain_manager.compile_midi_cc_routes(zmips=[idev])
 
 
 def update_midi_in_dev_mode_all():
@@ -282,6 +285,8 @@ def update_midi_in_dev_mode_all():
 
 	for idev in range(len(devices_in_mode)):
 		devices_in_mode[idev] = lib_zyncore.zmip_get_flag_active_chain(idev)
+	if chain_manager:
+		chain_manager.compile_midi_cc_routes()
 
 
 def reset_midi_in_dev_all():
@@ -292,6 +297,8 @@ def reset_midi_in_dev_all():
 		devices_in_mode[zmip] = 1
 		for zmop in range(16):
 			lib_zyncore.zmop_set_route_from(zmop, zmip, 1)
+	if chain_manager:
+		chain_manager.compile_midi_cc_routes()
 
 
 # ------------------------------------------------------------------------------
@@ -1007,43 +1014,26 @@ def get_hw_dst_ports():
 	return hw_midi_dst_ports
 
 
-def auto_connect_thread():
-	"""Thread to run autoconnect, checking if physical (hardware) interfaces have changed, e.g. USB plug"""
+def auto_connect_task():
+	"""Scheduler task to run autoconnect, checking if physical (hardware) interfaces have changed, e.g. USB plug"""
 
-	deferred_timeout = 2  # Period to run deferred connect (in seconds)
-	deferred_inc = 0.1  # Delay between loop cycles (in seconds) - allows faster exit from thread
-	deferred_count = 5  # Run at startup
-	do_audio = False
-	do_midi = False
-
-	while not exit_flag:
-		if not paused_flag:
-			try:
-				if deferred_count > deferred_timeout:
-					deferred_count = 0
-					# Check if hardware MIDI ports changed, e.g. USB inserted/removed
-					if update_hw_midi_ports():
-						do_midi = True
-					# Check if requested to run midi connect (slow)
-					if deferred_midi_connect:
-						do_midi = True
-					# Check if requested to run audio connect (slow)
-					if deferred_audio_connect:
-						do_audio = True
-
-				if do_midi:
-					midi_autoconnect()
-					do_midi = False
-
-				if do_audio:
-					audio_autoconnect()
-					do_audio = False
-
-			except Exception as err:
-				logger.error("ZynAutoConnect ERROR: {}".format(err))
-
-		sleep(deferred_inc)
-		deferred_count += deferred_inc
+	if exit_flag or paused_flag:
+		return
+	try:
+		do_midi = False
+		# Check if hardware MIDI ports changed, e.g. USB inserted/removed
+		if update_hw_midi_ports():
+			do_midi = True
+		# Check if requested to run midi connect (slow)
+		if deferred_midi_connect:
+			do_midi = True
+		if do_midi:
+			midi_autoconnect()
+		# Check if requested to run audio connect (slow)
+		if deferred_audio_connect:
+			audio_autoconnect()
+	except Exception as err:
+		logger.error("ZynAutoConnect ERROR: {}".format(err))
 
 
 def acquire_lock():
@@ -1101,7 +1091,7 @@ def start(sm):
 	sm : State manager object
 	"""
 
-	global exit_flag, jclient, aclient, thread, lock, chain_manager, state_manager, hw_audio_dst_ports, sidechain_map
+	global exit_flag, jclient, aclient, task, lock, chain_manager, state_manager, hw_audio_dst_ports, sidechain_map
 
 	if jclient:
 		return  # Already started
@@ -1135,21 +1125,18 @@ def start(sm):
 	# Create Lock object (Mutex) to avoid concurrence problems
 	lock = Lock()
 	
-	# Start port change checking thread
-	thread = Thread(target=auto_connect_thread, args=())
-	thread.daemon = True  # thread dies with the program
-	thread.name = "Autoconnect"
-	thread.start()
-	
+	# Start port change checking task (every 2s). It runs in low priority lane because it may be slow.
+	task = zynsched.add_periodic(2, auto_connect_task, name="autoconnect", lane=zynsched.LANE_LOW, delay=0)
+
 
 def stop():
-	"""Reset state and stop autoconnect thread"""
+	"""Reset state and stop autoconnect task"""
 
-	global exit_flag, jclient, thread, lock
+	global exit_flag, jclient, task, lock
 	exit_flag = True
-	if thread:
-		thread.join()
-		thread = None
+	if task:
+		task.cancel(wait=True)
+		task = None
 
 	if acquire_lock():
 		release_lock()
@@ -1173,13 +1160,13 @@ def resume():
 
 
 def is_running():
-	"""Check if autoconnect thread is running
+	"""Check if autoconnect task is running
 	
 	Returns : True if running"""
 
-	global thread
-	if thread:
-		return thread.is_alive()
+	global task
+	if task:
+		return task.is_active()
 	return False
 
 
@@ -419,6 +419,12 @@ class zynthian_chain:
 
         zynautoconnect.release_lock()
 
+    def get_routing_state(self):
+        """Get a comparable snapshot of the routing settings used by rebuild_graph"""
+
+        return (self.midi_chan, list(self.midi_in), list(self.midi_out), self.midi_thru,
+                list(self.audio_in), list(self.audio_out), self.audio_thru)
+
     def rebuild_graph(self):
         """Build dictionary of lists of destinations mapped by source"""
 
@@ -23,7 +23,11 @@
 #
 # ****************************************************************************
 
+import os
 import logging
+from time import monotonic
+from threading import RLock
+from concurrent.futures import ThreadPoolExecutor
 
 # Zynthian specific modules
 import zynautoconnect
@@ -35,7 +39,9 @@ from zyngine.zynthian_chain import *
 from zyngine.zynthian_engine_jalv import *
 from zyngine.zynthian_engine_pianoteq import *
 from zyngine.zynthian_signal_manager import zynsigman
+from zyngine.zynthian_load_profiler import zynloadprof
 from zyngine.zynthian_processor import zynthian_processor
+from zyngine.zynthian_engine_pool import zynthian_engine_pool
 from zyngui import zynthian_gui_config
 
 # ----------------------------------------------------------------------------
@@ -80,6 +86,9 @@ class zynthian_chain_manager:
 
     engine_info = None
     single_processor_engines = ["BF", "MD", "PT", "PD", "AE", "SL", "IR"]
+    # Engines that can be started concurrently when restoring a snapshot.
+    # Their constructors just launch the engine process, without touching chains or processors.
+    parallel_start_engines = ["ZY", "FS", "SF", "LS", "PT", "SL", "JV"]
 
     def __init__(self, state_manager):
         """ Create an instance of a chain manager
@@ -99,6 +108,14 @@ class zynthian_chain_manager:
         self.ordered_chain_ids = []  # List of chain IDs in display order
         self.zyngine_counter = 0  # Appended to engine names for uniqueness
         self.zyngines = {}  # List of instantiated engines
+        self.prestarted_engines = {}  # Lists of (engine, start time, jackname) started in advance, indexed by engine code
+        self.engine_pool = zynthian_engine_pool(self)  # Idle engine instances for instant processor insertion
+        self.reserved_jacknames = set()  # Jacknames assigned to engines not attached to processors yet
+        self.jackname_lock = RLock()
+        self.engine_start_times = {}  # Engine start time in seconds, indexed by engine key
+        self.parallel_engine_start = os.environ.get('ZYNTHIAN_PARALLEL_ENGINE_START', "1") != "0"
+        self.engine_start_workers = int(os.environ.get('ZYNTHIAN_ENGINE_START_WORKERS', "4"))
+        self.differential_state = os.environ.get('ZYNTHIAN_DIFFERENTIAL_SNAPSHOT', "1") != "0"
         self.processors = {}  # Dictionary of processor objects indexed by UID
         self.active_chain_id = None  # Active chain id
         self.midi_chan_2_chain_ids = [list() for _ in range(MAX_NUM_MIDI_CHANS)]  # Chain IDs mapped by MIDI channel
@@ -106,6 +123,7 @@ class zynthian_chain_manager:
         self.absolute_midi_cc_binding = {}  # Map of list of zctrls indexed by 24-bit ZMOP,CHAN,CC
         self.chain_midi_cc_binding = {}  # Map of list of zctrls indexed by 16-bit CHAIN,CC
         self.chan_midi_cc_binding = {}  # Map of list of zctrls indexed by 16-bit CHAN,CC
+        self.midi_cc_routes = {}  # Compiled CC routing: (absolute zctrls, chain/chan zctrls, pedal flag) indexed by (ZMIP, CHAN, CC)
 
         # Map of lists of currently held (sustained) zctrls, indexed by cc number - first element indicates pedal state
         self.held_zctrls = {
@@ -127,8 +145,8 @@ class zynthian_chain_manager:
         # Yes, names aren't good. They should be refactored!
         eng_info = zynthian_lv2.get_engines()
 
-        # Don't recalculate if info not changed
-        if eng_info == cls.engine_info:
+        # Don't recalculate if info not reloaded
+        if eng_info is cls.engine_info:
             return cls.engine_info
 
         cls.engine_info = eng_info
@@ -150,6 +168,8 @@ class zynthian_chain_manager:
             cls.engine_info['PT']['ENGINE'] = None
             cls.engine_info['PT']['ENABLED'] = False
 
+        # Enabled flags may have changed
+        zynthian_lv2.invalidate_engine_catalog()
         return cls.engine_info
 
     @classmethod
@@ -243,7 +263,7 @@ class zynthian_chain_manager:
         #logging.debug(f"ordered_chain_ids = {self.ordered_chain_ids}")
         #logging.debug(f"midi_chan_2_chain_ids = {self.midi_chan_2_chain_ids}")
 
-        self.active_chain_id = chain_id
+        self.set_active_chain_id(chain_id)
         self.state_manager.end_busy("add_chain")
         return chain_id
 
@@ -632,7 +652,7 @@ class zynthian_chain_manager:
             chain = next(iter(self.chains.values()))
             chain_id = chain.chain_id
 
-        self.active_chain_id = chain_id
+        self.set_active_chain_id(chain_id)
         zynsigman.send_queued(zynsigman.S_CHAIN_MAN, self.SS_SET_ACTIVE_CHAIN, active_chain=self.active_chain_id)
 
         # If chain receives MIDI, set the active chain in ZynMidiRouter (lib_zyncore)
@@ -655,6 +675,13 @@ class zynthian_chain_manager:
 
         return self.active_chain_id
 
+    def set_active_chain_id(self, chain_id):
+        """Set active chain id and update the CC routes of devices in active chain mode"""
+
+        if chain_id != self.active_chain_id:
+            self.active_chain_id = chain_id
+            self.compile_midi_cc_routes(zmips=self.get_acti_zmips())
+
     def set_active_chain_by_object(self, chain_object):
         """Select the active chain
 
@@ -957,21 +984,28 @@ class zynthian_chain_manager:
         if eng_code in self.zyngines:
             # Engine already started
             zyngine = self.zyngines[eng_code]
+            jackname = None
         else:
-            # Start new engine instance
-            info = self.engine_info[eng_code]
-            zynthian_engine_class = info["ENGINE"]
+            if self.prestarted_engines.get(eng_code):
+                # Use engine instance started in advance
+                zyngine, start_time, jackname = self.prestarted_engines[eng_code].pop(0)
+            else:
+                # Use idle engine instance from pool or start a new one
+                pooled = self.engine_pool.get(eng_code)
+                if pooled:
+                    zyngine, start_time, jackname = pooled
+                else:
+                    with zynloadprof.phase("engine_start"):
+                        zyngine, start_time, jackname = self.create_engine(eng_code)
             if eng_code[0:3] == "JV/":
                 eng_key = f"JV/{self.zyngine_counter}"
-                zyngine = zynthian_engine_class(eng_code, self.state_manager, False)
             elif eng_code == "SF":
                 eng_key = f"{eng_code}/{self.zyngine_counter}"
-                zyngine = zynthian_engine_class(self.state_manager)
             else:
                 eng_key = eng_code
-                zyngine = zynthian_engine_class(self.state_manager)
 
             self.zyngines[eng_key] = zyngine
+            self.engine_start_times[eng_key] = start_time
             self.zyngine_counter += 1
 
         # Set extended configuration (optional)
@@ -979,8 +1013,115 @@ class zynthian_chain_manager:
             zyngine.set_extended_config(eng_config)
 
         processor.set_engine(zyngine)
+        # Processor provides the jackname from now on
+        self.release_jackname(jackname)
         return zyngine
 
+    def create_engine(self, eng_code, jackname=None):
+        """Create a new engine instance
+
+        It may be called from worker threads.
+
+        eng_code : Engine short code
+        jackname : Reserved jack client name, for engines supporting several instances (default: reserve next available)
+        Returns : tuple (engine object, start time in seconds, reserved jackname or None)
+        """
+
+        ts = monotonic()
+        zynthian_engine_class = self.engine_info[eng_code]["ENGINE"]
+        if jackname is None:
+            jackname = self.reserve_jackname(eng_code)
+        try:
+            if eng_code[0:3] == "JV/":
+                zyngine = zynthian_engine_class(eng_code, self.state_manager, False, jackname)
+            elif eng_code == "SF":
+                zyngine = zynthian_engine_class(self.state_manager, jackname)
+            else:
+                zyngine = zynthian_engine_class(self.state_manager)
+        except:
+            self.release_jackname(jackname)
+            raise
+        return zyngine, monotonic() - ts, jackname
+
+    def prestart_engines(self, state):
+        """Start the engine instances required by a chain state concurrently
+
+        Engine processes are launched from a pool of worker threads. Started engines are kept
+        in prestarted_engines until start_engine attaches them to processors, so processors are
+        still added, and presets restored, in snapshot order.
+
+        state : Chain state, as passed to set_state
+        """
+
+        jobs = []
+        for chain_state in state.values():
+            for slot_state in chain_state.get("slots", []):
+                for eng_code in slot_state.values():
+                    if eng_code not in self.engine_info or eng_code[0:2] not in self.parallel_start_engines:
+                        continue
+                    if not self.engine_info[eng_code]["ENGINE"]:
+                        continue
+                    # Multi-instance engines => one instance per processor, with jackname assigned in advance
+                    jackname = self.reserve_jackname(eng_code)
+                    if jackname is None and (eng_code in self.zyngines or (eng_code, None) in jobs):
+                        continue
+                    # Take idle instances from the engine pool
+                    pooled = self.engine_pool.get(eng_code)
+                    if pooled:
+                        self.release_jackname(jackname)
+                        self.add_prestarted_engine(eng_code, pooled)
+                        continue
+                    jobs.append((eng_code, jackname))
+
+        # Nothing to gain from a single engine
+        if len(jobs) < 2:
+            for eng_code, jackname in jobs:
+                self.release_jackname(jackname)
+            return
+
+        logging.info(f"Starting {len(jobs)} engines in parallel ...")
+        self.state_manager.set_busy_details(f"starting {len(jobs)} engines")
+        ts = monotonic()
+        with ThreadPoolExecutor(max_workers=self.engine_start_workers, thread_name_prefix="engine_start") as executor:
+            futures = [executor.submit(self.create_engine, eng_code, jackname) for eng_code, jackname in jobs]
+            for (eng_code, jackname), future in zip(jobs, futures):
+                try:
+                    self.add_prestarted_engine(eng_code, future.result())
+                except Exception as e:
+                    # start_engine will try again when adding the processor
+                    logging.error(f"Can't start engine '{eng_code}' => {e}")
+        logging.info(f"Started {len(jobs)} engines in {monotonic() - ts:.2f}s")
+
+    def add_prestarted_engine(self, eng_code, entry):
+        if eng_code not in self.prestarted_engines:
+            self.prestarted_engines[eng_code] = []
+        self.prestarted_engines[eng_code].append(entry)
+
+    def stop_prestarted_engines(self):
+        """Stop engines started in advance that have not been attached to any processor"""
+
+        for eng_code, engines in self.prestarted_engines.items():
+            for zyngine, start_time, jackname in engines:
+                logging.debug(f"Stopping Unused Prestarted Engine '{eng_code}' ...")
+                try:
+                    zyngine.stop()
+                except Exception as e:
+                    logging.error(f"Can't stop engine '{eng_code}' => {e}")
+                self.release_jackname(jackname)
+        self.prestarted_engines = {}
+
+    def get_engine_start_times_report(self):
+        """Get a text report of engine start times, slowest first
+
+        Returns : List of text lines
+        """
+
+        lines = []
+        for eng_key, start_time in sorted(self.engine_start_times.items(), key=lambda item: -item[1]):
+            if eng_key in self.zyngines:
+                lines.append(f"{eng_key} ({self.zyngines[eng_key].get_name()}): {1000 * start_time:.0f}ms")
+        return lines
+
     def stop_unused_engines(self):
         """Stop engines that are not used by any processors"""
         for eng_key in list(self.zyngines.keys()):
@@ -989,6 +1130,7 @@ class zynthian_chain_manager:
                 self.state_manager.set_busy_details(f"stopping engine {self.zyngines[eng_key].get_name()}")
                 self.zyngines[eng_key].stop()
                 del self.zyngines[eng_key]
+                self.engine_start_times.pop(eng_key, None)
 
     def stop_unused_jalv_engines(self):
         """Stop JALV engines that are not used by any processors"""
@@ -998,6 +1140,7 @@ class zynthian_chain_manager:
                 self.state_manager.set_busy_details(f"stopping engine {self.zyngines[eng_key].get_name()}")
                 self.zyngines[eng_key].stop()
                 del self.zyngines[eng_key]
+                self.engine_start_times.pop(eng_key, None)
 
     def filtered_engines_by_cat(self, etype, all=False):
         """Get dictionary of engine info filtered by type and indexed by catagory
@@ -1005,29 +1148,24 @@ class zynthian_chain_manager:
             all: include "disabled" engine too
         """
         result = {}
-        if etype in zynthian_lv2.engines_by_type:
-            # Add categories in right order
-            for eng_cat in zynthian_lv2.engine_categories[etype]:
-                result[eng_cat] = {}
-            # Add engines to each category
-            for eng_code, info in zynthian_lv2.engines_by_type[etype].items():
-                eng_cat = info["CAT"]
-                if eng_cat in result:
-                    hide_if_single_proc = eng_code not in self.single_processor_engines or eng_code not in self.zyngines
-                    if (info["ENABLED"] or all) and hide_if_single_proc:
-                        result[eng_cat][eng_code] = info
-                else:
-                    logging.error(f"Engine '{eng_code}' has invalid category '{eng_cat}'!")
-            # Remove empty categories
-            for eng_cat in list(result.keys()):
-                if not result[eng_cat]:
-                    del result[eng_cat]
+        catalog = zynthian_lv2.get_engine_catalog()
+        infos = catalog.by_type.get(etype, {})
+        # Categories come in right order and without empty ones
+        for eng_cat, eng_codes in catalog.get_engines_by_cat(etype, not all).items():
+            cat_infos = {}
+            for eng_code in eng_codes:
+                # Hide single processor engines already running
+                if eng_code not in self.single_processor_engines or eng_code not in self.zyngines:
+                    cat_infos[eng_code] = infos[eng_code]
+            if cat_infos:
+                result[eng_cat] = cat_infos
         return result
 
     def get_next_jackname(self, jackname, sanitize=True):
         """Get the next available jackname
 
         jackname : stub of jackname
+        sanitize : True to replace characters not allowed in jack names
         """
 
         try:
@@ -1040,6 +1178,8 @@ class zynthian_chain_manager:
                 jn = processor.get_jackname()
                 if jn is not None and jn.startswith(jackname):
                     names.add(jn)
+            with self.jackname_lock:
+                names |= self.reserved_jacknames
             i = 1
             while f"{jackname}-{i:02}" in names:
                 i += 1
@@ -1048,6 +1188,32 @@ class zynthian_chain_manager:
             logging.error(e)
             return f"{jackname}-00"
 
+    def reserve_jackname(self, eng_code):
+        """Reserve the next available jackname for a new instance of a multi-instance engine
+
+        Reserved jacknames are skipped by get_next_jackname until released, so engines
+        can be started in advance, from other threads, without jackname clashes.
+
+        eng_code : Engine short code
+        Returns : jackname or None if the engine doesn't support several instances
+        """
+
+        if eng_code[0:3] == "JV/":
+            stub = self.engine_info[eng_code]["NAME"]
+        elif eng_code == "SF":
+            stub = "sfizz"
+        else:
+            return None
+        with self.jackname_lock:
+            jackname = self.get_next_jackname(stub)
+            self.reserved_jacknames.add(jackname)
+        return jackname
+
+    def release_jackname(self, jackname):
+        if jackname:
+            with self.jackname_lock:
+                self.reserved_jacknames.discard(jackname)
+
     # ------------------------------------------------------------------------
     # State Management
     # ------------------------------------------------------------------------
@@ -1073,48 +1239,129 @@ class zynthian_chain_manager:
         #TODO: Remove superfluous parameters
         return state
 
-    def set_state(self, state, engine_config):
+    @zynloadprof.timed("chains")
+    def set_state(self, state, engine_config, differential=None):
         """Create chains from state
 
         state : List of chain states
         engine_config: Extended engine config
+        differential : True to keep running chains matching the state, False to rebuild all chains (Default: differential_state)
         Returns : True on success
         """
 
         self.state_manager.start_busy("set_chain_state", None, "loading chains")
 
-        # Clean all chains but don't stop unused engines
-        self.remove_all_chains(False)
-
-        # Reusing Jalv engine instances raise problems (audio routing & jack names, etc..),
-        # so we stop Jalv engines!
-        self.stop_unused_jalv_engines()  # TODO: Can we factor this out? => Not yet!!
-
-        for chain_id, chain_state in state.items():
-            chain_id = int(chain_id)
-            self.add_chain_from_state(chain_id, chain_state)
-            if "slots" in chain_state:
-                for slot_state in chain_state["slots"]:
-                    # slot_state is a dict of proc_id:proc_type for procs in this slot
-                    for index, proc_id in enumerate(slot_state):
-                        eng_code = slot_state[proc_id]
-                        try:
-                            eng_config = engine_config[eng_code]
-                        except:
-                            eng_config = None
-                        # Use index to identify first proc in slot (add in series) - others are added in parallel
-                        if index:
-                            mode = CHAIN_MODE_PARALLEL
-                        else:
-                            mode = CHAIN_MODE_SERIES
-                        self.add_processor(chain_id, eng_code, mode, proc_id=int(proc_id), fast_refresh=False, eng_config=eng_config)
-            if "fader_pos" in chain_state and self.get_slot_count(chain_id, "Audio Effect") > chain_state["fader_pos"]:
-                self.chains[chain_id].fader_pos = chain_state["fader_pos"]
-            else:
-                self.chains[chain_id].fader_pos = 0
+        if differential is None:
+            differential = self.differential_state
+
+        # Find chains that are already running with the same layout
+        kept_chain_ids = []
+        if differential:
+            for chain_id, chain_state in state.items():
+                if self.is_chain_state_running(int(chain_id), chain_state):
+                    kept_chain_ids.append(int(chain_id))
+
+        # Clean all other chains but don't stop unused engines
+        with zynloadprof.phase("teardown"):
+            for chain_id in list(self.chains.keys()):
+                if chain_id not in kept_chain_ids and chain_id in self.chains:
+                    self.remove_chain(chain_id, False, fast_refresh=False)
+            if kept_chain_ids:
+                logging.info(f"Keeping running chains {kept_chain_ids}")
+
+            # Reusing Jalv engine instances raise problems (audio routing & jack names, etc..),
+            # so we stop Jalv engines!
+            self.stop_unused_jalv_engines()  # TODO: Can we factor this out? => Not yet!!
+
+        # Launch engine processes concurrently. Processors are attached below, in order.
+        ts = monotonic()
+        if self.parallel_engine_start:
+            try:
+                with zynloadprof.phase("engine_prestart"):
+                    self.prestart_engines({chain_id: chain_state for chain_id, chain_state in state.items() if int(chain_id) not in kept_chain_ids})
+            except Exception as e:
+                logging.error(f"Parallel engine start failed => {e}")
+
+        with zynloadprof.phase("processors"):
+            for chain_id, chain_state in state.items():
+                chain_id = int(chain_id)
+                if chain_id in kept_chain_ids:
+                    # Update chain settings. Processors are kept, but MIDI learning is restored from ZS3.
+                    self.add_chain_from_state(chain_id, chain_state)
+                    if "title" in chain_state:
+                        self.chains[chain_id].set_title(chain_state["title"])
+                    for processor in self.chains[chain_id].get_processors():
+                        self.clean_midi_learn(processor)
+                else:
+                    self.add_chain_from_state(chain_id, chain_state)
+                    if "slots" in chain_state:
+                        for slot_state in chain_state["slots"]:
+                            # slot_state is a dict of proc_id:proc_type for procs in this slot
+                            for index, proc_id in enumerate(slot_state):
+                                eng_code = slot_state[proc_id]
+                                try:
+                                    eng_config = engine_config[eng_code]
+                                except:
+                                    eng_config = None
+                                # Use index to identify first proc in slot (add in series) - others are added in parallel
+                                if index:
+                                    mode = CHAIN_MODE_PARALLEL
+                                else:
+                                    mode = CHAIN_MODE_SERIES
+                                self.add_processor(chain_id, eng_code, mode, proc_id=int(proc_id), fast_refresh=False, eng_config=eng_config)
+                if "fader_pos" in chain_state and self.get_slot_count(chain_id, "Audio Effect") > chain_state["fader_pos"]:
+                    self.chains[chain_id].fader_pos = chain_state["fader_pos"]
+                else:
+                    self.chains[chain_id].fader_pos = 0
+
+        if kept_chain_ids:
+            # Restore chain order from state
+            ordered_chain_ids = [int(chain_id) for chain_id in state if int(chain_id) in self.chains]
+            self.ordered_chain_ids = ordered_chain_ids + [chain_id for chain_id in self.ordered_chain_ids if chain_id not in ordered_chain_ids]
+
+        self.stop_prestarted_engines()
+        logging.info(f"Chains restored in {monotonic() - ts:.2f}s. Engine start times:")
+        for line in self.get_engine_start_times_report():
+            logging.info(f"  {line}")
 
         self.state_manager.end_busy("set_chain_state")
 
+    def is_chain_state_running(self, chain_id, chain_state):
+        """Check if a chain is running with the processors & routing described by a chain state
+
+        chain_id : Chain ID
+        chain_state : Chain state, as returned by chain's get_state
+        Returns : True if chain can be kept when restoring the state
+        """
+
+        chain = self.chains.get(chain_id)
+        if chain is None:
+            return False
+        slots = []
+        for slot in chain.midi_slots + chain.synth_slots + chain.audio_slots:
+            if slot:
+                slots.append([(processor.id, processor.eng_code) for processor in slot])
+        target_slots = []
+        for slot_state in chain_state.get("slots", []):
+            if slot_state:
+                target_slots.append([(int(proc_id), eng_code) for proc_id, eng_code in slot_state.items()])
+        if slots != target_slots:
+            return False
+        # These engines manage several chains => always rebuild
+        for slot in slots:
+            for proc_id, eng_code in slot:
+                if eng_code in ("BF", "AE"):
+                    return False
+        if chain_state.get("midi_chan") != chain.midi_chan:
+            return False
+        if chain_id != 0:
+            if chain_state.get("midi_thru", False) != chain.midi_thru or chain_state.get("audio_thru", False) != chain.audio_thru:
+                return False
+        for key in ("mixer_chan", "zmop_index"):
+            if chain_state.get(key) is not None and chain_state[key] != getattr(chain, key):
+                return False
+        return True
+
     def restore_presets(self):
         """Restore presets in active chain"""
 
@@ -1170,6 +1417,38 @@ class zynthian_chain_manager:
                 zctrl.processor.engine.set_midi_learn(zctrl, chan, midi_cc)
             """
 
+        self.compile_midi_cc_routes(ccs=[midi_cc])
+
+    def is_midi_learned(self, chan, midi_cc, zctrl):
+        """Check if a controller is already learned to a CC, as add_midi_learn would do, and nothing else
+
+        chan : MIDI channel
+        midi_cc : CC number
+        zctrl : Controller object
+        Returns : True if add_midi_learn wouldn't change anything
+        """
+
+        if zctrl is None or zctrl.processor is None:
+            return False
+        keys = []
+        if zctrl.processor.midi_chan is not None:
+            keys.append((self.chan_midi_cc_binding, (chan << 16) | (midi_cc << 8)))
+        if zctrl.processor.chain_id is not None:
+            keys.append((self.chain_midi_cc_binding, (zctrl.processor.chain_id << 16) | (midi_cc << 8)))
+        if not keys:
+            return False
+        count = 0
+        for binding in (self.absolute_midi_cc_binding, self.chan_midi_cc_binding, self.chain_midi_cc_binding):
+            for zctrls in binding.values():
+                if zctrl in zctrls:
+                    count += 1
+        if count != len(keys):
+            return False
+        for binding, key in keys:
+            if zctrl not in binding.get(key, ()):
+                return False
+        return True
+
     def remove_midi_learn(self, proc, symbol):
         """Remove a midi learn configuration
 
@@ -1181,24 +1460,17 @@ class zynthian_chain_manager:
             return
         zctrl = proc.controllers_dict[symbol]
         logging.debug(f"(symbol={symbol} => zctrl={zctrl.symbol})")
-        for key in list(self.absolute_midi_cc_binding):
-            zctrls = self.absolute_midi_cc_binding[key]
-            if zctrl in zctrls:
-                zctrls.remove(zctrl)
-            if not zctrls:
-                self.absolute_midi_cc_binding.pop(key)
-        for key in list(self.chan_midi_cc_binding):
-            zctrls = self.chan_midi_cc_binding[key]
-            if zctrl in zctrls:
-                zctrls.remove(zctrl)
-            if not zctrls:
-                self.chan_midi_cc_binding.pop(key)
-        for key in list(self.chain_midi_cc_binding):
-            zctrls = self.chain_midi_cc_binding[key]
-            if zctrl in zctrls:
-                zctrls.remove(zctrl)
-            if not zctrls:
-                self.chain_midi_cc_binding.pop(key)
+        ccs = set()
+        for binding in (self.absolute_midi_cc_binding, self.chan_midi_cc_binding, self.chain_midi_cc_binding):
+            for key in list(binding):
+                zctrls = binding[key]
+                if zctrl in zctrls:
+                    zctrls.remove(zctrl)
+                    ccs.add((key >> 8) & 0x7f)
+                if not zctrls:
+                    binding.pop(key)
+        if ccs:
+            self.compile_midi_cc_routes(ccs=ccs)
 
         """
         if proc.eng_code == "MD":
@@ -1218,6 +1490,61 @@ class zynthian_chain_manager:
             if zctrl in zctrls:
                 return [key, False] #TODO: This isn't right!
 
+    @staticmethod
+    def get_cc_route_zmips():
+        """Get list of ZMIPs whose CC messages are routed to controllers (controller feedback is handled apart)"""
+
+        return [zmip for zmip in range(ZMIP_INT_INDEX + 1) if zmip != ZMIP_CTRL_INDEX]
+
+    def get_acti_zmips(self):
+        """Get list of ZMIPs in active chain mode"""
+
+        return [zmip for zmip in self.get_cc_route_zmips() if zynautoconnect.get_midi_in_dev_mode(zmip)]
+
+    def compile_midi_cc_routes(self, zmips=None, ccs=None):
+        """Update compiled CC routing table from MIDI learn bindings, active chain & device modes
+
+        It's updated in place, so midi_control_change can use it concurrently.
+
+        zmips : List of ZMIPs to update (Default: all)
+        ccs : List of CC numbers to update (Default: all)
+        """
+
+        routes = self.midi_cc_routes
+        if zmips is None:
+            zmips = self.get_cc_route_zmips()
+        if ccs is None:
+            # Remove all routes from these ZMIPs and compile all learned CCs
+            zmip_set = set(zmips)
+            for key in [key for key in routes if key[0] in zmip_set]:
+                routes.pop(key, None)
+            ccs = set()
+            for binding in (self.absolute_midi_cc_binding, self.chan_midi_cc_binding, self.chain_midi_cc_binding):
+                for key in binding:
+                    ccs.add((key >> 8) & 0x7f)
+        if self.active_chain_id is None:
+            active_chain_key = None
+        else:
+            active_chain_key = self.active_chain_id << 16
+
+        for zmip in zmips:
+            acti = zynautoconnect.get_midi_in_dev_mode(zmip)
+            for cc_num in ccs:
+                pedal = cc_num in self.held_zctrls
+                chain_zctrls = None
+                if acti and active_chain_key is not None:
+                    chain_zctrls = self.chain_midi_cc_binding.get(active_chain_key | (cc_num << 8))
+                for midi_chan in range(16):
+                    abs_zctrls = self.absolute_midi_cc_binding.get((zmip << 24) | (midi_chan << 16) | (cc_num << 8))
+                    if acti:
+                        zctrls = chain_zctrls
+                    else:
+                        zctrls = self.chan_midi_cc_binding.get((midi_chan << 16) | (cc_num << 8))
+                    if abs_zctrls or zctrls:
+                        routes[(zmip, midi_chan, cc_num)] = (tuple(abs_zctrls or ()), tuple(zctrls or ()), pedal and bool(zctrls))
+                    else:
+                        routes.pop((zmip, midi_chan, cc_num), None)
+
     def midi_control_change(self, zmip, midi_chan, cc_num, cc_val):
         """Send MIDI CC message to relevant chain
 
@@ -1251,43 +1578,25 @@ class zynthian_chain_manager:
                 for proc in zynautoconnect.ctrl_fb_procs:
                     if proc.part_i == midi_chan:
                         key = (proc.chain_id << 16) | (cc_num << 8)
-                        zctrls = self.chain_midi_cc_binding[key]
-                        for zctrl in zctrls:
+                        for zctrl in self.chain_midi_cc_binding.get(key, ()):
                             #logging.debug(f"CONTROLLER FEEDBACK {zctrl.symbol} ({midi_chan}) => {cc_val}")
                             zctrl.midi_control_change(cc_val, send=False)
             except Exception as e:
                 logging.warning(f"Can't manage control feedback for CH{midi_chan}:CC{cc_num} => {e}")
             return
 
-        # Handle absolute CC binding
-        try:
-            key = (zmip << 24) | (midi_chan << 16) | (cc_num << 8)
-            zctrls = self.absolute_midi_cc_binding[key]
-            for zctrl in zctrls:
+        # Handle absolute, active chain & channel CC bindings, from compiled routing table
+        route = self.midi_cc_routes.get((zmip, midi_chan, cc_num))
+        if route:
+            for zctrl in route[0]:
                 zctrl.midi_control_change(cc_val)
-        except:
-            pass
-
-        # Handle active chain CC binding
-        if zynautoconnect.get_midi_in_dev_mode(zmip):
-            try:
-                key = (self.active_chain_id << 16) | (cc_num << 8)
-                zctrls = self.chain_midi_cc_binding[key]
-                for zctrl in zctrls:
+            if route[2]:
+                for zctrl in route[1]:
                     zctrl.midi_control_change(cc_val)
                     self.handle_pedals(cc_num, cc_val, zctrl)
-            except:
-                pass
-        # Handle channel CC binding
-        else:
-            try:
-                key = (midi_chan << 16) | (cc_num << 8)
-                zctrls = self.chan_midi_cc_binding[key]
-                for zctrl in zctrls:
+            else:
+                for zctrl in route[1]:
                     zctrl.midi_control_change(cc_val)
-                    self.handle_pedals(cc_num, cc_val, zctrl)
-            except:
-                pass
 
     def handle_pedals(self, cc_num, cc_val, zctrl):
         """Handle pedal CC
@@ -25,14 +25,51 @@
 import math
 import liblo
 import logging
+from bisect import bisect_left, bisect_right
+from functools import lru_cache
 
 # Zynthian specific modules
 from zyncoder.zyncore import lib_zyncore
 from zyngui import zynthian_gui_config
 
 
+@lru_cache(maxsize=1024, typed=True)
+def get_midi_tables(value_min, value_max, is_logarithmic, is_toggle):
+	""" Get MIDI scaling tables for a controller range
+
+	Tables are shared by all controllers with the same range & scale.
+
+	Returns : tuple (midi2value, midi_bounds). midi2value is the value for each MIDI value (0..127).
+		midi_bounds is the lowest value mapped to each MIDI value, for bisecting value => MIDI.
+	"""
+
+	value_range = value_max - value_min
+	if is_logarithmic:
+		midi_bounds = tuple(value_min + value_range * (math.pow(10, i / 127) - 1) / 9 for i in range(128))
+	else:
+		midi_bounds = tuple(value_min + i * value_range / 127 for i in range(128))
+	if is_toggle:
+		midi2value = (value_min,) * 64 + (value_max,) * 64
+	else:
+		midi2value = midi_bounds
+	return midi2value, midi_bounds
+
+
 class zynthian_controller:
 
+	# Fixed attribute set => no per-instance dictionary. LV2 plugins may have hundreds of controllers.
+	__slots__ = (
+		"engine", "symbol", "processor", "name", "short_name", "group_symbol", "group_name", "readonly",
+		"value", "value_default", "value_min", "value_mid", "value_max", "value_range", "range",
+		"nudge_factor", "nudge_factor_fine", "labels", "ticks", "range_reversed",
+		"is_toggle", "is_integer", "is_logarithmic", "is_dirty", "not_on_gui", "display_priority",
+		"midi_chan", "midi_cc", "midi_feedback", "midi_cc_momentary_switch", "osc_port", "osc_path", "graph_path",
+		"label2value", "value2label", "midi2value", "midi_bounds", "ticks_sorted",
+		"send_func", "engine_send", "batcher",
+		"handle", "last_value_sent",  # Engine specific data
+		"__weakref__"
+	)
+
 	def __init__(self, engine, symbol, options=None):
 		""" Instantiate a new zynthian controller
 		
@@ -87,8 +124,23 @@ class zynthian_controller:
 
 		self.label2value = None # Dictionary for fast conversion from discrete label to value
 		self.value2label = None # Dictionary for fast conversion from discrete value to label
+		self.midi2value = None # Table for fast conversion from MIDI value to value
+		self.midi_bounds = None # Table of lowest value for each MIDI value, for fast conversion from value to MIDI
+		self.ticks_sorted = None # Ascending ticks, for bisecting value => tick index. None if ticks are not monotonic.
+
+		# Engine specific data
+		self.handle = None
+		self.last_value_sent = None
+
+		# Send method, resolved on configuration
+		self.send_func = None # Function sending current value, returning MIDI value if sent as MIDI CC
+		self.engine_send = None # Engine function sending a controller value
+		self.batcher = None # Engine's controller batcher
+
 		if options:
 			self.set_options(options)
+		else:
+			self._resolve_send()
 
 	def set_options(self, options):
 		""" Set individual parameters - updating behaviour as appropriate"""
@@ -218,6 +270,21 @@ class zynthian_controller:
 				self.label2value[str(self.labels[i])] = self.ticks[i]
 				self.value2label[str(self.ticks[i])] = self.labels[i]
 
+			# Ascending ticks for fast value => index conversion
+			if self.range_reversed:
+				ticks_sorted = self.ticks[::-1]
+			else:
+				ticks_sorted = list(self.ticks)
+			try:
+				if all(ticks_sorted[i] <= ticks_sorted[i + 1] for i in range(len(ticks_sorted) - 1)):
+					self.ticks_sorted = ticks_sorted
+				else:
+					self.ticks_sorted = None
+			except TypeError:
+				self.ticks_sorted = None
+		else:
+			self.ticks_sorted = None
+
 		# Common configuration
 		if self.value_min is None:
 			self.value_min = 0
@@ -231,6 +298,12 @@ class zynthian_controller:
 			else:
 				self.value_mid = self.value_min + self.value_range / 2
 
+		# MIDI scaling tables
+		if self.value_range > 0:
+			self.midi2value, self.midi_bounds = get_midi_tables(self.value_min, self.value_max, bool(self.is_logarithmic), bool(self.is_toggle and not self.is_logarithmic))
+		else:
+			self.midi2value = self.midi_bounds = None
+
 		self._set_value(self.value)
 		if self.value_default is None:
 			self.value_default = self.value
@@ -267,6 +340,34 @@ class zynthian_controller:
 		if self.midi_feedback is None and self.midi_chan is not None and self.midi_cc is not None:
 			self.midi_feedback = [self.midi_chan, self.midi_cc]
 
+		self._resolve_send()
+
+	def _resolve_send(self):
+		"""Resolve how value changes are sent, so sending doesn't need to probe the engine"""
+
+		self.engine_send = None
+		self.batcher = None
+		if self.engine is None:
+			self.send_func = self._send_none
+			return
+		get_sender = getattr(self.engine, "get_controller_sender", None)
+		if get_sender:
+			self.engine_send = get_sender(self)
+		else:
+			# Not an engine, i.e. a GUI screen using a parameter editor
+			self.engine_send = getattr(self.engine, "send_controller_value", None)
+		if self.engine_send:
+			self.send_func = self._send_engine
+		elif self.osc_path:
+			self.send_func = self._send_osc
+		elif self.midi_cc:
+			self.send_func = self.send_midi_cc
+		else:
+			self.send_func = self._send_none
+		# Toggles are sent immediately, so switch & trigger events are not coalesced
+		if not self.is_toggle:
+			self.batcher = getattr(self.engine, "ctrl_batcher", None)
+
 	def set_readonly(self, flag=True):
 		if flag != self.readonly:
 			self.readonly = flag
@@ -285,6 +386,10 @@ class zynthian_controller:
 	def set_midi_chan(self, chan):
 		self.midi_chan = chan
 
+	def set_engine(self, engine):
+		self.engine = engine
+		self._resolve_send()
+
 	def get_value(self):
 		return self.value
 
@@ -358,22 +463,12 @@ class zynthian_controller:
 			return
 
 		mval = None
-		if self.engine and send:
-			# Send value using engine method...
-			try:
-				self.engine.send_controller_value(self)
-			# Send value using OSC/MIDI ...
-			except:
-				try:
-					if self.osc_path:
-						#logging.debug("Sending OSC Controller '{}', {} => {}".format(self.symbol, self.osc_path, self.get_ctrl_osc_val()))
-						liblo.send(self.engine.osc_target, self.osc_path, self.get_ctrl_osc_val())
-					elif self.midi_cc:
-						mval = self.get_ctrl_midi_val()
-						#logging.debug("Sending MIDI Controller '{}', CH{}#CC{}={}".format(self.symbol, self.midi_chan, self.midi_cc, mval))
-						self.send_midi_cc(mval)
-				except Exception as e:
-					logging.warning("Can't send controller '{}' => {}".format(self.symbol, e))
+		if send:
+			if self.batcher:
+				# Sent on next batch flush, with the latest value
+				self.batcher.add(self)
+			else:
+				mval = self.send_value()
 
 		# Send feedback to MIDI controllers => What MIDI controllers? Those selected as MIDI-out?
 		# TODO: Set midi_feeback to MIDI learn
@@ -382,12 +477,34 @@ class zynthian_controller:
 
 		self.is_dirty = True
 
+	def send_value(self):
+		"""Send current value to engine
+
+		Returns : MIDI value if it was sent as MIDI CC, else None
+		"""
+
+		try:
+			return self.send_func()
+		except Exception as e:
+			logging.warning("Can't send controller '{}' => {}".format(self.symbol, e))
+
+	def _send_engine(self):
+		self.engine_send(self)
+
+	def _send_osc(self):
+		#logging.debug("Sending OSC Controller '{}', {} => {}".format(self.symbol, self.osc_path, self.get_ctrl_osc_val()))
+		liblo.send(self.engine.osc_target, self.osc_path, self.get_ctrl_osc_val())
+
+	def _send_none(self):
+		pass
+
 	def send_midi_cc(self, mval=None):
 		if mval is None:
 			mval = self.get_ctrl_midi_val()
-		try:
+		#logging.debug("Sending MIDI Controller '{}', CH{}#CC{}={}".format(self.symbol, self.midi_chan, self.midi_cc, mval))
+		if self.processor and self.processor.chain:
 			izmop = self.processor.chain.zmop_index
-		except:
+		else:
 			izmop = None
 
 		# Try sending directly to chain's zmop
@@ -398,6 +515,7 @@ class zynthian_controller:
 		# what generates issues when combining some engines (for instance, fluidsynth + pianoteq)
 		else:
 			lib_zyncore.ui_send_ccontrol_change(self.midi_chan, self.midi_cc, mval)
+		return mval
 
 	def send_midi_feedback(self, mval=None):
 		if mval is None:
@@ -413,21 +531,37 @@ class zynthian_controller:
 			val = self.value
 		try:
 			if self.ticks:
-				index = 0
-				dval = abs(self.ticks[0] - val)
-				for i in range(1, len(self.ticks)):
-					ndval = abs(self.ticks[i] - val)
-					if ndval < dval:
-						dval = ndval
-						index = i
-					else:
-						break
-				return index
+				if self.ticks_sorted is None:
+					return self._get_value2index_scan(val)
+				ticks = self.ticks_sorted
+				n = len(ticks)
+				i = bisect_left(ticks, val)
+				if i >= n:
+					i = n - 1
+				elif i > 0 and val - ticks[i - 1] <= ticks[i] - val:
+					# Closest is previous tick. On a tie, take the lower index in ticks order.
+					if not self.range_reversed or val - ticks[i - 1] < ticks[i] - val:
+						i -= 1
+				if self.range_reversed:
+					return n - 1 - i
+				return i
 			else:
 				return None
 		except Exception as e:
 			logging.error(e)
 
+	def _get_value2index_scan(self, val):
+		index = 0
+		dval = abs(self.ticks[0] - val)
+		for i in range(1, len(self.ticks)):
+			ndval = abs(self.ticks[i] - val)
+			if ndval < dval:
+				dval = ndval
+				index = i
+			else:
+				break
+		return index
+
 	def get_value2label(self, val=None):
 		if val is None:
 			val = self.value
@@ -448,6 +582,11 @@ class zynthian_controller:
 			logging.error(e)
 
 	def get_ctrl_midi_val(self):
+		if self.midi_bounds:
+			val = bisect_right(self.midi_bounds, self.value) - 1
+			if val < 0:
+				return 0
+			return val
 		try:
 			if self.value_range == 0:
 				return 0
@@ -498,21 +637,23 @@ class zynthian_controller:
 	def midi_control_change(self, val, send=True):
 		#if self.ticks:
 		#	self.set_value(val)
-		if self.is_logarithmic:
-			value = self.value_min + self.value_range * (math.pow(10, val/127) - 1) / 9
-		elif self.is_toggle:
-			if self.midi_cc_momentary_switch:
-				if val >= 64:
-					self.toggle()
-				else:
-					return
-			else:
+		if self.is_toggle and self.midi_cc_momentary_switch and not self.is_logarithmic:
+			if val >= 64:
+				self.toggle()
+			return
+		try:
+			# Precomputed scaling
+			value = self.midi2value[val]
+		except (IndexError, TypeError):
+			if self.is_logarithmic:
+				value = self.value_min + self.value_range * (math.pow(10, val/127) - 1) / 9
+			elif self.is_toggle:
 				if val >= 64:
 					value = self.value_max
 				else:
 					value = self.value_min
-		else:
-			value = self.value_min + val * self.value_range / 127
+			else:
+				value = self.value_min + val * self.value_range / 127
 		self.set_value(value, send)
 
 # ******************************************************************************
@@ -0,0 +1,113 @@
+# -*- coding: utf-8 -*-
+# ****************************************************************************
+# ZYNTHIAN PROJECT: Zynthian Controller Batcher (zynthian_controller_batcher)
+#
+# Coalesce controller value changes and send them to the engine in bulk
+#
+# Copyright (C) 2015-2024 Fernando Moyano <jofemodo@zynthian.org>
+#
+# ****************************************************************************
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License as
+# published by the Free Software Foundation; either version 2 of
+# the License, or any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# For a full copy of the GNU General Public License see the LICENSE.txt file.
+#
+# ****************************************************************************
+
+import os
+import logging
+import traceback
+from threading import Lock
+
+from zyngine.zynthian_scheduler import zynsched
+
+# ----------------------------------------------------------------------------
+# Zynthian Controller Batcher Class
+# ----------------------------------------------------------------------------
+
+
+class zynthian_controller_batcher:
+
+    # Default flush period (seconds)
+    interval = float(os.environ.get('ZYNTHIAN_CTRL_BATCH_MS', "20")) / 1000
+
+    def __init__(self, engine, interval=None):
+        """Create a controller batcher for an engine
+
+        Controllers changed since the last flush are marked dirty. Once per tick, the latest value of all dirty
+        controllers is sent with the engine's send_controller_values(), so engines may send them as a single
+        bulk message and fast sweeps (encoders, MIDI CC) don't queue stale values.
+
+        engine : Engine object
+        interval : Flush period in seconds (default: ZYNTHIAN_CTRL_BATCH_MS)
+        """
+
+        self.engine = engine
+        if interval is not None:
+            self.interval = interval
+        self.lock = Lock()
+        self.dirty = {}  # Dirty controllers in change order (values are unused)
+        self.flush_task = None
+
+        # Statistics
+        self.changes = 0  # Value changes added
+        self.sent = 0  # Values sent
+
+    def add(self, zctrl):
+        """Mark controller as dirty, so its value is sent on next flush"""
+
+        with self.lock:
+            self.changes += 1
+            self.dirty[zctrl] = None
+            if self.flush_task is None:
+                self.flush_task = zynsched.add_oneshot(self.interval, self.flush, "ctrl_batcher.flush", zynsched.LANE_HIGH)
+
+    def discard(self, zctrls):
+        """Remove controllers from dirty set without sending them, i.e. when a processor is removed"""
+
+        with self.lock:
+            for zctrl in zctrls:
+                self.dirty.pop(zctrl, None)
+
+    def flush(self):
+        """Send latest value of dirty controllers"""
+
+        with self.lock:
+            self.flush_task = None
+            if not self.dirty:
+                return
+            zctrls = list(self.dirty)
+            self.dirty = {}
+            self.sent += len(zctrls)
+        try:
+            self.engine.send_controller_values(zctrls)
+        except Exception as e:
+            logging.error(f"Can't send controller values to engine '{self.engine.name}' => {e}")
+            logging.exception(traceback.format_exc())
+
+    def clear(self):
+        """Cancel pending flush and drop dirty controllers"""
+
+        with self.lock:
+            if self.flush_task:
+                self.flush_task.cancel()
+                self.flush_task = None
+            self.dirty = {}
+
+    def get_stats(self):
+        with self.lock:
+            return {
+                "changes": self.changes,
+                "sent": self.sent,
+                "dirty": len(self.dirty)
+            }
+
+# ---------------------------------------------------------------------------
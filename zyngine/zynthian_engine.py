@@ -32,12 +32,16 @@ import pexpect
 import fnmatch
 from time import sleep
 from string import Template
+from threading import RLock
 from os.path import isfile, isdir, ismount, join
 
 import zynautoconnect
 from . import zynthian_controller
 from zyngui import zynthian_gui_config
 from zyncoder.zyncore import lib_zyncore
+from zyngine.zynthian_proc_channel import zynthian_proc_channel
+from zyngine.zynthian_preset_index import zynpresetindex
+from zyngine.zynthian_controller_batcher import zynthian_controller_batcher
 
 # --------------------------------------------------------------------------------
 # Basic Engine Class: Spawn a process & manage IPC communication using pexpect
@@ -55,6 +59,9 @@ class zynthian_basic_engine:
 	my_data_dir = os.environ.get('ZYNTHIAN_MY_DATA_DIR', "/zynthian/zynthian-my-data")
 	ex_data_dir = os.environ.get('ZYNTHIAN_EX_DATA_DIR', "/media/root")
 
+	# Use an asynchronous command channel after start. The process must answer each command with the prompt.
+	proc_async = False
+
 	# ---------------------------------------------------------------------------
 	# Initialization
 	# ---------------------------------------------------------------------------
@@ -62,6 +69,8 @@ class zynthian_basic_engine:
 	def __init__(self, name=None, command=None, prompt=None, cwd=None):
 		self.name = name
 		self.proc = None
+		self.proc_lock = RLock()  # Serialize IPC from GUI, MIDI & scheduler threads
+		self.proc_channel = None  # Asynchronous command channel, if enabled
 		self.proc_timeout = 30
 		self.proc_start_sleep = None
 		self.command = command
@@ -95,12 +104,18 @@ class zynthian_basic_engine:
 				if self.proc_start_sleep:
 					sleep(self.proc_start_sleep)
 
+				if self.proc_async and self.command_prompt:
+					self.proc_channel = zynthian_proc_channel(self.proc, self.command_prompt, self.name)
+
 				return output
 
 			except Exception as err:
 				logging.error("Can't start engine {} => {}".format(self.name, err))
 
 	def stop(self):
+		if self.proc_channel:
+			self.proc_channel.close()
+			self.proc_channel = None
 		if self.proc:
 			try:
 				logging.info("Stopping Engine " + self.name)
@@ -118,17 +133,67 @@ class zynthian_basic_engine:
 			return None
 
 	def proc_cmd(self, cmd):
-		if self.proc:
+		if self.proc_channel:
 			try:
-				#logging.debug("proc command: "+cmd)
-				self.proc.sendline(cmd)
-				out = self.proc_get_output()
-				#logging.debug("proc output:\n{}".format(out))
+				return self.proc_channel.send(cmd).result(self.proc_timeout)
 			except Exception as err:
-				out = ""
 				logging.error("Can't exec engine command: {} => {}".format(cmd, err))
+				return ""
+		if self.proc:
+			with self.proc_lock:
+				try:
+					#logging.debug("proc command: "+cmd)
+					self.proc.sendline(cmd)
+					out = self.proc_get_output()
+					#logging.debug("proc output:\n{}".format(out))
+				except Exception as err:
+					out = ""
+					logging.error("Can't exec engine command: {} => {}".format(cmd, err))
 			return out
 
+	def proc_cmds(self, cmds, wait=True):
+		"""Send several commands at once
+
+		Commands are written without waiting for each prompt, so the engine process
+		doesn't wait for a round trip between commands.
+
+		cmds : List of command strings
+		wait : False for not waiting the commands to finish, if the engine has an asynchronous channel
+		Returns : List of outputs, one per command. Empty list if not waiting.
+		"""
+
+		outs = []
+		if not cmds:
+			return outs
+		if self.proc_channel:
+			try:
+				futures = self.proc_channel.send_many(cmds, wait)
+				if wait:
+					for future in futures:
+						outs.append(future.result(self.proc_timeout))
+			except Exception as err:
+				logging.error("Can't exec engine commands: {} => {}".format(cmds, err))
+		elif self.proc:
+			with self.proc_lock:
+				try:
+					self.proc.send("\n".join(cmds) + "\n")
+					for i in range(len(cmds)):
+						outs.append(self.proc_get_output())
+				except Exception as err:
+					logging.error("Can't exec engine commands: {} => {}".format(cmds, err))
+		return outs
+
+	def proc_cmd_nowait(self, cmd):
+		"""Send a command without waiting for it to finish (fire & forget), if the engine has an asynchronous channel"""
+
+		if self.proc_channel:
+			try:
+				self.proc_channel.send(cmd, False)
+			except Exception as err:
+				logging.error("Can't exec engine command: {} => {}".format(cmd, err))
+		else:
+			self.proc_cmd(cmd)
+
 
 # ------------------------------------------------------------------------------
 # Synth Engine Base Class
@@ -169,6 +234,7 @@ class zynthian_engine(zynthian_basic_engine):
 		self.jackname = ""
 
 		self.processors = []
+		self.ctrl_batcher = None  # Sends controller value changes in bulk, if enabled
 
 		self.options = {
 			'midi_chan': True,
@@ -256,6 +322,8 @@ class zynthian_engine(zynthian_basic_engine):
 		return super().start()
 
 	def stop(self):
+		if self.ctrl_batcher:
+			self.ctrl_batcher.clear()
 		super().stop()
 		self.osc_end()
 
@@ -264,27 +332,12 @@ class zynthian_engine(zynthian_basic_engine):
 	# ---------------------------------------------------------------------------
 
 	@classmethod
-	def find_some_preset_file(cls, path, recursion=1):
-		rules = []
-		for ext in cls.preset_fexts:
-			rules.append(fnmatch.translate("*." + ext))
-		rerule = re.compile("(" + "|".join(rules) + ")", re.IGNORECASE)
-		for item in glob.iglob(os.path.join(path, "**"), recursive=True):
-			if rerule.match(item):
-				return True
-		return False
+	def find_some_preset_file(cls, path, recursion=1, check=True):
+		return zynpresetindex.has_file(path, cls.preset_fexts, check)
 
 	@classmethod
-	def find_all_preset_files(cls, path, recursion=1):
-		rules = []
-		for ext in cls.preset_fexts:
-			rules.append(fnmatch.translate("*." + ext))
-		rerule = re.compile("(" + "|".join(rules) + ")", re.IGNORECASE)
-		res = []
-		for item in glob.iglob(os.path.join(path, "**"), recursive=True):
-			if rerule.match(item):
-				res.append(item)
-		return sorted(res, key=str.casefold)
+	def find_all_preset_files(cls, path, recursion=1, check=True):
+		return sorted(zynpresetindex.find_files(path, cls.preset_fexts, check), key=str.casefold)
 
 	@staticmethod
 	def get_filelist(dpath, fext):
@@ -297,17 +350,13 @@ class zynthian_engine(zynthian_basic_engine):
 		for dpd in dpath:
 			dp = dpd[1]
 			dn = dpd[0]
-			try:
-				for f in sorted(os.listdir(dp)):
-					if not f.startswith('.') and isfile(join(dp, f)) and f[-xlen:].lower() == fext:
-						title = str.replace(f[:-xlen], '_', ' ')
-						if dn != '_': title = dn + '/' + title
-						#print("filelist => " + title)
-						res.append([join(dp, f), i, title, dn, f])
-						i = i + 1
-			except Exception as e:
-				#logging.warning("Can't access directory '{}' => {}".format(dp,e))
-				pass
+			for f in zynpresetindex.get_files(dp):
+				if not f.startswith('.') and f[-xlen:].lower() == fext:
+					title = str.replace(f[:-xlen], '_', ' ')
+					if dn != '_': title = dn + '/' + title
+					#print("filelist => " + title)
+					res.append([join(dp, f), i, title, dn, f])
+					i = i + 1
 
 		return res
 
@@ -344,22 +393,20 @@ class zynthian_engine(zynthian_basic_engine):
 
 		# External storage banks
 		for exd in zynthian_gui_config.get_external_storage_dirs(cls.ex_data_dir):
+			# Check the whole tree once, then answer from the index
+			zynpresetindex.refresh(exd)
 			sbanks = []
 			# Add root directory in external storage
-			if not exclude_empty or cls.find_some_preset_file(exd, 0):
+			if not exclude_empty or cls.find_some_preset_file(exd, 0, False):
 				sbanks.append([exd, None, "/", None, "/"])
 			# Walk directories inside root
-			walk = next(os.walk(exd))
-			walk[1].sort()
-			for root_bank_dir in walk[1]:
-				root_bank_path = walk[0] + "/" + root_bank_dir
-				if not exclude_empty or cls.find_some_preset_file(root_bank_path, recursion + 1):
-					walk = next(os.walk(root_bank_path))
-					walk[1].sort()
+			for root_bank_dir in zynpresetindex.get_subdirs(exd, False):
+				root_bank_path = exd + "/" + root_bank_dir
+				if not exclude_empty or cls.find_some_preset_file(root_bank_path, recursion + 1, False):
 					count = 0
-					for bank_dir in walk[1]:
-						bank_path = walk[0] + "/" + bank_dir
-						if not exclude_empty or cls.find_some_preset_file(bank_path, recursion):
+					for bank_dir in zynpresetindex.get_subdirs(root_bank_path, False):
+						bank_path = root_bank_path + "/" + bank_dir
+						if not exclude_empty or cls.find_some_preset_file(bank_path, recursion, False):
 							sbanks.append([bank_path, None, root_bank_dir + "/" + bank_dir, None, bank_dir])
 							count += 1
 					# If there is no banks inside, the root is the bank
@@ -373,12 +420,13 @@ class zynthian_engine(zynthian_basic_engine):
 
 		# Internal storage banks
 		for root_bank_dir in cls.root_bank_dirs:
+			check_presets = exclude_empty and not internal_include_empty
+			if check_presets:
+				zynpresetindex.refresh(root_bank_dir[1])
 			sbanks = []
-			walk = next(os.walk(root_bank_dir[1]))
-			walk[1].sort()
-			for bank_dir in walk[1]:
-				bank_path = walk[0] + "/" + bank_dir
-				if (not exclude_empty or internal_include_empty) or cls.find_some_preset_file(bank_path, recursion):
+			for bank_dir in zynpresetindex.get_subdirs(root_bank_dir[1], not check_presets):
+				bank_path = root_bank_dir[1] + "/" + bank_dir
+				if not check_presets or cls.find_some_preset_file(bank_path, recursion, False):
 					sbanks.append([bank_path, None, bank_dir, None, bank_dir])
 			if len(sbanks):
 				banks.append([None, None, "SD> " + root_bank_dir[0], None, None])
@@ -399,6 +447,8 @@ class zynthian_engine(zynthian_basic_engine):
 	def remove_processor(self, processor):
 		try:
 			self.processors.remove(processor)
+			if self.ctrl_batcher and processor.controllers_dict:
+				self.ctrl_batcher.discard(processor.controllers_dict.values())
 			zynautoconnect.remove_sidechain_ports(processor.jackname)
 			processor.jackname = None
 		except Exception as e:
@@ -683,6 +733,61 @@ class zynthian_engine(zynthian_basic_engine):
 	def send_controller_value(self, zctrl):
 		raise Exception("NOT IMPLEMENTED!")
 
+	def get_controller_sender(self, zctrl):
+		"""Get the function sending a controller's value to the engine
+
+		Called when the controller is configured. Engines may override it for choosing per controller.
+
+		zctrl : Controller object
+		Returns : Function taking the controller as argument, or None for sending by controller's OSC path or MIDI CC
+		"""
+
+		if type(self).send_controller_value is zynthian_engine.send_controller_value:
+			return None
+		return self.send_controller_value
+
+	def send_controller_values(self, zctrls):
+		"""Send the values of several controllers at once
+
+		Engines may override it for sending values in bulk.
+
+		zctrls : List of controllers
+		"""
+
+		for zctrl in zctrls:
+			zctrl.send_value()
+
+	def enable_ctrl_batcher(self, interval=None):
+		"""Coalesce controller value changes and send them once per tick with send_controller_values.
+
+		Engines with a costly IPC per value should enable it before creating controllers.
+		Toggle controllers are always sent immediately.
+
+		interval : Flush period in seconds (default: ZYNTHIAN_CTRL_BATCH_MS). 0 to disable.
+		"""
+
+		if interval is None:
+			interval = zynthian_controller_batcher.interval
+		if interval > 0:
+			self.ctrl_batcher = zynthian_controller_batcher(self, interval)
+		else:
+			self.ctrl_batcher = None
+
+	# ---------------------------------------------------------------------------
+	# Monitors
+	# ---------------------------------------------------------------------------
+
+	def subscribe_monitors(self):
+		"""Request monitor values to be refreshed in background, so get_monitors_dict() returns the latest values without IPC.
+
+		Engines whose monitors are costly to query may implement it. Each call must be paired with unsubscribe_monitors().
+		"""
+
+		pass
+
+	def unsubscribe_monitors(self):
+		pass
+
 	# ---------------------------------------------------------------------------
 	# Options and Extended Config
 	# ---------------------------------------------------------------------------
@@ -627,6 +627,13 @@ class zynthian_engine_aeolus(zynthian_engine):
 			self._ctrl_screens += self.audio_ctrl_screens
 		return super().get_controllers_dict(processor)
 
+	def get_controller_sender(self, zctrl):
+		# Swell, common & audio controllers are sent as MIDI CC
+		for c in self.swell_ctrls + self.common_ctrls + self.audio_ctrls:
+			if zctrl.symbol == c[0]:
+				return None
+		return self.send_controller_value
+
 	def send_controller_value(self, zctrl):
 		for c in self.swell_ctrls + self.common_ctrls + self.audio_ctrls:
 			if zctrl.symbol == c[0]:
@@ -597,28 +597,34 @@ class zynmixer(zynthian_engine):
 		full : True to reset parameters omitted from state
 		"""
 
+		# Controllers only send values that differ from the current ones
 		for chan, zctrls in enumerate(self.zctrls):
-			key = 'chan_{:02d}'.format(chan)
+			chan_state = state.get('chan_{:02d}'.format(chan), {})
 			for symbol, zctrl in zctrls.items():
 				try:
-					if zctrl.is_toggle:
-						zctrl.set_value(state[key][symbol] & 1, True)
-						zctrl.midi_cc_momentary_switch = state[key][symbol] >> 1
+					if symbol not in chan_state:
+						if full:
+							zctrl.reset_value()
+					elif zctrl.is_toggle:
+						zctrl.set_value(chan_state[symbol] & 1, True)
+						zctrl.midi_cc_momentary_switch = chan_state[symbol] >> 1
 					else:
-						zctrl.set_value(state[key][symbol], True)
+						zctrl.set_value(chan_state[symbol], True)
 				except:
 					if full:
 						zctrl.reset_value()
 		if "midi_learn" in state:
 			#state["midi_learn"][f"{chan},{cc}"] = zctrl.graph_path
-			self.midi_unlearn_all()
+			learned_cc = [dict() for x in range(16)]
 			for ml, graph_path in state["midi_learn"].items():
 				try:
 					chan, cc = ml.split(',')
 					zctrl = self.zctrls[graph_path[0]][graph_path[1]]
-					self.learned_cc[int(chan)][int(cc)] = zctrl
+					learned_cc[int(chan)][int(cc)] = zctrl
 				except Exception as e:
 					logging.warning(f"Failed to restore mixer midi learn: {ml} => {graph_path} ({e})")
+			# Swap whole map, so incoming CCs never see it empty
+			self.learned_cc = learned_cc
 
 	# --------------------------------------------------------------------------
 	# MIDI Learn
@@ -27,12 +27,15 @@ import os
 import re
 import shutil
 import logging
+from time import monotonic
+from threading import Lock
 from os.path import isfile
 from subprocess import check_output, STDOUT
 
 from . import zynthian_lv2
 from . import zynthian_engine
 from . import zynthian_controller
+from .zynthian_scheduler import zynsched
 
 # ------------------------------------------------------------------------------
 # Jalv Engine Class => Engine for LV2 plugins
@@ -129,6 +132,9 @@ class zynthian_engine_jalv(zynthian_engine):
 		}
 	}
 
+	# Jalv console answers every command with a prompt => pipeline commands, without waiting for "set"
+	proc_async = True
+
 	# ----------------------------------------------------------------------------
 	# ZynAPI variables
 	# ----------------------------------------------------------------------------
@@ -139,6 +145,11 @@ class zynthian_engine_jalv(zynthian_engine):
 	# Initialization
 	# ----------------------------------------------------------------------------
 
+	# Refresh period of subscribed monitor values (seconds)
+	monitor_interval = float(os.environ.get('ZYNTHIAN_MONITOR_MS', "50")) / 1000
+	# Subscribed monitors are not refreshed if nobody read them for this time (seconds)
+	monitor_idle_timeout = 1.0
+
 	def __init__(self, eng_code, state_manager, dryrun=False, jackname=None):
 		super().__init__(state_manager)
 
@@ -168,6 +179,14 @@ class zynthian_engine_jalv(zynthian_engine):
 				#if not self.native_gui:
 				#	self.native_gui = "AUTO"
 
+		# Monitor values are refreshed in background while subscribed
+		self.lv2_monitors_dict = {}
+		self.monitor_lock = Lock()
+		self.monitor_subscribers = 0
+		self.monitor_task = None
+		self.monitor_future = None
+		self.monitor_read_ts = 0
+
 		if not dryrun:
 			if jackname:
 				self.jackname = jackname
@@ -192,6 +211,8 @@ class zynthian_engine_jalv(zynthian_engine):
 					self.command_env['DISPLAY'] = "X"
 
 			self.command_prompt = "\n> "
+			# Each value sent to jalv is a console round trip => send in batches
+			self.enable_ctrl_batcher()
 
 			# Jalv which uses PWD as the root for presets
 			self.command_cwd = zynthian_engine.my_data_dir + "/presets/lv2"
@@ -229,7 +250,6 @@ class zynthian_engine_jalv(zynthian_engine):
 				self._ctrl_screens = []
 
 			# Generate LV2-Plugin Controllers
-			self.lv2_monitors_dict = {}
 			self.lv2_zctrl_dict = self.get_lv2_controllers_dict()
 			self.generate_ctrl_screens(self.lv2_zctrl_dict)
 
@@ -244,6 +264,14 @@ class zynthian_engine_jalv(zynthian_engine):
 
 		self.reset()
 
+	def stop(self):
+		with self.monitor_lock:
+			self.monitor_subscribers = 0
+			if self.monitor_task:
+				self.monitor_task.cancel()
+				self.monitor_task = None
+		super().stop()
+
 	# ---------------------------------------------------------------------------
 	# Processor Management
 	# ---------------------------------------------------------------------------
@@ -590,16 +618,63 @@ class zynthian_engine_jalv(zynthian_engine):
 		return zctrls
 
 	def get_monitors_dict(self):
-		self.lv2_monitors_dict = {}
-		for line in self.proc_cmd("monitors").split("\n"):
+		# While subscribed, return latest values refreshed in background
+		if self.monitor_subscribers > 0:
+			self.monitor_read_ts = monotonic()
+			return self.lv2_monitors_dict
+		self.lv2_monitors_dict = self.parse_monitors(self.proc_cmd("monitors"))
+		return self.lv2_monitors_dict
+
+	@staticmethod
+	def parse_monitors(out):
+		monitors = {}
+		for line in out.split("\n"):
 			try:
-				parts=line.split(" = ")
+				parts = line.split(" = ")
 				if len(parts) == 2:
-					self.lv2_monitors_dict[parts[0]] = float(parts[1])
+					monitors[parts[0]] = float(parts[1])
 			except Exception as e:
 				logging.error(e)
+		return monitors
+
+	def subscribe_monitors(self):
+		with self.monitor_lock:
+			self.monitor_subscribers += 1
+			if self.monitor_task is None:
+				self.monitor_read_ts = monotonic()
+				self.monitor_task = zynsched.add_periodic(self.monitor_interval, self.poll_monitors, f"jalv.{self.nickname}.monitors")
+
+	def unsubscribe_monitors(self):
+		with self.monitor_lock:
+			if self.monitor_subscribers > 0:
+				self.monitor_subscribers -= 1
+			if self.monitor_subscribers == 0 and self.monitor_task:
+				self.monitor_task.cancel()
+				self.monitor_task = None
+
+	def poll_monitors(self):
+		# Subscribers not reading (i.e. widget in a hidden screen) => don't query
+		if monotonic() - self.monitor_read_ts > self.monitor_idle_timeout:
+			return
+		# Previous query not answered yet => skip, so queries don't pile up
+		if self.monitor_future and not self.monitor_future.done():
+			return
+		if self.proc_channel:
+			try:
+				self.monitor_future = self.proc_channel.send("monitors")
+				self.monitor_future.add_done_callback(self.cb_monitors)
+			except Exception as e:
+				logging.error(f"Can't query monitors => {e}")
+		else:
+			self.lv2_monitors_dict = self.parse_monitors(self.proc_cmd("monitors"))
 
-		return self.lv2_monitors_dict
+	def cb_monitors(self, future):
+		# Called from the channel reader thread. The snapshot dict is replaced, never modified, so readers get consistent values.
+		try:
+			self.lv2_monitors_dict = self.parse_monitors(future.result())
+		except Exception:
+			# Channel closed
+			pass
 
 	def get_controllers_dict(self, processor):
 		# Get plugin static controllers
@@ -610,8 +685,24 @@ class zynthian_engine_jalv(zynthian_engine):
 		zctrls.update(self.lv2_zctrl_dict)
 		return zctrls
 
+	def get_controller_sender(self, zctrl):
+		# MIDI controllers are sent as MIDI CC
+		if isinstance(zctrl.graph_path, int):
+			return self.send_controller_value
+		return None
+
 	def send_controller_value(self, zctrl):
-		self.proc_cmd("set %d %.6f" % (zctrl.graph_path, zctrl.value))
+		self.proc_cmd_nowait("set %d %.6f" % (zctrl.graph_path, zctrl.value))
+
+	def send_controller_values(self, zctrls):
+		# Send LV2 port values as a multi-line command
+		cmds = []
+		for zctrl in zctrls:
+			if isinstance(zctrl.graph_path, int):
+				cmds.append("set %d %.6f" % (zctrl.graph_path, zctrl.value))
+			else:
+				zctrl.send_value()
+		self.proc_cmds(cmds, wait=False)
 
 	# ---------------------------------------------------------------------------
 	# API methods
@@ -631,8 +722,9 @@ class zynthian_engine_jalv(zynthian_engine):
 	@classmethod
 	def refresh_zynapi_instance(cls):
 		if cls.zynapi_instance:
+			zynthian_lv2.init_lilv()
 			zynthian_lv2.generate_presets_cache_workaround()
-			zynthian_lv2.generate_plugin_presets_cache(cls.zynapi_instance.plugin_url)
+			zynthian_lv2.generate_plugin_presets_cache(cls.zynapi_instance.plugin_url, False)
 			eng_code = cls.zynapi_instance.nickname
 			cls.zynapi_instance.stop()
 			cls.zynapi_instance = cls(eng_code, None, True)
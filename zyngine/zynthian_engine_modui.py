@@ -77,6 +77,9 @@ class zynthian_engine_modui(zynthian_engine):
 		self.hw_ports = {}
 		self.midi_dev_info = None
 
+		# MOD-UI has no bulk parameter message, but coalescing sweeps saves websocket traffic
+		self.enable_ctrl_batcher()
+
 		self.reset()
 		self.start()
 
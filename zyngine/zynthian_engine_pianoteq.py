@@ -638,6 +638,13 @@ class zynthian_engine_pianoteq(zynthian_engine):
 		result = self.rpc('setParameters', {'list': [{'id': param, 'normalized_value': value}]})
 		return result and 'error' not in result
 
+	#   Set values of several parameters for the loaded preset with a single request
+	#   params: Dictionary of normalized values (0.0..1.0) indexed by parameter id
+	#   returns: True on success
+	def set_params(self, params):
+		result = self.rpc('setParameters', {'list': [{'id': param, 'normalized_value': value} for param, value in params.items()]})
+		return result and 'error' not in result
+
 	# ---------------------------------------------------------------------------
 	# Processor Management
 	# ---------------------------------------------------------------------------
@@ -839,6 +846,22 @@ class zynthian_engine_pianoteq(zynthian_engine):
 	#def send_controller_value(self, zctrl):
 	#	self.set_param(zctrl.symbol, zctrl.value)
 
+	def send_controller_values(self, zctrls):
+		# Single value changes are sent as MIDI CC, but sending many values (i.e. ZS3 recall) is
+		# cheaper as one RPC request, which also keeps full resolution.
+		if len(zctrls) > 1:
+			params = {}
+			for zctrl in zctrls:
+				if zctrl.symbol in pt_ctrl_map:
+					params[zctrl.symbol] = zctrl.value
+				else:
+					zctrl.send_value()
+			if not params or self.set_params(params):
+				return
+			logging.warning("Can't set parameters with RPC. Sending MIDI CC ...")
+			zctrls = [zctrl for zctrl in zctrls if zctrl.symbol in params]
+		super().send_controller_values(zctrls)
+
 	# ---------------------------------------------------------------------------
 	# API methods
 	# ---------------------------------------------------------------------------
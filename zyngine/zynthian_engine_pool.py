@@ -0,0 +1,261 @@
+# -*- coding: utf-8 -*-
+# ****************************************************************************
+# ZYNTHIAN PROJECT: Zynthian Engine Pool (zynthian_engine_pool)
+#
+# Pool of idle engine instances, started in advance
+#
+# Copyright (C) 2015-2024 Fernando Moyano <jofemodo@zynthian.org>
+#
+# ****************************************************************************
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License as
+# published by the Free Software Foundation; either version 2 of
+# the License, or any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# For a full copy of the GNU General Public License see the LICENSE.txt file.
+#
+# ****************************************************************************
+
+import os
+import logging
+from threading import RLock, Thread, current_thread
+from collections import OrderedDict
+
+from zyngine.zynthian_scheduler import zynsched
+
+# ----------------------------------------------------------------------------
+# Zynthian Engine Pool Class
+# ----------------------------------------------------------------------------
+
+
+class zynthian_engine_pool:
+
+    def __init__(self, chain_manager):
+        """Create a warm engine pool
+
+        Keeps an idle engine instance for each of the most recently used multi-instance engines
+        (Jalv plugins & sfizz), so adding a processor doesn't wait for the engine process to start.
+        Used instances are replaced in background. Engines are evicted in LRU order when they are
+        not between the most recently used ones or the pool's memory usage exceeds the limit.
+        Idle engines are running JACK clients, using RAM & DSP, so the pool is disabled by default.
+
+        chain_manager : Chain manager object
+        """
+
+        self.chain_manager = chain_manager
+        # Max number of idle engines. 0 to disable the pool.
+        self.size = int(os.environ.get('ZYNTHIAN_ENGINE_POOL_SIZE', "0"))
+        # Max memory used by idle engines (kB)
+        self.max_mem = 1024 * int(os.environ.get('ZYNTHIAN_ENGINE_POOL_MAX_MEM', "256"))
+        # Expected memory (kB) of engines not measured yet
+        self.default_engine_mem = 32 * 1024
+        # Delay (seconds) before refilling the pool, so it doesn't compete with processor loading
+        self.refill_delay = 2.0
+
+        self.lock = RLock()
+        self.idle = OrderedDict()  # (engine, start time, jackname) indexed by engine code, in LRU order
+        self.usage = OrderedDict()  # Use count indexed by engine code, in LRU order (most recent last)
+        self.engine_mem = {}  # Last measured memory (kB) indexed by engine code
+        self.generation = 0  # Incremented by clear(), so engines started before are discarded
+        self.refill_task = None  # Delayed refill request
+        self.refill_thread = None  # Engines are started from this thread, not blocking scheduler lanes
+
+        # Statistics
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def is_poolable(eng_code):
+        """Check if engine may be pooled => Only multi-instance engines, others are shared by processors"""
+
+        return eng_code[0:3] == "JV/" or eng_code == "SF"
+
+    def is_enabled(self):
+        return self.size > 0
+
+    def get(self, eng_code):
+        """Get an idle engine instance and schedule pool refill
+
+        eng_code : Engine code
+        Returns : tuple (engine, start time, jackname) or None if there is no idle instance
+        """
+
+        if not self.is_enabled() or not self.is_poolable(eng_code):
+            return None
+        with self.lock:
+            self.usage[eng_code] = self.usage.pop(eng_code, 0) + 1
+            if len(self.usage) > 64:
+                self.usage.popitem(last=False)
+            res = self.idle.pop(eng_code, None)
+            if res:
+                self.hits += 1
+                logging.debug(f"Using pooled engine '{eng_code}'")
+            else:
+                self.misses += 1
+            self.schedule_refill()
+        return res
+
+    def get_wanted(self):
+        """Get the engine codes that should have an idle instance => most recently used"""
+
+        with self.lock:
+            return list(self.usage.keys())[-self.size:] if self.size > 0 else []
+
+    def schedule_refill(self):
+        with self.lock:
+            if self.refill_task is None or not self.refill_task.is_active():
+                self.refill_task = zynsched.add_oneshot(self.refill_delay, self.start_refill, "engine_pool_refill", zynsched.LANE_LOW)
+            else:
+                self.refill_task.reschedule(delay=self.refill_delay)
+
+    def start_refill(self):
+        """Start refill thread, if not running"""
+
+        with self.lock:
+            if self.refill_thread is None:
+                self.refill_thread = Thread(target=self.refill, args=(self.generation,))
+                self.refill_thread.name = "engine_pool_refill"
+                self.refill_thread.daemon = True
+                self.refill_thread.start()
+
+    def refill(self, generation):
+        """Start idle instances for wanted engines, evicting unwanted ones. Runs in its own thread.
+
+        generation : Pool generation when the thread started. The thread ends if the pool is cleared.
+        """
+
+        while True:
+            with self.lock:
+                if generation != self.generation:
+                    return
+                wanted = self.get_wanted()
+                evicted = [self.pop_idle(eng_code) for eng_code in list(self.idle.keys()) if eng_code not in wanted]
+                eng_code = None
+                mem = self.get_mem()
+                for code in reversed(wanted):
+                    if code not in self.idle:
+                        # Check memory budget before starting, including the expected cost of the new engine
+                        if mem + self.engine_mem.get(code, self.default_engine_mem) > self.max_mem:
+                            logging.debug(f"Engine pool memory limit reached. Not starting '{code}'")
+                        else:
+                            eng_code = code
+                            break
+                if eng_code is None:
+                    self.refill_thread = None
+            self.stop_engines(evicted)
+            if eng_code is None:
+                return
+
+            try:
+                zyngine, start_time, jackname = self.chain_manager.create_engine(eng_code)
+            except Exception as e:
+                logging.error(f"Can't start pooled engine '{eng_code}' => {e}")
+                with self.lock:
+                    if generation == self.generation:
+                        self.refill_thread = None
+                return
+
+            mem = self.get_engine_mem(zyngine)
+            evicted = []
+            with self.lock:
+                if mem:
+                    self.engine_mem[eng_code] = mem
+                if generation != self.generation or eng_code in self.idle or eng_code not in self.get_wanted():
+                    # Pool cleared, engine used or evicted meanwhile
+                    evicted.append((eng_code, zyngine, jackname))
+                else:
+                    self.idle[eng_code] = (zyngine, start_time, jackname)
+                    logging.debug(f"Pooled engine '{eng_code}' started in {1000 * start_time:.0f}ms")
+                    # Evict least recently used engines over the memory limit
+                    while len(self.idle) > 1 and self.get_mem() > self.max_mem:
+                        evicted.append(self.pop_idle(next(iter(self.idle))))
+            self.stop_engines(evicted)
+
+    def pop_idle(self, eng_code):
+        """Remove an idle engine from pool. It must be stopped with stop_engines(), without holding the lock.
+
+        Returns : tuple (engine code, engine, jackname) or None
+        """
+
+        with self.lock:
+            entry = self.idle.pop(eng_code, None)
+            if entry:
+                self.evictions += 1
+                return eng_code, entry[0], entry[2]
+
+    def stop_engines(self, entries):
+        """Stop engines removed from pool
+
+        entries : List of tuples (engine code, engine, jackname), as returned by pop_idle. None entries are ignored.
+        """
+
+        for entry in entries:
+            if entry is None:
+                continue
+            eng_code, zyngine, jackname = entry
+            logging.debug(f"Stopping pooled engine '{eng_code}' ...")
+            try:
+                zyngine.stop()
+            except Exception as e:
+                logging.error(f"Can't stop pooled engine '{eng_code}' => {e}")
+            self.chain_manager.release_jackname(jackname)
+
+    def clear(self):
+        """Stop all idle engines and forget usage history. Engines being started meanwhile are stopped too."""
+
+        with self.lock:
+            self.generation += 1
+            self.usage.clear()
+            refill_task = self.refill_task
+            self.refill_task = None
+            refill_thread = self.refill_thread
+            self.refill_thread = None
+            evicted = [self.pop_idle(eng_code) for eng_code in list(self.idle.keys())]
+        if refill_task:
+            refill_task.cancel(wait=True)
+        self.stop_engines(evicted)
+        # Engine being started by refill thread is stopped by the thread itself
+        if refill_thread and refill_thread is not current_thread():
+            refill_thread.join()
+
+    # ----------------------------------------------------------------------------
+    # Instrumentation
+    # ----------------------------------------------------------------------------
+
+    @staticmethod
+    def get_engine_mem(zyngine):
+        """Get engine process resident memory (kB)"""
+
+        try:
+            with open(f"/proc/{zyngine.proc.pid}/status") as f:
+                for line in f:
+                    if line.startswith("VmRSS:"):
+                        return int(line.split()[1])
+        except:
+            pass
+        return 0
+
+    def get_mem(self):
+        """Get memory used by idle engines (kB)"""
+
+        with self.lock:
+            return sum(self.get_engine_mem(entry[0]) for entry in self.idle.values())
+
+    def get_stats(self):
+        with self.lock:
+            return {
+                "idle": list(self.idle.keys()),
+                "mem": self.get_mem(),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions
+            }
+
+# ---------------------------------------------------------------------------
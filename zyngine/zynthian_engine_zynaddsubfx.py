@@ -23,6 +23,7 @@
 # ******************************************************************************
 
 import os
+import liblo
 import shutil
 import logging
 from time import sleep
@@ -165,6 +166,9 @@ class zynthian_engine_zynaddsubfx(zynthian_engine):
 		self.current_slot_zctrl = None
 		self.slot_zctrls = {}
 
+		# Coalesce parameter sweeps & send them as OSC bundles
+		self.enable_ctrl_batcher()
+
 		self.start()
 		self.reset()
 
@@ -284,6 +288,22 @@ class zynthian_engine_zynaddsubfx(zynthian_engine):
 		except Exception as err:
 			logging.error(err)
 
+	def send_controller_values(self, zctrls):
+		# Send OSC parameters as a single bundle
+		bundle = None
+		for zctrl in zctrls:
+			if self.osc_server and zctrl.osc_path:
+				if bundle is None:
+					bundle = liblo.Bundle()
+				bundle.add(zctrl.osc_path, zctrl.get_ctrl_osc_val())
+			else:
+				self.send_controller_value(zctrl)
+		if bundle is not None:
+			try:
+				self.osc_server.send(self.osc_target, bundle)
+			except Exception as err:
+				logging.error(err)
+
 	# ---------------------------------------------------------------------------
 	# Specific functions
 	# ---------------------------------------------------------------------------
@@ -0,0 +1,220 @@
+# -*- coding: utf-8 -*-
+# ****************************************************************************
+# ZYNTHIAN PROJECT: Zynthian Load Profiler (zynthian_load_profiler)
+#
+# Phase timing of snapshot & ZS3 loading
+#
+# Copyright (C) 2015-2024 Fernando Moyano <jofemodo@zynthian.org>
+#
+# ****************************************************************************
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License as
+# published by the Free Software Foundation; either version 2 of
+# the License, or any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# For a full copy of the GNU General Public License see the LICENSE.txt file.
+#
+# ****************************************************************************
+
+import os
+from time import monotonic, time
+from functools import wraps
+from threading import local, Lock
+from collections import deque
+from contextlib import contextmanager
+
+# ----------------------------------------------------------------------------
+# Load record => timing of a load operation, split in phases
+# ----------------------------------------------------------------------------
+
+
+class zynthian_load_record:
+
+    def __init__(self, kind, name):
+        self.kind = kind  # i.e. "snapshot", "zs3"
+        self.name = name  # i.e. snapshot path, ZS3 id
+        self.timestamp = time()
+        self.start = monotonic()
+        self.duration = None  # Total time in seconds
+        self.phases = {}  # [total time in seconds, count] indexed by phase path
+
+    def add_phase(self, path, dt):
+        try:
+            phase = self.phases[path]
+            phase[0] += dt
+            phase[1] += 1
+        except KeyError:
+            self.phases[path] = [dt, 1]
+
+    def get_state(self):
+        return {
+            "kind": self.kind,
+            "name": self.name,
+            "timestamp": self.timestamp,
+            "duration": self.duration,
+            "phases": {path: {"time": phase[0], "count": phase[1]} for path, phase in self.phases.items()}
+        }
+
+# ----------------------------------------------------------------------------
+# Zynthian Load Profiler Class
+# ----------------------------------------------------------------------------
+
+
+class zynthian_load_profiler:
+
+    def __init__(self, size=32):
+        """Create a load profiler
+
+        Load operations are timed with record(). Inside a record, code blocks are timed with phase().
+        Phases may be nested and their times are accumulated by path (i.e. "chains/engine_start").
+        A record opened inside another record is timed as a phase of the outer one.
+        Finished records are kept in a ring buffer.
+
+        size : Number of records kept
+        """
+
+        self.enabled = True
+        self.records = deque(maxlen=size)
+        self.lock = Lock()
+        self.tls = local()  # Current record & phase stack, per thread
+
+    @contextmanager
+    def record(self, kind, name=""):
+        """Context manager timing a load operation
+
+        kind : Kind of operation (i.e. "snapshot")
+        name : Name of the loaded object (i.e. file path)
+        """
+
+        if getattr(self.tls, "record", None) is not None:
+            with self.phase(kind):
+                yield
+            return
+        if not self.enabled:
+            yield
+            return
+
+        record = zynthian_load_record(kind, name)
+        self.tls.record = record
+        self.tls.stack = []
+        try:
+            yield
+        finally:
+            record.duration = monotonic() - record.start
+            self.tls.record = None
+            with self.lock:
+                self.records.append(record)
+
+    @contextmanager
+    def phase(self, name):
+        """Context manager timing a phase of the current load operation. Does nothing if there is no record open.
+
+        name : Phase name
+        """
+
+        record = getattr(self.tls, "record", None)
+        if record is None:
+            yield
+            return
+
+        stack = self.tls.stack
+        stack.append(name)
+        path = "/".join(stack)
+        ts = monotonic()
+        try:
+            yield
+        finally:
+            record.add_phase(path, monotonic() - ts)
+            stack.pop()
+
+    def timed(self, kind, named=False):
+        """Decorator for methods timed as a load operation
+
+        kind : Kind of operation
+        named : True to use the first argument after self as record name
+        """
+
+        def decorator(func):
+            @wraps(func)
+            def wrapper(*args, **kwargs):
+                if named and len(args) > 1:
+                    name = str(args[1])
+                else:
+                    name = ""
+                with self.record(kind, name):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    # ----------------------------------------------------------------------------
+    # Query
+    # ----------------------------------------------------------------------------
+
+    def reset(self):
+        with self.lock:
+            self.records.clear()
+
+    def get_records(self, kind=None):
+        """Get recorded load operations, oldest first
+
+        kind : Kind of operation (Default: All)
+        Returns : List of record state dictionaries
+        """
+
+        with self.lock:
+            records = list(self.records)
+        return [record.get_state() for record in records if kind is None or record.kind == kind]
+
+    def get_phase_stats(self, kind=None):
+        """Get statistics of phase times along the recorded operations
+
+        kind : Kind of operation (Default: All)
+        Returns : Dictionary of {n, mean, p50, max} in seconds, indexed by phase path. Total time is indexed by "total".
+        """
+
+        times = {}
+        for record in self.get_records(kind):
+            times.setdefault("total", []).append(record["duration"])
+            for path, phase in record["phases"].items():
+                times.setdefault(path, []).append(phase["time"])
+        stats = {}
+        for path, values in times.items():
+            values.sort()
+            stats[path] = {
+                "n": len(values),
+                "mean": sum(values) / len(values),
+                "p50": values[len(values) // 2],
+                "max": values[-1]
+            }
+        return stats
+
+    def get_report(self, kind=None, last=None):
+        """Get text report of recorded load operations
+
+        kind : Kind of operation (Default: All)
+        last : Number of most recent operations to report (Default: All)
+        Returns : List of text lines
+        """
+
+        records = self.get_records(kind)
+        if last:
+            records = records[-last:]
+        lines = []
+        for record in records:
+            lines.append(f"{record['kind']} '{os.path.basename(record['name'])}' => {1000 * record['duration']:.1f}ms")
+            for path in sorted(record["phases"]):
+                phase = record["phases"][path]
+                indent = "  " * path.count("/")
+                lines.append(f"  {indent}{path.split('/')[-1]}: {1000 * phase['time']:.1f}ms (x{phase['count']})")
+        return lines
+
+# ---------------------------------------------------------------------------
+
+global zynloadprof
+zynloadprof = zynthian_load_profiler(int(os.environ.get('ZYNTHIAN_LOAD_PROFILE_SIZE', "32")))  # Instance load profiler
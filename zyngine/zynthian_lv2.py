@@ -28,14 +28,19 @@ import re
 import sys
 import json
 import lilv
+import pickle
 import copy
 import time
 import string
 import hashlib
 import logging
 import urllib.parse
+import multiprocessing
 from enum import Enum
 from random import randrange
+from bisect import bisect_left
+from threading import RLock
+from concurrent.futures import ProcessPoolExecutor, as_completed
 
 # ------------------------------------------------------------------------------
 # Some variables & definitions
@@ -169,10 +174,22 @@ standalone_engine_info = {
 ENGINE_DEFAULT_CONFIG_FILE = "{}/config/engine_config.json".format(os.environ.get('ZYNTHIAN_SYS_DIR'))
 ENGINE_CONFIG_FILE = "{}/engine_config.json".format(os.environ.get('ZYNTHIAN_CONFIG_DIR'))
 JALV_LV2_CONFIG_FILE = "{}/jalv/plugins.json".format(os.environ.get('ZYNTHIAN_CONFIG_DIR'))
+PORTS_CACHE_FILE = "{}/jalv/ports_cache.pickle".format(os.environ.get('ZYNTHIAN_CONFIG_DIR'))
+PRESETS_CACHE_STATE_FILE = "{}/jalv/presets_cache_state.json".format(os.environ.get('ZYNTHIAN_CONFIG_DIR'))
 
 engines = None
 engines_by_type = None
 engines_mtime = None
+engine_catalog = None
+
+# Port descriptions cache: plugin URL => (bundle path, bundle mtime, pickled ports info)
+ports_cache = None
+ports_cache_lock = RLock()
+
+# Lilv world is not thread-safe. Hold this lock when querying it from threads (i.e. parallel engine start)
+world_lock = RLock()
+# Lilv world is loaded on first use. Use get_world() for accessing it.
+world = None
 
 # ------------------------------------------------------------------------------
 # Lilv LV2 library initialization
@@ -181,14 +198,31 @@ engines_mtime = None
 
 def init_lilv():
 	global world
-	world = lilv.World()
-	# Disable language filtering
-	# world.set_option(lilv.OPTION_FILTER_LANG, world.new_bool(False))
-	world.load_all()
-	world.ns.ev = lilv.Namespace(world, "http://lv2plug.in/ns/ext/event#")
-	world.ns.presets = lilv.Namespace(world, "http://lv2plug.in/ns/ext/presets#")
-	world.ns.portprops = lilv.Namespace(world, "http://lv2plug.in/ns/ext/port-props#")
-	world.ns.portgroups = lilv.Namespace(world, "http://lv2plug.in/ns/ext/port-groups#")
+	with world_lock:
+		start = time.monotonic()
+		world = lilv.World()
+		# Disable language filtering
+		# world.set_option(lilv.OPTION_FILTER_LANG, world.new_bool(False))
+		world.load_all()
+		world.ns.ev = lilv.Namespace(world, "http://lv2plug.in/ns/ext/event#")
+		world.ns.presets = lilv.Namespace(world, "http://lv2plug.in/ns/ext/presets#")
+		world.ns.portprops = lilv.Namespace(world, "http://lv2plug.in/ns/ext/port-props#")
+		world.ns.portgroups = lilv.Namespace(world, "http://lv2plug.in/ns/ext/port-groups#")
+		logging.info(f"Loaded lilv world in {time.monotonic() - start:.3f}s")
+
+
+def get_world():
+	"""Get lilv world, loading it on first use
+
+	Loading the whole LV2 tree is slow, so it's deferred until plugin metadata is really needed.
+	Engine info, ports & presets are usually taken from the cache files without loading it.
+	"""
+
+	if world is None:
+		with world_lock:
+			if world is None:
+				init_lilv()
+	return world
 
 
 # ------------------------------------------------------------------------------
@@ -255,6 +289,8 @@ def save_engines():
 			json.dump(sengines, f)
 		engines_mtime = os.stat(ENGINE_CONFIG_FILE).st_mtime
 		logging.info(f"Saved engine config file with timestamp {engines_mtime}")
+		# Enabled flags may have changed
+		invalidate_engine_catalog()
 	except Exception as e:
 		logging.error(f"Saving engine config file failed: {e}")
 
@@ -329,6 +365,8 @@ def generate_engines_config_file(refresh=True, reset_rankings=None):
 	try:
 		if refresh:
 			init_lilv()
+		else:
+			get_world()
 
 		# Add standalone engines
 		i = 0
@@ -451,21 +489,106 @@ def generate_engines_config_file(refresh=True, reset_rankings=None):
 	except Exception as e:
 		logging.error(e)
 
+	generate_ports_cache()
+
 	dt = int(round(time.time())) - start
 	logging.debug('Generating engine config file took {}s'.format(dt))
 
 
 def get_engines_by_type():
-	global engines_by_type
-	engines_by_type = {}
+	return get_engine_catalog().by_type
 
-	for t in EngineType:
-		engines_by_type[t.value] = {}
+# ------------------------------------------------------------------------------
+# Engine catalog
+# ------------------------------------------------------------------------------
 
-	for key, info in engines.items():
-		engines_by_type[info['TYPE']][key] = info
 
-	return engines_by_type
+class zynthian_engine_catalog:
+
+	def __init__(self, engines):
+		"""Build engine info indexes for fast filtered lookup
+
+		Indexes keep the engines order (by title) and are read-only. They must be rebuilt when engine info changes.
+
+		engines : Engine info dictionary, indexed by engine code
+		"""
+
+		self.engines = engines
+		self.by_type = {t.value: {} for t in EngineType}  # Engine info indexed by type & code
+		self.by_cat = {}  # Engine codes indexed by (type, enabled only) & category, in category order
+		self.by_name = {}  # [casefolded titles, engine codes], sorted by title, indexed by (type, enabled only)
+
+		for key, info in engines.items():
+			try:
+				self.by_type[info['TYPE']][key] = info
+			except KeyError:
+				logging.error(f"Engine '{key}' has invalid type '{info['TYPE']}'!")
+
+		for etype, infos in self.by_type.items():
+			for enabled_only in (False, True):
+				index = (etype, enabled_only)
+				cats = {cat: [] for cat in engine_categories.get(etype, ())}
+				for key, info in infos.items():
+					if enabled_only and not info['ENABLED']:
+						continue
+					try:
+						cats[info['CAT']].append(key)
+					except KeyError:
+						if not enabled_only:
+							logging.error(f"Engine '{key}' has invalid category '{info['CAT']}'!")
+				self.by_cat[index] = {cat: keys for cat, keys in cats.items() if keys}
+				keys = [key for keys in self.by_cat[index].values() for key in keys]
+				names = sorted((infos[key]['TITLE'].casefold(), key) for key in keys)
+				self.by_name[index] = [[name for name, key in names], [key for name, key in names]]
+
+	def get_engines_by_cat(self, etype, enabled_only=True):
+		"""Get engine codes of a type, indexed by category
+
+		Returns : Dictionary of engine code lists, indexed by category. Empty categories are not included.
+		"""
+
+		return self.by_cat.get((etype, enabled_only), {})
+
+	def search(self, etype, prefix, enabled_only=True, irange=None):
+		"""Find engines whose title starts with prefix (case insensitive)
+
+		For incremental search, pass the range returned for a shorter prefix, so only that range is searched.
+
+		irange : Range (start, end) returned by previous search for a prefix of this one (Default: all)
+		Returns : Range (start, end) in the name index, for get_search_results()
+		"""
+
+		names = self.by_name.get((etype, enabled_only), [[], []])[0]
+		if irange:
+			lo, hi = irange
+		else:
+			lo, hi = 0, len(names)
+		prefix = prefix.casefold()
+		start = bisect_left(names, prefix, lo, hi)
+		end = bisect_left(names, prefix + chr(0x10FFFF), start, hi)
+		return start, end
+
+	def get_search_results(self, etype, irange, enabled_only=True):
+		"""Get engine codes in a range returned by search()"""
+
+		return self.by_name.get((etype, enabled_only), [[], []])[1][irange[0]:irange[1]]
+
+
+def get_engine_catalog():
+	"""Get engine catalog, rebuilding it if engine info was reloaded or changed"""
+
+	global engine_catalog, engines_by_type
+	if engine_catalog is None or engine_catalog.engines is not engines:
+		engine_catalog = zynthian_engine_catalog(engines)
+		engines_by_type = engine_catalog.by_type
+	return engine_catalog
+
+
+def invalidate_engine_catalog():
+	"""Rebuild engine catalog on next use. Call it after modifying engine info in place."""
+
+	global engine_catalog
+	engine_catalog = None
 
 # ------------------------------------------------------------------------------
 # LV2 plugin info functions
@@ -543,7 +666,7 @@ def get_plugin_cat(plugin):
 # workaround to fix segfault:
 def generate_presets_cache_workaround():
 	start = int(round(time.time()))
-	for plugin in world.get_all_plugins():
+	for plugin in get_world().get_all_plugins():
 		plugin.get_name()
 	logging.info('Workaround took {}s'.format(int(round(time.time())) - start))
 
@@ -552,15 +675,132 @@ def generate_all_presets_cache(refresh=True):
 	if refresh:
 		init_lilv()
 
-	for plugin in world.get_all_plugins():
+	for plugin in get_world().get_all_plugins():
 		_generate_plugin_presets_cache(plugin)
 
 
+def generate_presets_cache_parallel(workers=None, force=False, progress_cb=None):
+	"""Generate presets cache of all plugins using a pool of worker processes
+
+	Each worker loads its own lilv world. Plugins whose bundle and preset bundles didn't change since last run are skipped.
+	This loads a lilv world too, so don't call it from the UI process. Run 'zynthian_lv2.py presets' instead.
+
+	workers : Number of worker processes (Default: number of CPUs minus one)
+	force : True to regenerate the cache of all plugins
+	progress_cb : Function called after each plugin with (done, total, plugin name)
+	Returns : Number of plugins whose presets cache was generated
+	"""
+
+	start = time.monotonic()
+	try:
+		with open(PRESETS_CACHE_STATE_FILE) as f:
+			state = json.load(f)
+	except FileNotFoundError:
+		state = {}
+	except Exception as e:
+		logging.error(f"Can't load presets cache state file '{PRESETS_CACHE_STATE_FILE}': {e}")
+		state = {}
+
+	# Find plugins with changed bundles
+	jobs = []
+	with world_lock:
+		wplugins = get_world().get_all_plugins()
+		urls = set()
+		for plugin in wplugins:
+			plugin_url = str(plugin.get_uri())
+			plugin_name = str(plugin.get_name())
+			urls.add(plugin_url)
+			signature = get_plugin_presets_signature(plugin)
+			if not force and state.get(plugin_url) == signature and os.path.isfile(_get_plugin_preset_cache_fpath(plugin_name)):
+				continue
+			jobs.append((plugin_url, plugin_name, signature))
+	for plugin_url in list(state):
+		if plugin_url not in urls:
+			del state[plugin_url]
+
+	total = len(jobs)
+	ok = 0
+	if total > 0:
+		if not workers:
+			workers = max(1, (os.cpu_count() or 1) - 1)
+		# Spawned workers start clean, without the parent's threads, locks or world. They load their own one.
+		mp_context = multiprocessing.get_context("spawn")
+		with ProcessPoolExecutor(max_workers=min(workers, total), mp_context=mp_context, initializer=_presets_cache_worker_init) as pool:
+			futures = {pool.submit(_presets_cache_worker_task, job[0]): job for job in jobs}
+			for i, future in enumerate(as_completed(futures), 1):
+				plugin_url, plugin_name, signature = futures[future]
+				try:
+					future.result()
+					state[plugin_url] = signature
+					ok += 1
+				except Exception as e:
+					logging.error(f"Error generating presets cache for '{plugin_name}': {e}")
+					state.pop(plugin_url, None)
+				if progress_cb:
+					progress_cb(i, total, plugin_name)
+
+	# Write to temporary file and rename, so an interrupted run doesn't leave a broken state file
+	fpath_tmp = PRESETS_CACHE_STATE_FILE + ".tmp"
+	try:
+		with open(fpath_tmp, 'w') as f:
+			json.dump(state, f)
+		os.replace(fpath_tmp, PRESETS_CACHE_STATE_FILE)
+	except Exception as e:
+		logging.error(f"Can't save presets cache state file '{PRESETS_CACHE_STATE_FILE}': {e}")
+
+	logging.info(f"Generated presets cache for {ok}/{total} changed plugins ({len(urls) - total} unchanged) in {time.monotonic() - start:.1f}s")
+	return ok
+
+
+def _presets_cache_worker_init():
+	# Leave CPU for audio & UI
+	try:
+		os.nice(10)
+	except Exception as e:
+		logging.warning(f"Can't nice presets cache worker: {e}")
+	init_lilv()
+	generate_presets_cache_workaround()
+
+
+def _presets_cache_worker_task(plugin_url):
+	try:
+		_generate_plugin_presets_cache(world.get_all_plugins()[plugin_url])
+	except Exception as e:
+		# lilv exceptions may not be picklable
+		raise RuntimeError(str(e))
+
+
+def get_plugin_presets_signature(plugin):
+	"""Get bundles containing plugin's data & presets, with their modification time
+
+	Presets are not loaded, so it's fast.
+
+	plugin : lilv plugin object. Caller must hold world_lock.
+	Returns : List of [bundle path, mtime], sorted by path
+	"""
+
+	bundles = {get_plugin_bundle_path(plugin)}
+	for preset in plugin.get_related(world.ns.presets.Preset):
+		uri = world.get(preset, world.ns.rdfs.seeAlso, None)
+		if uri is None:
+			uri = preset
+		uri = str(uri)
+		if uri.startswith("file:"):
+			bundles.add(os.path.dirname(uri_to_path(uri)))
+	signature = []
+	for bundle_path in sorted(bundles):
+		try:
+			signature.append([bundle_path, get_bundle_mtime(bundle_path)])
+		except:
+			signature.append([bundle_path, None])
+	return signature
+
+
 def generate_plugin_presets_cache(plugin_url, refresh=True):
 	if refresh:
 		init_lilv()
 
-	wplugins = world.get_all_plugins()
+	wplugins = get_world().get_all_plugins()
 	return _generate_plugin_presets_cache(wplugins[plugin_url])
 
 
@@ -660,11 +900,13 @@ def save_plugin_presets_cache(plugin_name, presets_info):
 		else:
 			presets_info[k]['presets'] = sorted(presets_info[k]['presets'], key=lambda k: k['label'])
 
-	# Dump json to file
+	# Dump json to temporary file and rename, so readers never get a partial file
 	fpath_cache = _get_plugin_preset_cache_fpath(plugin_name)
+	fpath_tmp = f"{fpath_cache}.{os.getpid()}.tmp"
 	try:
-		with open(fpath_cache, 'w') as f:
+		with open(fpath_tmp, 'w') as f:
 			json.dump(presets_info, f)
+		os.replace(fpath_tmp, fpath_cache)
 	except Exception as e:
 		logging.error("Can't save presets cache file '{}': {}".format(fpath_cache, e))
 
@@ -692,9 +934,141 @@ def sanitize_fname(s):
 
 
 def get_plugin_ports(plugin_url):
-	wplugins = world.get_all_plugins()
-	plugin = wplugins[plugin_url]
+	"""Get plugin's input control ports info
+
+	It's taken from the ports cache if plugin's bundle didn't change, so lilv is not queried at all.
+	"""
+
+	ports_info = get_cached_plugin_ports(plugin_url)
+	if ports_info is None:
+		with world_lock:
+			plugin = get_world().get_all_plugins()[plugin_url]
+			ports_info = _get_plugin_ports(plugin)
+			update_ports_cache(plugin, ports_info)
+		save_ports_cache()
+	return ports_info
+
+
+def get_bundle_mtime(bundle_path):
+	"""Get the latest modification time (ns) of a bundle directory and its files"""
+
+	mtime = os.stat(bundle_path).st_mtime_ns
+	with os.scandir(bundle_path) as entries:
+		for entry in entries:
+			try:
+				mtime = max(mtime, entry.stat().st_mtime_ns)
+			except:
+				pass
+	return mtime
+
+
+def uri_to_path(uri):
+	return urllib.parse.unquote(urllib.parse.urlparse(uri).path)
+
 
+def get_plugin_bundle_path(plugin):
+	return uri_to_path(str(plugin.get_bundle_uri()))
+
+
+def load_ports_cache():
+	global ports_cache
+	with ports_cache_lock:
+		if ports_cache is None:
+			try:
+				with open(PORTS_CACHE_FILE, 'rb') as f:
+					ports_cache = pickle.load(f)
+				logging.debug(f"Loaded ports cache with {len(ports_cache)} plugins")
+			except FileNotFoundError:
+				ports_cache = {}
+			except Exception as e:
+				logging.error(f"Can't load ports cache file '{PORTS_CACHE_FILE}': {e}")
+				ports_cache = {}
+		return ports_cache
+
+
+def save_ports_cache():
+	with ports_cache_lock:
+		if ports_cache is None:
+			return
+		# Write to temporary file and rename, so readers never get a partial file
+		fpath_tmp = PORTS_CACHE_FILE + ".tmp"
+		try:
+			with open(fpath_tmp, 'wb') as f:
+				pickle.dump(ports_cache, f, protocol=pickle.HIGHEST_PROTOCOL)
+			os.replace(fpath_tmp, PORTS_CACHE_FILE)
+		except Exception as e:
+			logging.error(f"Can't save ports cache file '{PORTS_CACHE_FILE}': {e}")
+
+
+def get_cached_plugin_ports(plugin_url):
+	"""Get plugin's ports info from cache
+
+	Returns : A fresh copy of ports info or None if plugin is not cached or its bundle changed
+	"""
+
+	with ports_cache_lock:
+		try:
+			bundle_path, mtime, data = load_ports_cache()[plugin_url]
+		except KeyError:
+			return None
+	try:
+		if get_bundle_mtime(bundle_path) != mtime:
+			return None
+		return pickle.loads(data)
+	except Exception as e:
+		logging.debug(f"Stale ports cache for <{plugin_url}> => {e}")
+		return None
+
+
+def update_ports_cache(plugin, ports_info=None):
+	"""Update plugin's entry in ports cache (not saved to disk)
+
+	plugin : lilv plugin object. Caller must hold world_lock.
+	ports_info : Ports info already parsed, or None to parse it now
+	Returns : True if entry was updated
+	"""
+
+	plugin_url = str(plugin.get_uri())
+	try:
+		bundle_path = get_plugin_bundle_path(plugin)
+		mtime = get_bundle_mtime(bundle_path)
+		with ports_cache_lock:
+			entry = load_ports_cache().get(plugin_url)
+		if ports_info is None:
+			if entry and entry[0] == bundle_path and entry[1] == mtime:
+				return False
+			ports_info = _get_plugin_ports(plugin)
+		with ports_cache_lock:
+			ports_cache[plugin_url] = (bundle_path, mtime, pickle.dumps(ports_info, protocol=pickle.HIGHEST_PROTOCOL))
+		return True
+	except Exception as e:
+		logging.error(f"Can't cache ports for <{plugin_url}>: {e}")
+		return False
+
+
+def generate_ports_cache():
+	"""Refresh ports cache for all LV2 plugins whose bundle changed, and drop uninstalled plugins"""
+
+	start = time.monotonic()
+	n = 0
+	with world_lock:
+		wplugins = get_world().get_all_plugins()
+		urls = set()
+		for plugin in wplugins:
+			urls.add(str(plugin.get_uri()))
+			if update_ports_cache(plugin):
+				n += 1
+	with ports_cache_lock:
+		for plugin_url in list(ports_cache):
+			if plugin_url not in urls:
+				del ports_cache[plugin_url]
+				n += 1
+	if n:
+		save_ports_cache()
+	logging.debug(f"Updated ports cache for {n} plugins in {time.monotonic() - start:.3f}s")
+
+
+def _get_plugin_ports(plugin):
 	ports_info = {}
 	for i in range(plugin.get_num_ports()):
 		port = plugin.get_port_by_index(i)
@@ -807,9 +1181,7 @@ def get_node_value(node):
 # Main program
 # ------------------------------------------------------------------------------
 
-# Init Lilv
-init_lilv()
-# Load engine info from cache
+# Load engine info from cache. Lilv world is loaded on first use.
 load_engines()
 
 if __name__ == '__main__':
@@ -832,27 +1204,28 @@ if __name__ == '__main__':
 					generate_plugin_presets_cache(info['URL'], False)
 
 		elif sys.argv[1] == "presets":
-			generate_presets_cache_workaround()
-
-			if len(sys.argv) > 2:
+			if len(sys.argv) > 2 and sys.argv[2] != "--force":
+				generate_presets_cache_workaround()
 				plugin_url = sys.argv[2]
 				generate_plugin_presets_cache(plugin_url, False)
 			else:
-				generate_all_presets_cache(False)
+				# Progress is printed to stdout, so callers can show it
+				generate_presets_cache_parallel(force=len(sys.argv) > 2,
+					progress_cb=lambda done, total, name: print(f"{done}/{total} {name}", flush=True))
 
 		elif sys.argv[1] == "ports":
 			if len(sys.argv) > 2:
 				print(get_plugin_ports(sys.argv[2]))
 			else:
-				pass
+				generate_ports_cache()
 
 		elif sys.argv[1] == "all":
 			generate_engines_config_file(refresh=False)
-			generate_all_presets_cache(False)
+			generate_presets_cache_parallel(force=True)
 
 	else:
 		generate_engines_config_file(refresh=False)
-		generate_all_presets_cache(False)
+		generate_presets_cache_parallel()
 
 	#get_plugin_ports("https://github.com/dcoredump/dexed.lv2")
 	#get_plugin_ports("http://code.google.com/p/amsynth/amsynth")
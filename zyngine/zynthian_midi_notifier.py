@@ -0,0 +1,127 @@
+# -*- coding: utf-8 -*-
+# ****************************************************************************
+# ZYNTHIAN PROJECT: Zynthian MIDI Notifier (zynthian_midi_notifier)
+#
+# Wait for MIDI events pending in the zynmidi buffer
+#
+# Copyright (C) 2015-2024 Fernando Moyano <jofemodo@zynthian.org>
+#
+# ****************************************************************************
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License as
+# published by the Free Software Foundation; either version 2 of
+# the License, or any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# For a full copy of the GNU General Public License see the LICENSE.txt file.
+#
+# ****************************************************************************
+
+import os
+import select
+import logging
+from time import sleep
+
+# ----------------------------------------------------------------------------
+# Zynthian MIDI Notifier Class
+# ----------------------------------------------------------------------------
+
+
+class zynthian_midi_notifier:
+
+    MODE_POLL = 0  # Sleep fixed interval (fallback)
+    MODE_EVENTFD = 1  # Block on eventfd signaled by zyncore
+
+    mode_names = ["POLL", "EVENTFD"]
+
+    def __init__(self, lib, poll_interval=0.01):
+        """Create a MIDI notifier
+
+        If the zyncore library exports get_zynmidi_eventfd(), returning the file descriptor of an eventfd
+        signaled when MIDI is written to the buffer, it blocks on it. Otherwise it falls back to polling.
+        Current zyncore doesn't export it yet, so polling is used until it does.
+
+        A callback registered in zyncore is not used on purpose: it would run python code in the
+        thread writing the buffer, that is the jack process thread.
+
+        lib : zyncore library (or a stand-in object implementing the same functions)
+        poll_interval : Polling interval in seconds, used as fallback
+        """
+
+        self.lib = lib
+        self.poll_interval = poll_interval
+        self.mode = self.MODE_POLL
+        self.closed = False
+        self.evfd = None
+        self.wake_fds = None
+        self.poller = None
+
+        try:
+            evfd = lib.get_zynmidi_eventfd()
+            if evfd is not None and evfd >= 0:
+                self.evfd = evfd
+                self.wake_fds = os.pipe()
+                self.poller = select.poll()
+                self.poller.register(self.evfd, select.POLLIN)
+                self.poller.register(self.wake_fds[0], select.POLLIN)
+                self.mode = self.MODE_EVENTFD
+        except AttributeError:
+            pass
+        except Exception as e:
+            logging.error(f"Can't setup zynmidi eventfd => {e}")
+
+
+        logging.info(f"MIDI read notification mode: {self.mode_names[self.mode]}")
+
+    def wait(self, timeout=None):
+        """Wait until MIDI events may be pending in the zynmidi buffer or the notifier is woken up
+
+        timeout : Max waiting time in seconds (None for no timeout)
+        Returns : False if notifier has been closed
+        """
+
+        if self.mode == self.MODE_EVENTFD:
+            if timeout is not None:
+                timeout = max(0, int(1000 * timeout))
+            for fd, ev in self.poller.poll(timeout):
+                if fd == self.evfd:
+                    try:
+                        os.read(self.evfd, 8)  # Reset eventfd counter
+                    except BlockingIOError:
+                        pass
+                else:
+                    os.read(fd, 1)
+        elif timeout is not None:
+            sleep(max(0, min(self.poll_interval, timeout)))
+        else:
+            sleep(self.poll_interval)
+        return not self.closed
+
+    def wake(self):
+        """Wake up waiting thread"""
+
+        if self.mode == self.MODE_EVENTFD:
+            os.write(self.wake_fds[1], b"\x00")
+
+    def close(self):
+        """Wake up waiting thread and stop notifications. Resources are released by release()"""
+
+        self.closed = True
+        self.wake()
+
+    def release(self):
+        """Release resources. Call it after the waiting thread has finished."""
+
+        if self.wake_fds:
+            self.poller.unregister(self.evfd)
+            self.poller.unregister(self.wake_fds[0])
+            os.close(self.wake_fds[0])
+            os.close(self.wake_fds[1])
+            self.wake_fds = None
+
+# ---------------------------------------------------------------------------
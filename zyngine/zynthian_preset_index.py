@@ -0,0 +1,420 @@
+# -*- coding: utf-8 -*-
+# ****************************************************************************
+# ZYNTHIAN PROJECT: Zynthian Preset Index (zynthian_preset_index)
+#
+# Persistent index of preset files & directories
+#
+# Copyright (C) 2015-2024 Fernando Moyano <jofemodo@zynthian.org>
+#
+# ****************************************************************************
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License as
+# published by the Free Software Foundation; either version 2 of
+# the License, or any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# For a full copy of the GNU General Public License see the LICENSE.txt file.
+#
+# ****************************************************************************
+
+import os
+import json
+import ctypes
+import select
+import struct
+import logging
+from time import time
+from stat import S_ISDIR
+from threading import Thread, RLock
+
+from zyngine.zynthian_scheduler import zynsched
+
+# ----------------------------------------------------------------------------
+# Directory watcher => inotify through libc
+# ----------------------------------------------------------------------------
+
+
+class zynthian_dir_watcher:
+
+    IN_MOVED_FROM = 0x00000040
+    IN_MOVED_TO = 0x00000080
+    IN_CREATE = 0x00000100
+    IN_DELETE = 0x00000200
+    IN_DELETE_SELF = 0x00000400
+    IN_MOVE_SELF = 0x00000800
+    IN_UNMOUNT = 0x00002000
+    IN_Q_OVERFLOW = 0x00004000
+    IN_IGNORED = 0x00008000
+    IN_ONLYDIR = 0x01000000
+
+    # Events changing a directory's entries
+    WATCH_MASK = IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE | IN_DELETE_SELF | IN_MOVE_SELF | IN_ONLYDIR
+
+    def __init__(self, callback):
+        """Watch directories for entry changes
+
+        callback : Function called from the watcher thread with (changed directory path, watch lost).
+                   Path is None if events were lost. Watch lost is True if the directory is not watched anymore
+                   (deleted, moved or unmounted), so it must be added again.
+        """
+
+        self.callback = callback
+        self.libc = ctypes.CDLL(None, use_errno=True)
+        self.fd = self.libc.inotify_init1(os.O_CLOEXEC | os.O_NONBLOCK)
+        if self.fd < 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, os.strerror(errno))
+        self.lock = RLock()
+        self.wd_paths = {}  # Path indexed by watch descriptor
+        self.path_wds = {}  # Watch descriptor indexed by path
+        self.running = True
+        self.thread = Thread(target=self.read_task, args=())
+        self.thread.name = "preset_index_watcher"
+        self.thread.daemon = True  # thread dies with the program
+        self.thread.start()
+
+    def add(self, path):
+        """Watch a directory
+
+        Returns : True if watched, False if it can't be watched, i.e. max_user_watches reached
+        """
+
+        with self.lock:
+            if path in self.path_wds:
+                return True
+            wd = self.libc.inotify_add_watch(self.fd, os.fsencode(path), self.WATCH_MASK)
+            if wd < 0:
+                return False
+            self.wd_paths[wd] = path
+            self.path_wds[path] = wd
+            return True
+
+    def remove(self, path):
+        with self.lock:
+            wd = self.path_wds.pop(path, None)
+            if wd is not None:
+                self.wd_paths.pop(wd, None)
+                self.libc.inotify_rm_watch(self.fd, wd)
+
+    def read_task(self):
+        poller = select.poll()
+        poller.register(self.fd, select.POLLIN)
+        while self.running:
+            if not poller.poll(1000):
+                continue
+            try:
+                data = os.read(self.fd, 65536)
+            except BlockingIOError:
+                continue
+            except OSError as e:
+                logging.error(f"Can't read directory events => {e}")
+                break
+            i = 0
+            while i + 16 <= len(data):
+                wd, mask, cookie, size = struct.unpack_from("iIII", data, i)
+                i += 16 + size
+                if mask & self.IN_Q_OVERFLOW:
+                    self.callback(None, False)
+                    continue
+                lost = False
+                with self.lock:
+                    path = self.wd_paths.get(wd)
+                    # Ignore stale watch descriptors, if path was watched again
+                    if path is not None and self.path_wds.get(path) == wd and mask & (self.IN_IGNORED | self.IN_UNMOUNT):
+                        lost = True
+                    if mask & self.IN_IGNORED:
+                        self.wd_paths.pop(wd, None)
+                        if lost:
+                            self.path_wds.pop(path)
+                if path is not None:
+                    self.callback(path, lost)
+
+    def close(self):
+        self.running = False
+        if self.thread.is_alive():
+            self.thread.join(2.0)
+        os.close(self.fd)
+
+# ----------------------------------------------------------------------------
+# Zynthian Preset Index Class
+# ----------------------------------------------------------------------------
+
+
+class zynthian_preset_index:
+
+    # Directory entries modified more recently than this (seconds) are rescanned on next use,
+    # because changes inside the mtime resolution (2s on FAT) can't be detected.
+    mtime_resolution = 2.5
+
+    # Max directory depth walked, as protection against symlink loops
+    max_depth = 16
+
+    def __init__(self, fpath=None):
+        """Create a preset index
+
+        Keeps the entries (subdirectories & files) of every directory walked for searching presets,
+        so bank & preset lists don't walk the storage tree each time. A directory is only rescanned when
+        its mtime changed or, if inotify is available, when it's notified as changed.
+        The index is saved to disk, so it's kept across restarts.
+
+        fpath : Path of the index file (None for not saving it)
+        """
+
+        self.fpath = fpath
+        self.lock = RLock()
+        self.dirs = {}  # [mtime_ns, subdir names, file names] indexed by directory path
+        self.loaded = False
+        self.save_delay = 5.0
+        self.save_task = None
+
+        self.use_inotify = os.environ.get('ZYNTHIAN_PRESET_INDEX_INOTIFY', "1") == "1"
+        self.watcher = None
+        self.watched = set()  # Watched directory paths => entry is valid until notified
+        self.dirty = set()  # Watched directory paths notified as changed
+
+        # Statistics
+        self.scans = 0
+        self.stats = 0
+
+    # ----------------------------------------------------------------------------
+    # Persistence
+    # ----------------------------------------------------------------------------
+
+    def load(self):
+        with self.lock:
+            if self.loaded:
+                return
+            self.loaded = True
+            if self.use_inotify:
+                try:
+                    self.watcher = zynthian_dir_watcher(self.on_dir_changed)
+                except Exception as e:
+                    logging.warning(f"Can't watch preset directories => {e}")
+            if not self.fpath:
+                return
+            try:
+                with open(self.fpath, "r") as fh:
+                    self.dirs = json.load(fh)
+                logging.debug(f"Loaded preset index with {len(self.dirs)} directories")
+            except FileNotFoundError:
+                pass
+            except Exception as e:
+                logging.warning(f"Can't load preset index '{self.fpath}' => {e}")
+
+    def save(self):
+        if not self.fpath:
+            return
+        with self.lock:
+            self.save_task = None
+            data = json.dumps(self.dirs)
+        try:
+            tmp_fpath = self.fpath + ".tmp"
+            with open(tmp_fpath, "w") as fh:
+                fh.write(data)
+            os.replace(tmp_fpath, self.fpath)
+        except Exception as e:
+            logging.warning(f"Can't save preset index '{self.fpath}' => {e}")
+
+    def schedule_save(self):
+        if self.fpath and self.save_task is None:
+            self.save_task = zynsched.add_oneshot(self.save_delay, self.save, "preset_index.save", zynsched.LANE_LOW)
+
+    # ----------------------------------------------------------------------------
+    # Index update
+    # ----------------------------------------------------------------------------
+
+    def on_dir_changed(self, path, lost=False):
+        with self.lock:
+            if path is None:
+                # Events lost => don't trust watched entries
+                self.dirty.update(self.watched)
+            else:
+                self.dirty.add(path)
+                if lost:
+                    # Watch must be added again when the directory is used
+                    self.watched.discard(path)
+
+    def get_entry(self, path, check=True):
+        """Get directory entry, rescanning the directory if it changed
+
+        path : Directory path
+        check : False for using the indexed entry, if any, without checking it
+        Returns : [mtime_ns, subdir names, file names] or None if path is not a directory
+        """
+
+        with self.lock:
+            self.load()
+            entry = self.dirs.get(path)
+            if entry is not None and (not check or (path in self.watched and path not in self.dirty)):
+                return entry
+            self.dirty.discard(path)
+            try:
+                st = os.stat(path)
+                self.stats += 1
+            except OSError:
+                st = None
+            if st is None or not S_ISDIR(st.st_mode):
+                if entry is not None:
+                    self.purge(path)
+                return None
+            # Watch before scanning, so changes done while scanning are notified
+            if self.watcher and path not in self.watched and self.watcher.add(path):
+                self.watched.add(path)
+            if entry is None or entry[0] != st.st_mtime_ns:
+                entry = self.scan(path, st.st_mtime_ns)
+            return entry
+
+    def scan(self, path, mtime_ns):
+        subdirs = []
+        files = []
+        try:
+            with os.scandir(path) as it:
+                for dentry in it:
+                    try:
+                        if dentry.is_dir():
+                            subdirs.append(dentry.name)
+                        elif dentry.is_file():
+                            files.append(dentry.name)
+                    except OSError:
+                        pass
+        except OSError as e:
+            logging.warning(f"Can't scan directory '{path}' => {e}")
+        subdirs.sort()
+        files.sort()
+        old_entry = self.dirs.get(path)
+        if old_entry:
+            for name in set(old_entry[1]).difference(subdirs):
+                self.purge(os.path.join(path, name))
+        if time() - mtime_ns / 1000000000 < self.mtime_resolution:
+            mtime_ns = None
+        entry = [mtime_ns, subdirs, files]
+        self.dirs[path] = entry
+        self.scans += 1
+        self.schedule_save()
+        return entry
+
+    def purge(self, path):
+        """Remove a directory and its subdirectories from index"""
+
+        with self.lock:
+            prefix = path + "/"
+            for dpath in [dpath for dpath in self.dirs if dpath == path or dpath.startswith(prefix)]:
+                del self.dirs[dpath]
+                self.dirty.discard(dpath)
+                if dpath in self.watched:
+                    self.watched.discard(dpath)
+                    self.watcher.remove(dpath)
+            self.schedule_save()
+
+    def refresh(self, path):
+        """Check a directory tree, rescanning changed directories"""
+
+        with self.lock:
+            for dpath, entry in self.iter_tree(path):
+                pass
+
+    def clear(self):
+        with self.lock:
+            for dpath in list(self.watched):
+                self.watcher.remove(dpath)
+            self.watched.clear()
+            self.dirty.clear()
+            self.dirs = {}
+            self.schedule_save()
+
+    # ----------------------------------------------------------------------------
+    # Queries
+    # ----------------------------------------------------------------------------
+
+    def iter_tree(self, path, check=True):
+        """Iterate a directory tree, skipping hidden directories. Caller must hold the lock.
+
+        path : Root directory path
+        check : False for using indexed entries without checking them
+        Yields : (directory path, entry)
+        """
+
+        stack = [(path, 0)]
+        while stack:
+            dpath, depth = stack.pop()
+            entry = self.get_entry(dpath, check)
+            if entry is None:
+                continue
+            yield dpath, entry
+            if depth < self.max_depth:
+                for name in reversed(entry[1]):
+                    if not name.startswith('.'):
+                        stack.append((os.path.join(dpath, name), depth + 1))
+
+    @staticmethod
+    def get_fext_suffixes(fexts):
+        return tuple("." + fext.lower() for fext in fexts)
+
+    def has_file(self, path, fexts, check=True):
+        """Check if there is some file with any of the extensions in a directory tree
+
+        path : Root directory path
+        fexts : List of file extensions, case insensitive
+        check : False for using indexed entries without checking them
+        """
+
+        suffixes = self.get_fext_suffixes(fexts)
+        with self.lock:
+            for dpath, entry in self.iter_tree(path, check):
+                for fname in entry[2]:
+                    if not fname.startswith('.') and fname.lower().endswith(suffixes):
+                        return True
+        return False
+
+    def find_files(self, path, fexts, check=True):
+        """Get all files with any of the extensions in a directory tree
+
+        path : Root directory path
+        fexts : List of file extensions, case insensitive
+        check : False for using indexed entries without checking them
+        Returns : List of file paths
+        """
+
+        suffixes = self.get_fext_suffixes(fexts)
+        res = []
+        with self.lock:
+            for dpath, entry in self.iter_tree(path, check):
+                for fname in entry[2]:
+                    if not fname.startswith('.') and fname.lower().endswith(suffixes):
+                        res.append(os.path.join(dpath, fname))
+        return res
+
+    def get_subdirs(self, path, check=True):
+        """Get sorted list of subdirectory names, including hidden ones"""
+
+        entry = self.get_entry(path, check)
+        if entry is None:
+            return []
+        return list(entry[1])
+
+    def get_files(self, path, check=True):
+        """Get sorted list of file names, including hidden ones"""
+
+        entry = self.get_entry(path, check)
+        if entry is None:
+            return []
+        return list(entry[2])
+
+    def get_stats(self):
+        with self.lock:
+            return {
+                "dirs": len(self.dirs),
+                "watched": len(self.watched),
+                "scans": self.scans,
+                "stats": self.stats
+            }
+
+# ---------------------------------------------------------------------------
+
+global zynpresetindex
+zynpresetindex = zynthian_preset_index(os.environ.get('ZYNTHIAN_CONFIG_DIR', "/zynthian/config") + "/preset_index.json")  # Instance preset index
@@ -0,0 +1,141 @@
+# -*- coding: utf-8 -*-
+# ****************************************************************************
+# ZYNTHIAN PROJECT: Zynthian Process Channel (zynthian_proc_channel)
+#
+# Asynchronous, pipelined command channel to an engine's console process
+#
+# Copyright (C) 2015-2024 Fernando Moyano <jofemodo@zynthian.org>
+#
+# ****************************************************************************
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License as
+# published by the Free Software Foundation; either version 2 of
+# the License, or any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# For a full copy of the GNU General Public License see the LICENSE.txt file.
+#
+# ****************************************************************************
+
+import logging
+import pexpect
+from threading import Thread, Lock
+from collections import deque
+from concurrent.futures import Future
+
+# ----------------------------------------------------------------------------
+# Zynthian Process Channel Class
+# ----------------------------------------------------------------------------
+
+
+class zynthian_proc_channel:
+
+    def __init__(self, proc, prompt, name):
+        """Create a command channel to a pexpect process
+
+        Commands are written without waiting for previous commands to finish, so several of them may be in flight.
+        The process must answer every command with the prompt, in order. A reader thread collects the output of
+        each command and resolves its future. Commands sent without future don't wait for the prompt at all.
+
+        proc : pexpect spawn object. Startup output must be already consumed.
+        prompt : Command prompt (pexpect pattern)
+        name : Name used for the reader thread
+        """
+
+        self.proc = proc
+        self.prompt = prompt
+        self.name = name
+        self.lock = Lock()
+        self.pending = deque()  # Future for each command in flight, in order. None for fire & forget commands.
+        self.running = True
+        self.thread = Thread(target=self.reader_task, args=())
+        self.thread.name = f"proc_{name}"
+        self.thread.daemon = True  # thread dies with the program
+        self.thread.start()
+
+    def send(self, cmd, wait=True):
+        """Send a command
+
+        cmd : Command string
+        wait : False for fire & forget commands
+        Returns : Future resolved with the command output, or None if wait is False
+        """
+
+        return self.send_many([cmd], wait)[0]
+
+    def send_many(self, cmds, wait=True):
+        """Send several commands with a single write
+
+        cmds : List of command strings
+        wait : False for fire & forget commands
+        Returns : List of futures (or None if wait is False), one per command
+        """
+
+        if wait:
+            futures = [Future() for cmd in cmds]
+        else:
+            futures = [None] * len(cmds)
+        with self.lock:
+            if not self.running:
+                raise EOFError(f"Channel to '{self.name}' is closed")
+            self.pending.extend(futures)
+            try:
+                self.proc.send("\n".join(cmds) + "\n")
+            except:
+                # Not sent => not in flight
+                for i in range(len(cmds)):
+                    self.pending.pop()
+                raise
+        return futures
+
+    def reader_task(self):
+        while self.running:
+            try:
+                # Timeout allows checking the running flag. Buffered output is kept for next try.
+                self.proc.expect(self.prompt, timeout=0.5)
+            except pexpect.TIMEOUT:
+                continue
+            except pexpect.EOF:
+                if self.running:
+                    logging.error(f"Process '{self.name}' ended")
+                break
+            except Exception as e:
+                if self.running:
+                    logging.error(f"Channel to '{self.name}' broken => {e}")
+                break
+            out = self.proc.before.decode()
+            with self.lock:
+                if self.pending:
+                    future = self.pending.popleft()
+                else:
+                    logging.debug(f"Unexpected prompt from '{self.name}' => {out}")
+                    continue
+            if future:
+                future.set_result(out)
+        self.close(False)
+
+    def close(self, wait=True):
+        """Stop reader thread. Commands in flight fail with EOFError.
+
+        wait : True to wait until the reader thread finishes
+        """
+
+        with self.lock:
+            self.running = False
+            while self.pending:
+                future = self.pending.popleft()
+                if future and not future.done():
+                    future.set_exception(EOFError(f"Channel to '{self.name}' closed"))
+        if wait and self.thread.is_alive():
+            self.thread.join(1.0)
+
+    def get_in_flight(self):
+        with self.lock:
+            return len(self.pending)
+
+# ---------------------------------------------------------------------------
@@ -30,6 +30,7 @@ import traceback
 
 # Zynthian specific modules
 from zyncoder.zyncore import lib_zyncore
+from zyngine.zynthian_load_profiler import zynloadprof
 
 class zynthian_processor:
 
@@ -687,43 +688,77 @@ class zynthian_processor:
             state['controllers'][symbol] = self.controllers_dict[symbol].get_state()
         return state
 
-    def set_state(self, state):
+    def set_state(self, state, pending_zctrls=None):
         """Configure processor from state model dictionary
 
+        Bank, preset and controller values are only set if they differ from the current ones.
+
         state : Processor state
+        pending_zctrls : Dictionary of changed controller lists indexed by engine, for sending them later in bulk (Default: send before returning)
         """
 
-        try:
-            self.get_bank_list()
-        except:
-            pass
-        if "bank_info" in state and state["bank_info"]:
-            try:
-                self.set_bank_by_info(state["bank_info"])
-            except:
-                logging.exception(traceback.format_exc())
-        try:
-            self.load_preset_list()
-        except:
-            pass
-
-        if "preset_info" in state:
-            try:
-                self.set_preset_by_id(state["preset_info"][0], force_set_engine=False)
-            except:
-                # Legacy snapshots without preset_info
-                self.set_preset(state["preset_info"], force_set_engine=False)
-        # Set controller values
-        if "controllers" in state:
-            for symbol, ctrl_state in state["controllers"].items():
+        with zynloadprof.phase("preset_load"):
+            if not self.is_state_preset_loaded(state):
+                try:
+                    self.get_bank_list()
+                except:
+                    pass
+                if "bank_info" in state and state["bank_info"]:
+                    try:
+                        # Don't reload the bank if it's already loaded (i.e. processor kept from previous snapshot)
+                        self.set_bank_by_info(state["bank_info"], state["bank_info"] != self.bank_info)
+                    except:
+                        logging.exception(traceback.format_exc())
                 try:
-                    zctrl = self.controllers_dict[symbol]
-                    if "value" in ctrl_state:
-                        zctrl.set_value(ctrl_state["value"], True)
-                    if "midi_cc_momentary_switch" in ctrl_state:
-                        zctrl.midi_cc_momentary_switch = ctrl_state['midi_cc_momentary_switch']
-                except Exception as e:
-                    logging.warning("Invalid controller for processor {}: {}".format(self.get_basepath(), e))
+                    self.load_preset_list()
+                except:
+                    pass
+
+                if "preset_info" in state:
+                    try:
+                        self.set_preset_by_id(state["preset_info"][0], force_set_engine=False)
+                    except:
+                        # Legacy snapshots without preset_info
+                        self.set_preset(state["preset_info"], force_set_engine=False)
+
+        with zynloadprof.phase("controller_restore"):
+            # Set controller values
+            if "controllers" in state:
+                if pending_zctrls is None:
+                    zctrls_by_engine = {}
+                else:
+                    zctrls_by_engine = pending_zctrls
+                for symbol, ctrl_state in state["controllers"].items():
+                    try:
+                        zctrl = self.controllers_dict[symbol]
+                        if "value" in ctrl_state:
+                            old_value = zctrl.value
+                            zctrl.set_value(ctrl_state["value"], False)
+                            if zctrl.value != old_value and zctrl.engine:
+                                if zctrl.engine in zctrls_by_engine:
+                                    zctrls_by_engine[zctrl.engine].append(zctrl)
+                                else:
+                                    zctrls_by_engine[zctrl.engine] = [zctrl]
+                        if "midi_cc_momentary_switch" in ctrl_state:
+                            zctrl.midi_cc_momentary_switch = ctrl_state['midi_cc_momentary_switch']
+                    except Exception as e:
+                        logging.warning("Invalid controller for processor {}: {}".format(self.get_basepath(), e))
+                if pending_zctrls is None:
+                    for engine, zctrls in zctrls_by_engine.items():
+                        engine.send_controller_values(zctrls)
+
+    def is_state_preset_loaded(self, state):
+        """Check if bank & preset from state are already loaded
+
+        state : Processor state
+        Returns : True if bank & preset don't need to be set
+        """
+
+        if not self.preset_info or self.preload_info or not state.get("preset_info"):
+            return False
+        if state.get("bank_info") and state["bank_info"] != self.bank_info:
+            return False
+        return self.engine.cmp_presets(state["preset_info"], self.preset_info)
 
     def restore_state_legacy(self, state):
         """Restore legacy states from state
@@ -0,0 +1,346 @@
+# -*- coding: utf-8 -*-
+# ****************************************************************************
+# ZYNTHIAN PROJECT: Zynthian Scheduler (zynthian_scheduler)
+#
+# Run periodic and one-shot background tasks from a few timer threads
+#
+# Copyright (C) 2015-2024 Fernando Moyano <jofemodo@zynthian.org>
+#
+# ****************************************************************************
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License as
+# published by the Free Software Foundation; either version 2 of
+# the License, or any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# For a full copy of the GNU General Public License see the LICENSE.txt file.
+#
+# ****************************************************************************
+
+import os
+import logging
+import traceback
+from time import monotonic
+from heapq import heappush, heappop
+from itertools import count
+from threading import Thread, Condition, get_ident
+
+from zyngine.zynthian_signal_manager import zynthian_signal_histogram
+
+# ----------------------------------------------------------------------------
+# Scheduled task
+# ----------------------------------------------------------------------------
+
+
+class zynthian_scheduler_task:
+
+    def __init__(self, scheduler, lane, name, callback, args, kwargs, interval):
+        self.scheduler = scheduler
+        self.lane = lane
+        self.name = name
+        self.callback = callback
+        self.args = args
+        self.kwargs = kwargs
+        self.interval = interval  # Period in seconds, None for one-shot tasks
+        self.deadline = None  # Next execution time (monotonic)
+        self.entry_id = 0  # Id of the valid heap entry. Older entries are stale and skipped.
+        self.cancelled = False
+        self.running = False
+
+        # Statistics
+        self.runs = 0
+        self.overruns = 0  # Executions started late or lasting longer than the period
+        self.skipped = 0  # Periods skipped because the task couldn't keep up
+        self.late = zynthian_signal_histogram(zynthian_signal_histogram.TIME_BOUNDS)  # Start delay (us)
+        self.exec = zynthian_signal_histogram(zynthian_signal_histogram.TIME_BOUNDS)  # Execution time (us)
+
+    def cancel(self, wait=False):
+        self.scheduler.cancel(self, wait)
+
+    def reschedule(self, delay=None, interval=None):
+        self.scheduler.reschedule(self, delay, interval)
+
+    def is_active(self):
+        return not self.cancelled
+
+    def get_stats(self):
+        return {
+            "name": self.name,
+            "lane": self.scheduler.lane_names[self.lane],
+            "interval": self.interval,
+            "runs": self.runs,
+            "overruns": self.overruns,
+            "skipped": self.skipped,
+            "late": self.late.get_state(),
+            "exec": self.exec.get_state()
+        }
+
+# ----------------------------------------------------------------------------
+# Zynthian Scheduler Class
+# ----------------------------------------------------------------------------
+
+
+class zynthian_scheduler:
+
+    # Lanes => each lane has its own heap & timer thread, so slow tasks (i.e. autoconnect) don't delay fast ones.
+    LANE_HIGH = 0  # Short, latency sensitive tasks (i.e. reading switches)
+    LANE_NORMAL = 1  # UI refresh, status & device timers
+    LANE_LOW = 2  # Slow tasks that may block (i.e. port autoconnect, update checks)
+
+    num_lanes = 3
+    lane_names = ["HIGH", "NORMAL", "LOW"]
+
+    def __init__(self):
+        """Create an instance of a scheduler
+
+        Tasks are kept in a heap ordered by deadline. Each lane's thread sleeps until the next deadline,
+        or until a task is added, so there are no idle wakeups when nothing is scheduled.
+        """
+
+        self.exit_flag = False
+        # Start delay (in seconds) above which an execution is counted as an overrun
+        self.overrun_tolerance = float(os.environ.get('ZYNTHIAN_SCHEDULER_OVERRUN_MS', "20")) / 1000
+        self.heaps = []
+        self.conds = []
+        self.threads = []
+        self.tasks = set()
+        # Shared by all lanes. next() on itertools.count is atomic under the GIL, so no lock is needed.
+        self.entry_ids = count(1)
+        for lane in range(self.num_lanes):
+            self.heaps.append([])
+            self.conds.append(Condition())
+            self.threads.append(None)
+
+    def start(self):
+        self.exit_flag = False
+        for lane in range(self.num_lanes):
+            with self.conds[lane]:
+                if self.heaps[lane]:
+                    self.start_lane_thread(lane)
+
+    def stop(self):
+        """Stop all lane threads. Scheduled tasks are kept and run again after start()"""
+
+        self.exit_flag = True
+        for lane in range(self.num_lanes):
+            with self.conds[lane]:
+                self.conds[lane].notify_all()
+            thread = self.threads[lane]
+            if thread and thread.is_alive() and thread.ident != get_ident():
+                thread.join()
+            self.threads[lane] = None
+
+    def is_running(self):
+        for thread in self.threads:
+            if thread and thread.is_alive():
+                return True
+        return False
+
+    # ----------------------------------------------------------------------------
+    # Task management
+    # ----------------------------------------------------------------------------
+
+    def add_periodic(self, interval, callback, name=None, lane=LANE_NORMAL, delay=None, args=(), kwargs=None):
+        """Add a task to be called every "interval" seconds
+
+        interval : Time in seconds between calls
+        callback : Function to call
+        name : Task name, used for statistics (default: callback qualname)
+        lane : Scheduler lane
+        delay : Time in seconds until first call (default: interval)
+        args : Positional arguments for callback
+        kwargs : Keyword arguments for callback
+        Returns : Task object
+        """
+
+        if delay is None:
+            delay = interval
+        return self.add_task(lane, name, callback, args, kwargs, interval, delay)
+
+    def add_oneshot(self, delay, callback, name=None, lane=LANE_NORMAL, args=(), kwargs=None):
+        """Add a task to be called once after "delay" seconds
+
+        delay : Time in seconds until call
+        callback : Function to call
+        name : Task name, used for statistics (default: callback qualname)
+        lane : Scheduler lane
+        args : Positional arguments for callback
+        kwargs : Keyword arguments for callback
+        Returns : Task object
+        """
+
+        return self.add_task(lane, name, callback, args, kwargs, None, delay)
+
+    def add_task(self, lane, name, callback, args, kwargs, interval, delay):
+        if name is None:
+            name = getattr(callback, "__qualname__", None) or repr(callback)
+        task = zynthian_scheduler_task(self, lane, name, callback, args, kwargs or {}, interval)
+        with self.conds[lane]:
+            self.tasks.add(task)
+            self.push_task(task, monotonic() + delay)
+            self.start_lane_thread(lane)
+        return task
+
+    def reschedule(self, task, delay=None, interval=None):
+        """Change next execution time and/or period of a task
+
+        task : Task object
+        delay : Time in seconds until next call (default: keep current deadline)
+        interval : New period in seconds for periodic tasks (default: keep current period)
+        """
+
+        with self.conds[task.lane]:
+            if task.cancelled:
+                return
+            if interval is not None and task.interval is not None:
+                task.interval = interval
+            if delay is not None:
+                # Previous heap entry gets stale
+                self.push_task(task, monotonic() + delay)
+
+    def cancel(self, task, wait=False):
+        """Cancel a task
+
+        task : Task object
+        wait : True to wait until current execution (if any) finishes
+        """
+
+        cond = self.conds[task.lane]
+        with cond:
+            task.cancelled = True
+            self.tasks.discard(task)
+            cond.notify_all()
+            if wait:
+                thread = self.threads[task.lane]
+                if thread is None or thread.ident != get_ident():
+                    while task.running:
+                        cond.wait()
+
+    def push_task(self, task, deadline):
+        """Push task into its lane's heap. It must be called holding the lane's lock."""
+
+        entry_id = next(self.entry_ids)
+        task.deadline = deadline
+        task.entry_id = entry_id
+        heap = self.heaps[task.lane]
+        heappush(heap, (deadline, entry_id, task))
+        # Wake thread if the new deadline is the next one
+        if heap[0][1] == entry_id:
+            self.conds[task.lane].notify_all()
+
+    # ----------------------------------------------------------------------------
+    # Lane threads
+    # ----------------------------------------------------------------------------
+
+    def start_lane_thread(self, lane):
+        """Start lane thread if not running. It must be called holding the lane's lock."""
+
+        if self.exit_flag:
+            return
+        thread = self.threads[lane]
+        if thread and thread.is_alive():
+            return
+        thread = Thread(target=self.lane_thread_task, args=(lane,))
+        thread.name = f"SCHEDULER_{self.lane_names[lane]}"
+        thread.daemon = True  # thread dies with the program
+        self.threads[lane] = thread
+        thread.start()
+
+    def lane_thread_task(self, lane):
+        heap = self.heaps[lane]
+        cond = self.conds[lane]
+        while True:
+            with cond:
+                task = None
+                while not self.exit_flag:
+                    if not heap:
+                        cond.wait()
+                        continue
+                    deadline, entry_id, task = heap[0]
+                    if task.cancelled or entry_id != task.entry_id:
+                        # Stale entry
+                        heappop(heap)
+                        task = None
+                        continue
+                    now = monotonic()
+                    if deadline > now:
+                        cond.wait(deadline - now)
+                        task = None
+                        continue
+                    heappop(heap)
+                    task.running = True
+                    break
+                if self.exit_flag:
+                    return
+
+            self.run_task(task, deadline, now)
+
+            with cond:
+                task.running = False
+                if task.interval is not None and not task.cancelled:
+                    if task.entry_id == entry_id:
+                        # Next deadline is based on the previous one, so period doesn't drift
+                        next_deadline = task.deadline + task.interval
+                        now = monotonic()
+                        if next_deadline <= now:
+                            # Can't keep up => skip missed periods
+                            skipped = int((now - next_deadline) / task.interval) + 1
+                            task.skipped += skipped
+                            next_deadline += skipped * task.interval
+                        self.push_task(task, next_deadline)
+                elif task.entry_id == entry_id:
+                    # One-shot task done
+                    task.cancelled = True
+                    self.tasks.discard(task)
+                cond.notify_all()
+
+    def run_task(self, task, deadline, now):
+        late = now - deadline
+        try:
+            task.callback(*task.args, **task.kwargs)
+        except Exception as e:
+            logging.error(f"Scheduled task '{task.name}': {e}")
+            logging.exception(traceback.format_exc())
+        dt = monotonic() - now
+        task.runs += 1
+        task.late.add(int(1000000 * late))
+        task.exec.add(int(1000000 * dt))
+        if late > self.overrun_tolerance or (task.interval and dt > task.interval):
+            task.overruns += 1
+
+    # ----------------------------------------------------------------------------
+    # Instrumentation
+    # ----------------------------------------------------------------------------
+
+    def get_stats(self):
+        """Get per-task statistics
+
+        Returns : List of dictionaries with run & overrun counts, and start delay & execution time histograms (us)
+        """
+
+        return [task.get_stats() for task in sorted(list(self.tasks), key=lambda t: (t.lane, t.name))]
+
+    def get_stats_report(self):
+        """Get a text report of scheduled tasks
+
+        Returns : List of text lines
+        """
+
+        lines = []
+        for data in self.get_stats():
+            period = f"{1000 * data['interval']:.0f}ms" if data['interval'] else "oneshot"
+            line = f"{data['lane']} {data['name']} ({period}): n={data['runs']} overruns={data['overruns']} skipped={data['skipped']}"
+            line += f" late p95={data['late']['p95']}us max={data['late']['max']}us"
+            line += f" exec mean={data['exec']['mean']:.0f}us p95={data['exec']['p95']}us max={data['exec']['max']}us"
+            lines.append(line)
+        return lines
+
+# ---------------------------------------------------------------------------
+
+global zynsched
+zynsched = zynthian_scheduler()  # Instance scheduler
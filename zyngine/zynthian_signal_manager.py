@@ -22,10 +22,73 @@
 #
 # ****************************************************************************
 
+import os
 import logging
 import traceback
+from bisect import bisect_left
+from time import monotonic
 from queue import SimpleQueue
-from threading import Thread
+from weakref import WeakMethod
+from threading import Thread, Lock, RLock
+
+# ----------------------------------------------------------------------------
+# Histogram for signal manager statistics
+# ----------------------------------------------------------------------------
+
+
+class zynthian_signal_histogram:
+
+    # Bucket upper limits for time values (in microseconds)
+    TIME_BOUNDS = (10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000, 20000, 50000, 100000, 200000, 500000, 1000000)
+    # Bucket upper limits for queue depth values
+    DEPTH_BOUNDS = (0, 1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024)
+
+    def __init__(self, bounds):
+        self.bounds = bounds
+        self.buckets = [0] * (len(bounds) + 1)  # Last bucket => overflow
+        self.count = 0
+        self.total = 0
+        self.max = 0
+
+    def add(self, value):
+        self.buckets[bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.total += value
+        if value > self.max:
+            self.max = value
+
+    def get_mean(self):
+        if self.count:
+            return self.total / self.count
+        return 0
+
+    def get_percentile(self, pc):
+        """Get approximated percentile value (bucket upper limit)
+
+        pc : Percentile (0..100)
+        Returns : Upper limit of the bucket containing the percentile. Max value for the overflow bucket.
+        """
+
+        limit = self.count * pc / 100
+        n = 0
+        for i, count in enumerate(self.buckets):
+            n += count
+            if count and n >= limit:
+                if i < len(self.bounds):
+                    return min(self.bounds[i], self.max)
+                break
+        return self.max
+
+    def get_state(self):
+        return {
+            "count": self.count,
+            "mean": self.get_mean(),
+            "p50": self.get_percentile(50),
+            "p95": self.get_percentile(95),
+            "max": self.max,
+            "bounds": list(self.bounds),
+            "buckets": list(self.buckets)
+        }
 
 # ----------------------------------------------------------------------------
 # Zynthian Signal Manager Class
@@ -63,22 +126,61 @@ class zynthian_signal_manager:
     last_signal = 13
     last_subsignal = 10
 
+    # Priority lanes for queued signals. Each lane has its own queue & worker thread.
+    LANE_HIGH = 0
+    LANE_NORMAL = 1
+    LANE_MIDI = 2
+
+    num_lanes = 3
+    lane_names = ["HIGH", "NORMAL", "MIDI"]
+
     def __init__(self):
         """ Create an instance of a signal manager
 
         Manages signaling. Clients register callbacks that are triggered when a given signal is received.
+        Queued callbacks are dispatched by a worker thread per priority lane, so a flood of low priority
+        signals (i.e. MIDI CC) doesn't delay other signals.
         """
 
         self.exit_flag = False
 
+        # Instrumentation
+        self.stats_enabled = int(os.environ.get('ZYNTHIAN_SIGNAL_STATS', "0"))
+        self.handler_budget = float(os.environ.get('ZYNTHIAN_SIGNAL_HANDLER_BUDGET_MS', "0")) / 1000  # Budget in seconds, 0 (default) to disable warnings & timing
+        self.stats_lock = Lock()
+        self.stats_exec = {}  # Callback execution time histograms (us), indexed by (signal, subsignal, callback qualname)
+        self.stats_latency = {}  # Enqueue to dispatch latency histograms (us), indexed by (signal, subsignal, callback qualname)
+        self.stats_depth = []  # Queue depth histograms, one per lane
+
         # List of lists of registered callback functions.
         # Indexes ar signal & subsignal numbers
+        self.register_lock = RLock()
         self.signal_register = None
+        self.callback_index = None
         self.reset_register()
 
-        self.queue = SimpleQueue()
-        self.queue_thread = None
-        self.start_queue_thread()
+        # Default lane for each signal. It can be overridden when registering a callback.
+        self.signal_lane = [self.LANE_NORMAL] * self.last_signal
+        self.signal_lane[self.S_CUIA] = self.LANE_HIGH
+        self.signal_lane[self.S_GUI] = self.LANE_HIGH
+        self.signal_lane[self.S_MIDI] = self.LANE_MIDI
+
+        # Coalescing keys (tuple of argument names) for "latest value wins" signals.
+        # Indexes are signal & subsignal numbers. None => not coalesced.
+        self.coalesce_register = None
+        self.reset_coalesce()
+        self.set_coalesce(self.S_MIDI, self.SS_MIDI_CC, ("izmip", "chan", "num"))
+
+        self.queues = []
+        self.queue_locks = []
+        self.queue_pending = []  # Per lane dictionaries of coalesced kwargs pending dispatch, indexed by coalescing key
+        self.queue_threads = []
+        for lane in range(self.num_lanes):
+            self.queues.append(SimpleQueue())
+            self.queue_locks.append(Lock())
+            self.queue_pending.append({})
+        self.reset_stats()
+        self.start_queue_threads()
 
     def stop(self):
         self.exit_flag = True
@@ -89,56 +191,163 @@ class zynthian_signal_manager:
 
     def reset_register(self):
         #self.signal_register = [[[]] * self.last_subsignal] * self.last_signal
-        self.signal_register = []
-        for i in range(self.last_signal):
-            self.signal_register.append([])
-            for j in range(self.last_subsignal):
-                self.signal_register[i].append([])
+        with self.register_lock:
+            self.signal_register = []
+            for i in range(self.last_signal):
+                self.signal_register.append([])
+                for j in range(self.last_subsignal):
+                    self.signal_register[i].append([])
+            # Reverse index => set of (signal, subsignal) slots, indexed by callback key
+            self.callback_index = {}
 
-    def register(self, signal, subsignal, callback, queued=False):
-        if 0 <= signal <= self.last_signal and 0 <= subsignal <= self.last_subsignal:
+    @staticmethod
+    def get_callback_key(callback):
+        """Get the key identifying a callback in the register.
+
+        Bound methods are created on each attribute access, so they are identified by object & function.
+        """
+
+        try:
+            return id(callback.__self__), callback.__func__
+        except AttributeError:
+            return callback
+
+    def register(self, signal, subsignal, callback, queued=False, lane=None, weak=False):
+        """Register a callback for a signal
+
+        signal : Signal number
+        subsignal : Subsignal number
+        callback : Function to call when signal is received
+        queued : True to call from the lane's worker thread
+        lane : Priority lane for queued calls (Default: signal's default lane)
+        weak : True to hold a weak reference to a bound method callback. It's unregistered when the object is destroyed.
+        """
+
+        if 0 <= signal < self.last_signal and 0 <= subsignal < self.last_subsignal:
             #logging.debug(f"Registering callback '{callback.__name__}()' for signal({signal},{subsignal})")
-            self.signal_register[signal][subsignal].append((callback, queued))
+            if lane is None:
+                lane = self.signal_lane[signal]
+            key = self.get_callback_key(callback)
+            if weak and hasattr(callback, "__self__"):
+                rdata = (None, queued, lane, WeakMethod(callback, lambda ref: self.unregister_key(key)), key)
+            else:
+                rdata = (callback, queued, lane, None, key)
+            with self.register_lock:
+                # Copy on write => lists can be iterated by process_signal without locking
+                self.signal_register[signal][subsignal] = self.signal_register[signal][subsignal] + [rdata]
+                try:
+                    self.callback_index[key].add((signal, subsignal))
+                except KeyError:
+                    self.callback_index[key] = {(signal, subsignal)}
+
+    def register_queued(self, signal, subsignal, callback, lane=None, weak=False):
+        self.register(signal, subsignal, callback, True, lane, weak)
+
+    def remove_slot_key(self, signal, subsignal, key):
+        """Remove all registrations of a callback key from a signal slot. It must be called holding the register lock.
+
+        Returns : Number of removed registrations
+        """
 
-    def register_queued(self, signal, subsignal, callback):
-        if 0 <= signal <= self.last_signal and 0 <= subsignal <= self.last_subsignal:
-            #logging.debug(f"Registering queued callback '{callback.__name__}()' for signal({signal},{subsignal})")
-            self.signal_register[signal][subsignal].append((callback, True))
+        slot = self.signal_register[signal][subsignal]
+        new_slot = [rdata for rdata in slot if rdata[4] != key]
+        self.signal_register[signal][subsignal] = new_slot
+        return len(slot) - len(new_slot)
 
     def unregister(self, signal, subsignal, callback):
-        if 0 <= signal <= self.last_signal and 0 <= subsignal <= self.last_subsignal:
+        if 0 <= signal < self.last_signal and 0 <= subsignal < self.last_subsignal:
             #logging.debug(f"Unregistering callback '{callback.__name__}()' from signal({signal},{subsignal})")
+            key = self.get_callback_key(callback)
             n = 0
-            for k, rdata in enumerate(self.signal_register[signal][subsignal]):
-                if rdata[0] == callback:
-                    del self.signal_register[signal][subsignal][k]
-                    n += 1
+            with self.register_lock:
+                slots = self.callback_index.get(key)
+                if slots and (signal, subsignal) in slots:
+                    n = self.remove_slot_key(signal, subsignal, key)
+                    slots.discard((signal, subsignal))
+                    if not slots:
+                        del self.callback_index[key]
             if n == 0:
                 logging.warning(f"Callback not registered for signal({signal},{subsignal})")
 
     def unregister_all(self, callback):
+        if self.unregister_key(self.get_callback_key(callback)) == 0:
+            logging.warning(f"Callback not registered")
+
+    def unregister_key(self, key):
+        """Remove all registrations of a callback key
+
+        key : Callback key, as returned by get_callback_key
+        Returns : Number of removed registrations
+        """
+
         n = 0
+        with self.register_lock:
+            for signal, subsignal in self.callback_index.pop(key, ()):
+                n += self.remove_slot_key(signal, subsignal, key)
+        return n
+
+    # ----------------------------------------------------------------------------
+    # Signal coalescing
+    # ----------------------------------------------------------------------------
+
+    def reset_coalesce(self):
+        self.coalesce_register = []
         for i in range(self.last_signal):
-            for j in range(self.last_subsignal):
-                for k, rdata in enumerate(self.signal_register[i][j]):
-                    if rdata[0] == callback:
-                        del self.signal_register[i][j][k]
-                        n += 1
-        if n == 0:
-            logging.warning(f"Callback not registered")
+            self.coalesce_register.append([None] * self.last_subsignal)
+
+    def set_coalesce(self, signal, subsignal, keys):
+        """Enable "latest value wins" coalescing for a queued signal
+
+        While a queued call is pending dispatch, newer signals with the same values for the key arguments
+        replace its arguments instead of being queued.
+
+        signal : Signal number
+        subsignal : Subsignal number
+        keys : Tuple of argument names identifying the signal source, None to disable coalescing
+        """
+
+        if 0 <= signal < self.last_signal and 0 <= subsignal < self.last_subsignal:
+            if keys is not None:
+                keys = tuple(keys)
+            self.coalesce_register[signal][subsignal] = keys
+
+    def set_signal_lane(self, signal, lane):
+        """Set default priority lane for a signal. It affects callbacks registered after calling it.
+
+        signal : Signal number
+        lane : Priority lane
+        """
+
+        if 0 <= signal < self.last_signal and 0 <= lane < self.num_lanes:
+            self.signal_lane[signal] = lane
+
+    # ----------------------------------------------------------------------------
+    # Signal processing
+    # ----------------------------------------------------------------------------
 
     def process_signal(self, force_queued, signal, subsignal, **kwargs):
-        if 0 <= signal <= self.last_signal and 0 <= subsignal <= self.last_subsignal:
+        if 0 <= signal < self.last_signal and 0 <= subsignal < self.last_subsignal:
             #logging.debug(f"Signal({signal},{subsignal}): {kwargs}")
             for rdata in self.signal_register[signal][subsignal]:
+                callback = rdata[0]
+                if callback is None:
+                    # Weak reference
+                    callback = rdata[3]()
+                    if callback is None:
+                        continue
                 if force_queued == 1 or rdata[1]:
-                    self.queue.put_nowait((signal, subsignal, rdata[0], kwargs))
+                    self.enqueue(rdata[2], signal, subsignal, callback, kwargs)
                 else:
                     try:
-                        #logging.debug(f"  => calling {rdata[0].__name__}(...)")
-                        rdata[0](**kwargs)
+                        #logging.debug(f"  => calling {callback.__name__}(...)")
+                        if self.stats_enabled or self.handler_budget:
+                            ts = monotonic()
+                            callback(**kwargs)
+                            self.record_exec_time(signal, subsignal, callback, monotonic() - ts)
+                        else:
+                            callback(**kwargs)
                     except Exception as e:
-                        logging.error(f"Callback '{rdata[0].__name__}(...)' for signal({signal},{subsignal}): {e}")
+                        logging.error(f"Callback '{callback.__name__}(...)' for signal({signal},{subsignal}): {e}")
                         logging.exception(traceback.format_exc())
 
     def send(self, signal, subsignal, **kwargs):
@@ -155,25 +364,180 @@ class zynthian_signal_manager:
     # Queued signal handling
     # ----------------------------------------------------------------------------
 
-    def start_queue_thread(self):
-        self.queue_thread = Thread(target=self.queue_thread_task, args=())
-        self.queue_thread.name = "SIGNAL_QUEUE"
-        self.queue_thread.daemon = True  # thread dies with the program
-        self.queue_thread.start()
+    def enqueue(self, lane, signal, subsignal, callback, kwargs):
+        """Add a callback call to a lane's queue, coalescing it if configured
+
+        lane : Priority lane
+        signal : Signal number
+        subsignal : Subsignal number
+        callback : Registered callback function
+        kwargs : Dictionary with callback arguments
+        """
+
+        if self.stats_enabled:
+            ts = monotonic()
+            self.stats_depth[lane].add(self.queues[lane].qsize())
+        else:
+            ts = None
+        keys = self.coalesce_register[signal][subsignal]
+        if keys is None:
+            self.queues[lane].put_nowait((signal, subsignal, callback, kwargs, None, ts))
+            return
+        ckey = (signal, subsignal, callback, tuple(kwargs.get(k) for k in keys))
+        with self.queue_locks[lane]:
+            pending = self.queue_pending[lane]
+            if ckey in pending:
+                pending[ckey] = kwargs
+                return
+            pending[ckey] = kwargs
+        self.queues[lane].put_nowait((signal, subsignal, callback, None, ckey, ts))
+
+    def start_queue_threads(self):
+        self.queue_threads = []
+        for lane in range(self.num_lanes):
+            thread = Thread(target=self.queue_thread_task, args=(lane,))
+            thread.name = f"SIGNAL_QUEUE_{self.lane_names[lane]}"
+            thread.daemon = True  # thread dies with the program
+            thread.start()
+            self.queue_threads.append(thread)
 
-    def queue_thread_task(self):
+    def queue_thread_task(self, lane):
+        queue = self.queues[lane]
+        lock = self.queue_locks[lane]
+        pending = self.queue_pending[lane]
         while not self.exit_flag:
             try:
-                data = self.queue.get(True, 1)
+                data = queue.get(True, 1)
             except:
                 continue
             try:
+                if data[4] is None:
+                    kwargs = data[3]
+                else:
+                    # Coalesced => get latest arguments
+                    with lock:
+                        kwargs = pending.pop(data[4])
                 # logging.debug(f"  => calling {data[2].__name__}(...)")
-                data[2](**data[3])
+                if self.stats_enabled or self.handler_budget:
+                    ts = monotonic()
+                    if data[5] is not None:
+                        self.record_latency(data[0], data[1], data[2], ts - data[5])
+                    data[2](**kwargs)
+                    self.record_exec_time(data[0], data[1], data[2], monotonic() - ts)
+                else:
+                    data[2](**kwargs)
             except Exception as e:
                 logging.error(f"Queued callback '{data[2].__name__}(...)' for signal({data[0]},{data[1]}): {e}")
                 logging.exception(traceback.format_exc())
 
+    # ----------------------------------------------------------------------------
+    # Instrumentation
+    # ----------------------------------------------------------------------------
+
+    def enable_stats(self, enable=True):
+        """Enable/disable statistics recording
+
+        enable : True to record queue depth, dispatch latency & execution time
+        """
+
+        self.stats_enabled = enable
+
+    def set_handler_budget(self, budget_ms):
+        """Set execution time budget for callbacks. Slower callbacks are reported with a warning.
+
+        budget_ms : Budget in milliseconds, 0 to disable warnings. Callbacks are only timed if stats or budget are enabled.
+        """
+
+        self.handler_budget = budget_ms / 1000
+
+    def reset_stats(self):
+        with self.stats_lock:
+            self.stats_exec = {}
+            self.stats_latency = {}
+            self.stats_depth = [zynthian_signal_histogram(zynthian_signal_histogram.DEPTH_BOUNDS) for lane in range(self.num_lanes)]
+
+    @staticmethod
+    def get_callback_name(callback):
+        return getattr(callback, "__qualname__", None) or repr(callback)
+
+    def record_exec_time(self, signal, subsignal, callback, dt):
+        if self.handler_budget and dt > self.handler_budget:
+            logging.warning(f"Slow callback '{self.get_callback_name(callback)}(...)' for signal({signal},{subsignal}) => {1000 * dt:.1f}ms")
+        if self.stats_enabled:
+            key = (signal, subsignal, self.get_callback_name(callback))
+            with self.stats_lock:
+                try:
+                    hist = self.stats_exec[key]
+                except KeyError:
+                    hist = self.stats_exec[key] = zynthian_signal_histogram(zynthian_signal_histogram.TIME_BOUNDS)
+                hist.add(int(1000000 * dt))
+
+    def record_latency(self, signal, subsignal, callback, dt):
+        key = (signal, subsignal, self.get_callback_name(callback))
+        with self.stats_lock:
+            try:
+                hist = self.stats_latency[key]
+            except KeyError:
+                hist = self.stats_latency[key] = zynthian_signal_histogram(zynthian_signal_histogram.TIME_BOUNDS)
+            hist.add(int(1000000 * dt))
+
+    def get_stats(self):
+        """Get recorded statistics
+
+        Returns : Dictionary with queue depth histograms per lane and latency & execution time histograms
+                  per (signal, subsignal, callback qualname). Time values are in microseconds.
+        """
+
+        with self.stats_lock:
+            stats = {
+                "enabled": bool(self.stats_enabled),
+                "handler_budget_ms": 1000 * self.handler_budget,
+                "queue_depth": {},
+                "callbacks": []
+            }
+            for lane in range(self.num_lanes):
+                stats["queue_depth"][self.lane_names[lane]] = {
+                    "current": self.queues[lane].qsize(),
+                    **self.stats_depth[lane].get_state()
+                }
+            for key in sorted(set(self.stats_exec) | set(self.stats_latency)):
+                data = {
+                    "signal": key[0],
+                    "subsignal": key[1],
+                    "callback": key[2],
+                    "exec": None,
+                    "latency": None
+                }
+                if key in self.stats_exec:
+                    data["exec"] = self.stats_exec[key].get_state()
+                if key in self.stats_latency:
+                    data["latency"] = self.stats_latency[key].get_state()
+                stats["callbacks"].append(data)
+        return stats
+
+    def get_stats_report(self, limit=20):
+        """Get a text report of the slowest callbacks
+
+        limit : Max number of callbacks to report
+        Returns : List of text lines
+        """
+
+        stats = self.get_stats()
+        lines = []
+        for lane, depth in stats["queue_depth"].items():
+            lines.append(f"Queue {lane}: depth={depth['current']}, max={depth['max']}, mean={depth['mean']:.1f}")
+        callbacks = sorted(stats["callbacks"], key=lambda data: data["exec"]["max"] if data["exec"] else 0, reverse=True)
+        for data in callbacks[:limit]:
+            line = f"Signal({data['signal']},{data['subsignal']}) {data['callback']}:"
+            if data["exec"]:
+                ex = data["exec"]
+                line += f" exec n={ex['count']} mean={ex['mean']:.0f}us p95={ex['p95']}us max={ex['max']}us"
+            if data["latency"]:
+                lat = data["latency"]
+                line += f" latency mean={lat['mean']:.0f}us p95={lat['p95']}us max={lat['max']}us"
+            lines.append(line)
+        return lines
+
 # ---------------------------------------------------------------------------
 
 global zynsigman
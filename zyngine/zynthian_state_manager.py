@@ -23,6 +23,7 @@
 #
 # ****************************************************************************
 
+import sys
 import base64
 import ctypes
 import logging
@@ -50,6 +51,9 @@ from zyngine.zynthian_chain_manager import *
 from zyngine.zynthian_processor import zynthian_processor 
 from zyngine.zynthian_audio_recorder import zynthian_audio_recorder
 from zyngine.zynthian_signal_manager import zynsigman
+from zyngine.zynthian_scheduler import zynsched
+from zyngine.zynthian_load_profiler import zynloadprof
+from zyngine.zynthian_midi_notifier import zynthian_midi_notifier
 from zyngine import zynthian_legacy_snapshot
 from zyngine import zynthian_engine_audio_mixer
 from zyngine import zynthian_midi_filter
@@ -155,7 +159,7 @@ class zynthian_state_manager:
         self.audio_player = None
         self.aubio_in = [1, 2]  # List of aubio inputs
 
-        self.slow_update_callbacks = [] # List of lists [rate, cb, schedule] for registered regularly repeating callbacks
+        self.slow_update_callbacks = {}  # Scheduler tasks for registered regularly repeating callbacks, indexed by callback
 
         # Initialize SMF MIDI recorder and player
         try:
@@ -170,12 +174,43 @@ class zynthian_state_manager:
         except Exception as e:
             logging.error(e)
 
+        # Get SMF player & recorder state changes from callback. If not available, state is polled.
+        self.smf_cb_enabled = zynsmf.set_state_cb(self.cb_smf_state)
+        if not self.smf_cb_enabled:
+            logging.warning("zynsmf library doesn't support state callback. Polling state.")
+
         # Initialize internal MIDI sender
         self.zynmidi = zynthian_zcmidi()
 
+        # Preallocated zynmidi read buffer
+        self.zynmidi_buffer_size = 1024
+        self.zynmidi_buffer = (ctypes.c_uint32 * self.zynmidi_buffer_size)()
+        # Offsets of izmip, status, data1 & data2 bytes inside each packed 32 bit word
+        if sys.byteorder == "little":
+            self.zynmidi_byte_offsets = (3, 2, 1, 0)
+        else:
+            self.zynmidi_byte_offsets = (0, 1, 2, 3)
+        self.zynmidi_sysex = None  # (izmip, data) of SysEx message being read
+        self.zynmidi_sysex_max_size = 65536
+        self.zynmidi_held_cc = {}  # CC values held by CC thinning, indexed by (izmip, status, ccnum)
+        self.zynmidi_held_cc_deadline = None
+
+        # MIDI dispatch tables, compiled from MIDI profile
+        self.midi_dispatch = None
+        self.midi_master_actions = None
+        self.midi_master_handlers = None
+        self.midi_master_note_cuia = None
+        self.midi_thin_status = None
+        self.init_midi_dispatcher()
+
         self.exit_flag = False
-        self.slow_thread = None
+        self.slow_task = None
+        self.slow_status_counter = 0
+        self.slow_xrun_status = False
+        self.slow_midi_status = False
+        self.slow_midi_clock_status = False
         self.fast_thread = None
+        self.midi_notifier = None
         self.start()
 
         self.end_busy("zynthian_state_manager")
@@ -227,11 +262,14 @@ class zynthian_state_manager:
         self.chain_manager.add_chain(0)
 
         self.exit_flag = False
-        self.slow_thread = Thread(target=self.slow_thread_task)
-        self.slow_thread.name = "Status Manager Slow"
-        self.slow_thread.daemon = True  # thread dies with the program
-        self.slow_thread.start()
-
+        self.slow_status_counter = 0
+        self.slow_xrun_status = self.status_xrun
+        self.slow_midi_status = self.status_midi
+        self.slow_midi_clock_status = self.status_midi_clock
+        self.slow_task = zynsched.add_periodic(0.2, self.slow_update, name="state_manager.slow_update")
+        self.add_slow_update_callback(3600, self.check_for_updates, 2)
+
+        self.midi_notifier = zynthian_midi_notifier(lib_zyncore)
         self.fast_thread = Thread(target=self.fast_thread_task)
         self.fast_thread.name = "Status Manager Fast"
         self.fast_thread.daemon = True  # thread dies with the program
@@ -249,17 +287,24 @@ class zynthian_state_manager:
         zynsigman.unregister(zynsigman.S_AUDIO_PLAYER, self.SS_AUDIO_PLAYER_STATE, self.cb_status_audio_player)
 
         self.exit_flag = True
+        if self.midi_notifier:
+            self.midi_notifier.close()
         if self.fast_thread and self.fast_thread.is_alive():
             self.fast_thread.join()
         self.fast_thread = None
-        if self.slow_thread and self.slow_thread.is_alive():
-            self.slow_thread.join()
-        self.slow_thread = None
+        if self.midi_notifier:
+            self.midi_notifier.release()
+            self.midi_notifier = None
+        if self.slow_task:
+            self.slow_task.cancel(wait=True)
+            self.slow_task = None
+        self.remove_slow_update_callback(self.check_for_updates)
 
         self.last_snapshot_fpath = ""
         self.zynseq.transport_stop("ALL")
         zynautoconnect.pause()
         self.chain_manager.remove_all_chains(True)
+        self.chain_manager.engine_pool.clear()
         self.reset_zs3()
         self.zynseq.load("")
         self.ctrldev_manager.unload_all_drivers()
@@ -500,6 +545,27 @@ class zynthian_state_manager:
         self.busy_details = None
         return res
 
+    def generate_presets_cache(self, force=False):
+        """Generate LV2 presets cache of changed plugins, showing progress on busy details
+
+        force : True to regenerate the cache of all plugins
+        """
+
+        self.start_busy("presets_cache", "Generating LV2 presets cache")
+        # Run it in a separate process, so the UI doesn't fork workers or keep a lilv world loaded
+        cmd = [sys.executable, zynthian_lv2.__file__, "presets"]
+        if force:
+            cmd.append("--force")
+        try:
+            proc = Popen(cmd, stdout=PIPE, text=True)
+            for line in proc.stdout:
+                self.set_busy_details(line.strip())
+            if proc.wait() != 0:
+                logging.error(f"LV2 presets cache generation failed with code {proc.returncode}")
+        except Exception as e:
+            logging.error(f"Can't generate LV2 presets cache => {e}")
+        self.end_busy("presets_cache")
+
     # ----------------------------------------------------------------------------
     # CUIA Queue
     # ----------------------------------------------------------------------------
@@ -520,122 +586,103 @@ class zynthian_state_manager:
     # Background task threads
     # ------------------------------------------------------------------
 
-    def slow_thread_task(self):
-        """Perform slow / low priority background tasks"""
+    def slow_update(self):
+        """Perform slow / low priority background tasks. It's called from scheduler every 200ms"""
 
-        status_counter = 0
-        xruns_status = self.status_xrun
-        midi_status = self.status_midi
-        midi_clock_status = self.status_midi_clock
-        next_second_check = monotonic() + 2 # Short delay after startup before first slow update
-        self.add_slow_update_callback(3600, self.check_for_updates)
+        # Get CPU Load
+        #self.status_cpu_load = max(psutil.cpu_percent(None, True))
+        self.status_cpu_load = zynautoconnect.get_jackd_cpu_load()
 
-        while not self.exit_flag:
-            # Get CPU Load
-            #self.status_cpu_load = max(psutil.cpu_percent(None, True))
-            self.status_cpu_load = zynautoconnect.get_jackd_cpu_load()
-            now = monotonic()
+        # Get SOC sensors (once each 5 refreshes)
+        if self.slow_status_counter > 5:
+            self.slow_status_counter = 0
 
-            try:
-                # Get SOC sensors (once each 5 refreshes)
-                if status_counter > 5:
-                    status_counter = 0
-
-                    self.status_overtemp = False
-                    self.status_undervoltage = False
-
-                    # RBPi native sensors interface
-                    if self.get_throttled_file:
-                        try:
-                            self.get_throttled_file.seek(0)
-                            thr = int('0x%s' % self.get_throttled_file.read(), 16)
-                            if thr & 0x1:
-                                self.status_undervoltage = True
-                            elif thr & (0x4 | 0x2):
-                                self.status_overtemp = True
-                        except Exception as e:
-                            logging.error(e)
-
-                    # Alternate sensor interface
-                    elif self.hwmon_thermal_file and self.hwmon_undervolt_file:
-                        try:
-                            self.hwmon_thermal_file.seek(0)
-                            res = int(self.hwmon_thermal_file.read())/1000
-                            #logging.debug(f"CPU Temperature => {res}")
-                            if res > self.overtemp_warning:
-                                self.status_overtemp = True
-                        except Exception as e:
-                            logging.error(e)
-
-                        try:
-                            self.hwmon_undervolt_file.seek(0)
-                            res = self.hwmon_undervolt_file.read()
-                            if res == "1":
-                                self.status_undervoltage = True
-                        except Exception as e:
-                            logging.error(e)
+            self.status_overtemp = False
+            self.status_undervoltage = False
 
-                    else:
+            # RBPi native sensors interface
+            if self.get_throttled_file:
+                try:
+                    self.get_throttled_file.seek(0)
+                    thr = int('0x%s' % self.get_throttled_file.read(), 16)
+                    if thr & 0x1:
+                        self.status_undervoltage = True
+                    elif thr & (0x4 | 0x2):
                         self.status_overtemp = True
+                except Exception as e:
+                    logging.error(e)
+
+            # Alternate sensor interface
+            elif self.hwmon_thermal_file and self.hwmon_undervolt_file:
+                try:
+                    self.hwmon_thermal_file.seek(0)
+                    res = int(self.hwmon_thermal_file.read())/1000
+                    #logging.debug(f"CPU Temperature => {res}")
+                    if res > self.overtemp_warning:
+                        self.status_overtemp = True
+                except Exception as e:
+                    logging.error(e)
+
+                try:
+                    self.hwmon_undervolt_file.seek(0)
+                    res = self.hwmon_undervolt_file.read()
+                    if res == "1":
                         self.status_undervoltage = True
+                except Exception as e:
+                    logging.error(e)
 
-                else:
-                    status_counter += 1
-
-                # MIDI Player
-                # TODO: Add callback from MIDI player to avoid polling (and regular access to c-lib)
-                status_midi_player = libsmf.getPlayState()
-                if self.status_midi_player != status_midi_player:
-                    self.status_midi_player = status_midi_player
-                    zynsigman.send(zynsigman.S_STATE_MAN, self.SS_MIDI_PLAYER_STATE, state=status_midi_player)
-
-                # MIDI Recorder
-                # TODO: Add callback from MIDI recorder to avoid polling (and regular access to c-lib)
-                status_midi_recorder = libsmf.isRecording()
-                if self.status_midi_recorder != status_midi_recorder:
-                    self.status_midi_recorder = status_midi_recorder
-                    zynsigman.send(zynsigman.S_STATE_MAN, self.SS_MIDI_RECORDER_STATE, state=status_midi_recorder)
-
-                # Sequencer Status => It must be improved using callbacks
-                self.zynseq.update_state()
-
-                # Clean some status flags
-                if xruns_status:
-                    self.status_xrun = False
-                    xruns_status = False
-                if self.status_xrun:
-                    xruns_status = True
-
-                if midi_status:
-                    self.status_midi = False
-                    midi_status = False
-                if self.status_midi:
-                    midi_status = True
-
-                if midi_clock_status:
-                    self.status_midi_clock = False
-                    midi_clock_status = False
-                if self.status_midi_clock:
-                    midi_clock_status = True
-
-                if self.sync:
-                    self.sync = False
-                    os.sync()
-                
-                if now > next_second_check:
-                    for cb in self.slow_update_callbacks:
-                        if now > cb[2]:
-                            try:
-                                cb[1]()
-                                cb[2] = now + cb[0]
-                            except Exception as e:
-                                logging.error(e)
-                    next_second_check = now + 1
+            else:
+                self.status_overtemp = True
+                self.status_undervoltage = True
 
-            except Exception as e:
-                logging.exception(e)
+        else:
+            self.slow_status_counter += 1
+
+        # MIDI Player & Recorder => Only polled if library doesn't support state callback
+        if not self.smf_cb_enabled:
+            self.cb_smf_state(libsmf.getPlayState(), libsmf.isRecording())
+
+        # Sequencer Status => Only polled if library doesn't support notification callbacks
+        if not self.zynseq.notify_cb_enabled:
+            self.zynseq.update_state()
+
+        # Clean some status flags
+        if self.slow_xrun_status:
+            self.status_xrun = False
+            self.slow_xrun_status = False
+        if self.status_xrun:
+            self.slow_xrun_status = True
+
+        if self.slow_midi_status:
+            self.status_midi = False
+            self.slow_midi_status = False
+        if self.status_midi:
+            self.slow_midi_status = True
+
+        if self.slow_midi_clock_status:
+            self.status_midi_clock = False
+            self.slow_midi_clock_status = False
+        if self.status_midi_clock:
+            self.slow_midi_clock_status = True
+
+        if self.sync:
+            self.sync = False
+            os.sync()
+
+    def cb_smf_state(self, play_state, recording):
+        """Handle SMF player & recorder state changes
+
+        play_state : MIDI player state (zynsmf.PLAY_STATE_*)
+        recording : True if MIDI recorder is recording
+        """
 
-            sleep(0.2)
+        if self.status_midi_player != play_state:
+            self.status_midi_player = play_state
+            zynsigman.send(zynsigman.S_STATE_MAN, self.SS_MIDI_PLAYER_STATE, state=play_state)
+        recording = bool(recording)
+        if self.status_midi_recorder != recording:
+            self.status_midi_recorder = recording
+            zynsigman.send(zynsigman.S_STATE_MAN, self.SS_MIDI_RECORDER_STATE, state=recording)
 
     def cb_status_audio_player(self, handle, state):
         if handle == self.audio_player.handle:
@@ -647,222 +694,385 @@ class zynthian_state_manager:
         while not self.exit_flag:
             # Process MIDI events
             self.zynmidi_read()
-            sleep(0.01)
+            # Wait for MIDI events to be available (or poll interval, if notification not supported by zyncore)
+            # or until held CC events must be dispatched.
+            self.midi_notifier.wait(self.get_zynmidi_timeout())
 
-    def add_slow_update_callback(self, rate, cb):
+    def add_slow_update_callback(self, rate, cb, delay=1):
         """Add a callback to be called every "rate" seconds
-        
+
+        Callbacks are run from the scheduler's low priority lane, so they may block without delaying other tasks.
+
         rate - time in seconds between callbacks
         cb - Callback function
+        delay - time in seconds until first callback
         """
 
         self.remove_slow_update_callback(cb)
-        self.slow_update_callbacks.append([rate, cb, 0])
+        self.slow_update_callbacks[cb] = zynsched.add_periodic(rate, cb, lane=zynsched.LANE_LOW, delay=delay)
 
     def remove_slow_update_callback(self, cb):
-        """Add a callback to be called every "rate" seconds
-        
-        rate - time in seconds between callbacks
+        """Remove a callback added with add_slow_update_callback
+
         cb - Callback function
         """
 
-        for cb in self.slow_update_callbacks:
-            if cb[1] == cb:
-                cb.remove(cb)
-                break
+        task = self.slow_update_callbacks.pop(cb, None)
+        if task:
+            task.cancel()
 
     # ------------------------------------------------------------------
     # MIDI processing
     # ------------------------------------------------------------------
 
     def zynmidi_read(self):
+        """Read MIDI events from zynmidi buffer and dispatch them.
+
+        Events are read in batches into a preallocated buffer. Each packed 32 bit word (izmip, status, data1, data2)
+        is split into byte columns with a single slicing operation per column.
+
+        When CC thinning is enabled, CC events are held and only the last value for each (izmip, chan, cc) is
+        dispatched at the end of the batch (or time window). Held CCs are dispatched before any other event,
+        so ordering relative to notes, program changes, etc. is preserved.
+        """
+
         try:
-            n = lib_zyncore.get_zynmidi_num_pending()
-            if n <= 0:
-                return
-            midi_events = (ctypes.c_uint32 * n)()
-            n = lib_zyncore.read_zynmidi_buffer(midi_events, n)
-            i = 0
-            while i < n:
-                ev = midi_events[i].to_bytes(4, 'big')
-                i += 1
-                izmip = ev[0]
-                evhead = ev[1]
-                ev = ev[1:]
-
-                # Process SysEx
-                if evhead == 0xF0:
-                    #logging.debug(f"RECEIVED SYSEX FROM {izmip}...")
-                    sysex_data = bytearray(ev)
-                    while i < n:
-                        chunk = midi_events[i].to_bytes(4, 'big')
-                        sysex_data.extend(chunk)
-                        if 0xF7 in chunk:
-                            break
-                        i += 1
-                    # This is probably not correct and we should continue reading in the next period
-                    if i == n:
-                        logging.error(f"SysEx message from device {izmip} is not terminated")
+            thin = zynthian_gui_config.midi_cc_thinning
+            thin_status = self.midi_thin_status
+            held = self.zynmidi_held_cc
+            drivers = self.ctrldev_manager.drivers
+            while True:
+                n = lib_zyncore.get_zynmidi_num_pending()
+                if n <= 0:
+                    break
+                n = lib_zyncore.read_zynmidi_buffer(self.zynmidi_buffer, min(n, self.zynmidi_buffer_size))
+                if n <= 0:
+                    break
+                raw = ctypes.string_at(self.zynmidi_buffer, 4 * n)
+                o0, o1, o2, o3 = self.zynmidi_byte_offsets
+                izmips = raw[o0::4]
+                evheads = raw[o1::4]
+                data1s = raw[o2::4]
+                data2s = raw[o3::4]
+
+                i = 0
+                # Continue SysEx message from previous batch
+                if self.zynmidi_sysex:
+                    i = self.zynmidi_read_sysex(raw, i, n)
+                while i < n:
+                    evhead = evheads[i]
+                    if thin:
+                        if thin_status[evhead] and data1s[i] < 120 and izmips[i] not in drivers:
+                            key = (izmips[i], evhead, data1s[i])
+                            held.pop(key, None)
+                            held[key] = data2s[i]
+                            i += 1
+                            continue
+                        if held:
+                            self.zynmidi_flush_cc()
+                    if evhead == 0xF0:
+                        self.zynmidi_sysex = (izmips[i], bytearray((0xF0, data1s[i], data2s[i])))
+                        if 0xF7 in self.zynmidi_sysex[1]:
+                            i = self.zynmidi_end_sysex(i + 1)
+                        else:
+                            i = self.zynmidi_read_sysex(raw, i + 1, n)
                         continue
-                    # Crop data until find the 0xF7 mark
-                    while sysex_data[-1] != 0xF7:
-                        del sysex_data[-1]
-                    #logging.debug(f"  SYSEX DATA => {sysex_data}")
-                    ev = bytes(sysex_data)
-
-                # Try to manage with a control device driver
-                if self.ctrldev_manager.midi_event(izmip, ev):
-                    self.status_midi = True
-                    self.last_event_flag = True
-                    continue
+                    self.zynmidi_process_event(izmips[i], evhead, data1s[i], data2s[i])
+                    i += 1
+
+            if held:
+                if zynthian_gui_config.midi_cc_thinning_ms <= 0 or not thin:
+                    self.zynmidi_flush_cc()
+                elif self.zynmidi_held_cc_deadline is None:
+                    self.zynmidi_held_cc_deadline = monotonic() + zynthian_gui_config.midi_cc_thinning_ms / 1000
+                elif monotonic() >= self.zynmidi_held_cc_deadline:
+                    self.zynmidi_flush_cc()
+        except Exception as err:
+            logging.exception(err)
 
-                evtype = (evhead >> 4) & 0x0F
-                chan = evhead & 0x0F
+    def zynmidi_flush_cc(self):
+        """Dispatch CC events held by CC thinning"""
 
-                #logging.info(f"MIDI EVENT: IZMIP={izmip}, TYPE={evtype}, CHAN={chan}")
+        held = list(self.zynmidi_held_cc.items())
+        self.zynmidi_held_cc.clear()
+        self.zynmidi_held_cc_deadline = None
+        for (izmip, evhead, ccnum), ccval in held:
+            self.zynmidi_process_event(izmip, evhead, ccnum, ccval)
 
-                # System Messages (Common & RT)
-                if evtype == 0xF:
-                    # SysEx
-                    if chan == 0x0:
-                        continue
-                    # Clock
-                    elif chan == 0x8:
-                        self.status_midi_clock = True
-                        continue
-                    # Tick
-                    elif chan == 0x9:
-                        continue
-                    # Active Sense
-                    elif chan == 0xE:
-                        continue
-                    # Reset
-                    elif chan == 0xF:
-                        pass
+    def get_zynmidi_timeout(self):
+        """Get time until held CC events must be dispatched
 
-                # Master MIDI Channel...
-                elif chan == zynthian_gui_config.master_midi_channel:
-                    logging.info(f"MASTER MIDI MESSAGE: {ev.hex()}")
-                    # Webconf configured messages for Snapshot Control...
-                    if ev == zynthian_gui_config.master_midi_program_change_up:
-                        logging.debug("PROGRAM CHANGE UP!")
-                        self.load_snapshot_by_prog(self.snapshot_program + 1)
-                    elif ev == zynthian_gui_config.master_midi_program_change_down:
-                        logging.debug("PROGRAM CHANGE DOWN!")
-                        self.load_snapshot_by_prog(self.snapshot_program - 1)
-                    elif ev == zynthian_gui_config.master_midi_bank_change_up:
-                        logging.debug("BANK CHANGE UP!")
-                        self.set_snapshot_midi_bank(self.snapshot_bank + 1)
-                    elif ev == zynthian_gui_config.master_midi_bank_change_down:
-                        logging.debug("BANK CHANGE DOWN!")
-                        self.set_snapshot_midi_bank(self.snapshot_bank - 1)
-                    # Program Change => Snapshot Load
-                    elif evtype == 0xC:
-                        pgm = ev[1] & 0x7F
-                        logging.debug("PROGRAM CHANGE %d" % pgm)
-                        self.start_busy("load_snapshot", "loading snapshot")
-                        self.load_snapshot_by_prog(pgm)
-                        self.end_busy("load_snapshot")
-                    # Control Change...
-                    elif evtype == 0xB:
-                        ccnum = ev[1] & 0x7F
-                        ccval = ev[2] & 0x7F
-                        if ccnum == zynthian_gui_config.master_midi_bank_change_ccnum:
-                            logging.debug(f"BANK CHANGE {ccval}")
-                            self.set_snapshot_midi_bank(ccval)
-                        elif ccnum == 120:
-                            self.all_sounds_off()
-                        elif ccnum == 123:
-                            self.all_notes_off()
-                        else:
-                            if self.midi_learn_zctrl:
-                                self.chain_manager.add_midi_learn(chan, ccnum, self.midi_learn_zctrl, izmip)
-                            else:
-                                self.zynmixer.midi_control_change(chan, ccnum, ccval)
-                    # Master Note CUIA with ZynSwitch emulation
-                    elif evtype == 0x8 or evtype == 0x9:
-                        note = str(ev[1] & 0x7F)
-                        vel = ev[2] & 0x7F
-                        if note in zynthian_gui_config.master_midi_note_cuia:
-                            cuia_str = zynthian_gui_config.master_midi_note_cuia[note]
-                            parts = cuia_str.split(" ", 2)
-                            cuia = parts[0].lower()
-                            if len(parts) > 1:
-                                params = self.parse_cuia_params(parts[1])
-                            else:
-                                params = None
-                            # Emulate Zynswitch Push/Release with Note On/Off
-                            if cuia == "zynswitch" and len(params) == 1:
-                                if evtype == 0x8 or vel == 0:
-                                    params.append('R')
-                                else:
-                                    params.append('P')
-                                self.cuia_queue.put_nowait((cuia, params))
-                            # Or normal CUIA
-                            elif evtype == 0x9 and vel > 0:
-                                self.cuia_queue.put_nowait((cuia, params))
-
-                # Control Change...
-                elif evtype == 0xB:
-                    ccnum = ev[1] & 0x7F
-                    ccval = ev[2] & 0x7F
-                    #logging.debug("MIDI CONTROL CHANGE: CH{}, CC{} => {}".format(chan, ccnum, ccval))
-                    if ccnum < 120:
-                        if not self.midi_learn_zctrl:
-                            self.chain_manager.midi_control_change(izmip, chan, ccnum, ccval)
-                            self.zynmixer.midi_control_change(chan, ccnum, ccval)
-                            self.alsa_mixer_processor.midi_control_change(chan, ccnum, ccval)
-                            self.audio_player.midi_control_change(chan, ccnum, ccval)
-                        zynsigman.send_queued(zynsigman.S_MIDI, zynsigman.SS_MIDI_CC, izmip=izmip, chan=chan, num=ccnum, val=ccval)
-                    # Special CCs >= Channel Mode
-                    elif ccnum == 120:
-                        self.all_sounds_off_chan(chan)
-                    elif ccnum == 123:
-                        self.all_notes_off_chan(chan)
-
-                # Program Change...
-                elif evtype == 0xC:
-                    pgm = ev[1] & 0x7F
-                    logging.info(f"MIDI PROGRAM CHANGE: CH#{chan}, PRG#{pgm}")
-                    # MIDI learn SubSnapShot (ZS3)
-                    if self.midi_learn_pc is not None:
-                        # When using internal PC, ignore MIDI channel
-                        if izmip == 0xFF:
-                            self.save_zs3(f"*/{pgm}")
-                        else:
-                            self.save_zs3(f"{chan}/{pgm}")
-                        send_signal = True
-                    else:
-                        # select SubSnapShot (ZS3)
-                        if zynthian_gui_config.midi_prog_change_zs3:
-                            # When using internal PC, ignore MIDI channel
-                            if izmip == 0xFF:
-                                send_signal = self.load_zs3(f"*/{pgm}")
-                            else:
-                                send_signal = self.load_zs3(f"{chan}/{pgm}")
-                        # or select preset
-                        else:
-                            # Sends to active chain's MIDI channel when device uses ACTI mode
-                            if zynautoconnect.get_midi_in_dev_mode(izmip):
-                                chan = self.chain_manager.get_active_chain().midi_chan
-                            send_signal = self.chain_manager.set_midi_prog_preset(chan, pgm)
-                    if send_signal:
-                        zynsigman.send_queued(zynsigman.S_MIDI, zynsigman.SS_MIDI_PC, izmip=izmip, chan=chan, num=pgm)
-
-                # Note Off
-                elif evtype == 0x8:
-                    zynsigman.send_queued(zynsigman.S_MIDI, zynsigman.SS_MIDI_NOTE_OFF, izmip=izmip, chan=chan, note=ev[1] & 0x7f, vel=ev[2] & 0x7f)
-
-                # Note On
-                elif evtype == 0x9:
-                    zynsigman.send_queued(zynsigman.S_MIDI, zynsigman.SS_MIDI_NOTE_ON, izmip=izmip, chan=chan, note=ev[1] & 0x7f, vel=ev[2] & 0x7f)
-
-                # Flag MIDI event
+        Returns : Time in seconds or None if there are no held events
+        """
+
+        if self.zynmidi_held_cc_deadline is None:
+            return None
+        return self.zynmidi_held_cc_deadline - monotonic()
+
+    def zynmidi_read_sysex(self, raw, i, n):
+        """Accumulate SysEx data words from a raw zynmidi batch until the 0xF7 mark is found.
+
+        raw : Raw batch data
+        i : Index of next word
+        n : Number of words in batch
+        Returns : Index of next word after SysEx data
+        """
+
+        data = self.zynmidi_sysex[1]
+        while i < n:
+            chunk = raw[4 * i:4 * i + 4]
+            if self.zynmidi_byte_offsets[0]:
+                chunk = chunk[::-1]
+            data.extend(chunk)
+            i += 1
+            if 0xF7 in chunk:
+                return self.zynmidi_end_sysex(i)
+        # Not terminated => continue reading in the next batch
+        if len(data) > self.zynmidi_sysex_max_size:
+            logging.error(f"SysEx message from device {self.zynmidi_sysex[0]} is too long. Discarding!")
+            self.zynmidi_sysex = None
+        return i
+
+    def zynmidi_end_sysex(self, i):
+        """Dispatch completed SysEx message
+
+        i : Index of next word
+        Returns : Index of next word
+        """
+
+        izmip, data = self.zynmidi_sysex
+        self.zynmidi_sysex = None
+        # Crop data until find the 0xF7 mark
+        del data[data.index(0xF7) + 1:]
+        #logging.debug(f"  SYSEX DATA => {data}")
+        self.zynmidi_process_event(izmip, 0xF0, 0, 0, bytes(data))
+        return i
+
+    def zynmidi_process_event(self, izmip, evhead, data1, data2, ev=None):
+        """Process a MIDI event read from zynmidi buffer
+
+        izmip : MIDI input device index
+        evhead : Status byte
+        data1 : First data byte
+        data2 : Second data byte
+        ev : bytes with MIDI message data (None to build it from status & data bytes when needed)
+        """
+
+        # Try to manage with a control device driver
+        if izmip in self.ctrldev_manager.drivers:
+            if ev is None:
+                ev = bytes((evhead, data1, data2))
+            if self.ctrldev_manager.midi_event(izmip, ev):
                 self.status_midi = True
                 self.last_event_flag = True
+                return
 
-        except Exception as err:
-            logging.exception(err)
+        #logging.info(f"MIDI EVENT: IZMIP={izmip}, STATUS={evhead:02X}")
+        handler = self.midi_dispatch[evhead]
+        if handler is None or handler(izmip, evhead, data1, data2):
+            return
+
+        # Flag MIDI event
+        self.status_midi = True
+        self.last_event_flag = True
+
+    # ---------------------------------------------------------------------------
+    # MIDI dispatcher
+    # ---------------------------------------------------------------------------
+
+    def init_midi_dispatcher(self):
+        """Compile MIDI dispatch tables from current MIDI profile
+
+        The dispatch table is indexed by status byte, i.e. (status nibble, channel). Entries are handler functions
+        (izmip, evhead, data1, data2) returning True when the event must not be flagged as MIDI activity, or None
+        for ignored events.
+        """
+
+        master_chan = zynthian_gui_config.master_midi_channel
+
+        # Master channel messages for Snapshot Control, indexed by 24 bit message (status, data1, data2)
+        master_actions = {}
+        for msg, action in ((zynthian_gui_config.master_midi_program_change_up, self.midi_master_program_up),
+                            (zynthian_gui_config.master_midi_program_change_down, self.midi_master_program_down),
+                            (zynthian_gui_config.master_midi_bank_change_up, self.midi_master_bank_up),
+                            (zynthian_gui_config.master_midi_bank_change_down, self.midi_master_bank_down)):
+            if msg is not None and msg not in master_actions:
+                master_actions[msg] = action
+
+        # Master channel note CUIAs, indexed by note number => (cuia, params)
+        master_note_cuia = {}
+        for note, cuia_str in zynthian_gui_config.master_midi_note_cuia.items():
+            try:
+                parts = cuia_str.split(" ", 2)
+                if len(parts) > 1:
+                    params = self.parse_cuia_params(parts[1])
+                else:
+                    params = None
+                master_note_cuia[int(note)] = (parts[0].lower(), params)
+            except Exception as e:
+                logging.warning(f"Wrong master note CUIA '{note}: {cuia_str}' => {e}")
+
+        dispatch = [self.midi_handler_nop] * 256
+        thin_status = bytearray(256)  # Status bytes of CC events that can be thinned
+        for chan in range(16):
+            if chan == master_chan:
+                for evtype in range(0x8, 0xF):
+                    dispatch[(evtype << 4) | chan] = self.midi_handler_master
+            else:
+                dispatch[0x80 | chan] = self.midi_handler_note_off
+                dispatch[0x90 | chan] = self.midi_handler_note_on
+                dispatch[0xB0 | chan] = self.midi_handler_cc
+                dispatch[0xC0 | chan] = self.midi_handler_pc
+                thin_status[0xB0 | chan] = 1
+        # System Messages (Common & RT)
+        dispatch[0xF0] = None  # SysEx
+        dispatch[0xF8] = self.midi_handler_clock  # Clock
+        dispatch[0xF9] = None  # Tick
+        dispatch[0xFE] = None  # Active Sense
+
+        self.midi_thin_status = thin_status
+        self.midi_master_actions = master_actions
+        self.midi_master_note_cuia = master_note_cuia
+        self.midi_master_handlers = {
+            0x8: self.midi_handler_master_note,
+            0x9: self.midi_handler_master_note,
+            0xB: self.midi_handler_master_cc,
+            0xC: self.midi_handler_master_pc
+        }
+        self.midi_dispatch = dispatch
+
+    def midi_handler_nop(self, izmip, evhead, data1, data2):
+        pass
+
+    def midi_handler_clock(self, izmip, evhead, data1, data2):
+        self.status_midi_clock = True
+        return True
+
+    def midi_handler_cc(self, izmip, evhead, data1, data2):
+        chan = evhead & 0x0F
+        ccnum = data1 & 0x7F
+        ccval = data2 & 0x7F
+        #logging.debug("MIDI CONTROL CHANGE: CH{}, CC{} => {}".format(chan, ccnum, ccval))
+        if ccnum < 120:
+            if not self.midi_learn_zctrl:
+                self.chain_manager.midi_control_change(izmip, chan, ccnum, ccval)
+                self.zynmixer.midi_control_change(chan, ccnum, ccval)
+                self.alsa_mixer_processor.midi_control_change(chan, ccnum, ccval)
+                self.audio_player.midi_control_change(chan, ccnum, ccval)
+            zynsigman.send_queued(zynsigman.S_MIDI, zynsigman.SS_MIDI_CC, izmip=izmip, chan=chan, num=ccnum, val=ccval)
+        # Special CCs >= Channel Mode
+        elif ccnum == 120:
+            self.all_sounds_off_chan(chan)
+        elif ccnum == 123:
+            self.all_notes_off_chan(chan)
+
+    def midi_handler_pc(self, izmip, evhead, data1, data2):
+        chan = evhead & 0x0F
+        pgm = data1 & 0x7F
+        logging.info(f"MIDI PROGRAM CHANGE: CH#{chan}, PRG#{pgm}")
+        # MIDI learn SubSnapShot (ZS3)
+        if self.midi_learn_pc is not None:
+            # When using internal PC, ignore MIDI channel
+            if izmip == 0xFF:
+                self.save_zs3(f"*/{pgm}")
+            else:
+                self.save_zs3(f"{chan}/{pgm}")
+            send_signal = True
+        else:
+            # select SubSnapShot (ZS3)
+            if zynthian_gui_config.midi_prog_change_zs3:
+                # When using internal PC, ignore MIDI channel
+                if izmip == 0xFF:
+                    send_signal = self.load_zs3(f"*/{pgm}")
+                else:
+                    send_signal = self.load_zs3(f"{chan}/{pgm}")
+            # or select preset
+            else:
+                # Sends to active chain's MIDI channel when device uses ACTI mode
+                if zynautoconnect.get_midi_in_dev_mode(izmip):
+                    chan = self.chain_manager.get_active_chain().midi_chan
+                send_signal = self.chain_manager.set_midi_prog_preset(chan, pgm)
+        if send_signal:
+            zynsigman.send_queued(zynsigman.S_MIDI, zynsigman.SS_MIDI_PC, izmip=izmip, chan=chan, num=pgm)
+
+    def midi_handler_note_off(self, izmip, evhead, data1, data2):
+        zynsigman.send_queued(zynsigman.S_MIDI, zynsigman.SS_MIDI_NOTE_OFF, izmip=izmip, chan=evhead & 0x0F, note=data1 & 0x7f, vel=data2 & 0x7f)
+
+    def midi_handler_note_on(self, izmip, evhead, data1, data2):
+        zynsigman.send_queued(zynsigman.S_MIDI, zynsigman.SS_MIDI_NOTE_ON, izmip=izmip, chan=evhead & 0x0F, note=data1 & 0x7f, vel=data2 & 0x7f)
+
+    # Master MIDI Channel...
+
+    def midi_handler_master(self, izmip, evhead, data1, data2):
+        logging.info(f"MASTER MIDI MESSAGE: {evhead:02x}{data1:02x}{data2:02x}")
+        # Webconf configured messages for Snapshot Control...
+        action = self.midi_master_actions.get((evhead << 16) | (data1 << 8) | data2)
+        if action:
+            action()
+            return
+        handler = self.midi_master_handlers.get(evhead >> 4)
+        if handler:
+            handler(izmip, evhead, data1, data2)
+
+    def midi_master_program_up(self):
+        logging.debug("PROGRAM CHANGE UP!")
+        self.load_snapshot_by_prog(self.snapshot_program + 1)
+
+    def midi_master_program_down(self):
+        logging.debug("PROGRAM CHANGE DOWN!")
+        self.load_snapshot_by_prog(self.snapshot_program - 1)
+
+    def midi_master_bank_up(self):
+        logging.debug("BANK CHANGE UP!")
+        self.set_snapshot_midi_bank(self.snapshot_bank + 1)
+
+    def midi_master_bank_down(self):
+        logging.debug("BANK CHANGE DOWN!")
+        self.set_snapshot_midi_bank(self.snapshot_bank - 1)
+
+    def midi_handler_master_pc(self, izmip, evhead, data1, data2):
+        # Program Change => Snapshot Load
+        pgm = data1 & 0x7F
+        logging.debug("PROGRAM CHANGE %d" % pgm)
+        self.start_busy("load_snapshot", "loading snapshot")
+        self.load_snapshot_by_prog(pgm)
+        self.end_busy("load_snapshot")
+
+    def midi_handler_master_cc(self, izmip, evhead, data1, data2):
+        ccnum = data1 & 0x7F
+        ccval = data2 & 0x7F
+        if ccnum == zynthian_gui_config.master_midi_bank_change_ccnum:
+            logging.debug(f"BANK CHANGE {ccval}")
+            self.set_snapshot_midi_bank(ccval)
+        elif ccnum == 120:
+            self.all_sounds_off()
+        elif ccnum == 123:
+            self.all_notes_off()
+        else:
+            chan = evhead & 0x0F
+            if self.midi_learn_zctrl:
+                self.chain_manager.add_midi_learn(chan, ccnum, self.midi_learn_zctrl, izmip)
+            else:
+                self.zynmixer.midi_control_change(chan, ccnum, ccval)
+
+    def midi_handler_master_note(self, izmip, evhead, data1, data2):
+        # Master Note CUIA with ZynSwitch emulation
+        try:
+            cuia, params = self.midi_master_note_cuia[data1 & 0x7F]
+        except KeyError:
+            return
+        note_on = (evhead & 0xF0) == 0x90 and (data2 & 0x7F) > 0
+        # Emulate Zynswitch Push/Release with Note On/Off
+        if cuia == "zynswitch" and params and len(params) == 1:
+            if note_on:
+                self.cuia_queue.put_nowait((cuia, params + ['P']))
+            else:
+                self.cuia_queue.put_nowait((cuia, params + ['R']))
+        # Or normal CUIA
+        elif note_on:
+            if params:
+                params = list(params)
+            self.cuia_queue.put_nowait((cuia, params))
 
     # ---------------------------------------------------------------------------
     # Power Saving
@@ -974,6 +1184,7 @@ class zynthian_state_manager:
         self.end_busy("save snapshot")
         return True
 
+    @zynloadprof.timed("snapshot", named=True)
     def load_snapshot(self, fpath, load_chains=True, load_sequences=True):
         """Loads a snapshot from file
         
@@ -985,7 +1196,7 @@ class zynthian_state_manager:
 
         self.start_busy("load snapshot", "loading snapshot")
         try:
-            with open(fpath, "r") as fh:
+            with zynloadprof.phase("file_read"), open(fpath, "r") as fh:
                 json = fh.read()
                 logging.info(f"Loading snapshot '{fpath}' ...")
                 #logging.debug(f"Snapshot JSON Data =>\n{json}")
@@ -996,8 +1207,10 @@ class zynthian_state_manager:
 
         mute = self.zynmixer.get_mute(self.zynmixer.MAX_NUM_CHANNELS - 1)
         try:
-            snapshot = JSONDecoder().decode(json)
-            state = self.fix_snapshot(snapshot)
+            with zynloadprof.phase("json_decode"):
+                snapshot = JSONDecoder().decode(json)
+            with zynloadprof.phase("legacy_fixup"):
+                state = self.fix_snapshot(snapshot)
 
             if load_chains:
                 # Mute output to avoid unwanted noises
@@ -1010,14 +1223,16 @@ class zynthian_state_manager:
                     else:
                         engine_config = None
                     self.chain_manager.set_state(state['chains'], engine_config)
-                self.chain_manager.stop_unused_engines()
+                with zynloadprof.phase("engine_stop"):
+                    self.chain_manager.stop_unused_engines()
                 zynautoconnect.resume()
 
                 self.zs3 = self.sanitize_zs3_from_json(state["zs3"])
                 self.load_zs3("zs3-0")
 
                 if "alsa_mixer" in state:
-                    self.alsa_mixer_processor.set_state(state["alsa_mixer"])
+                    with zynloadprof.phase("alsa_mixer"):
+                        self.alsa_mixer_processor.set_state(state["alsa_mixer"])
 
                 if "audio_recorder_armed" in state:
                     for midi_chan in range(self.zynmixer.MAX_NUM_CHANNELS):
@@ -1032,7 +1247,8 @@ class zynthian_state_manager:
             if load_sequences and "zynseq_riff_b64" in state:
                 b64_bytes = state["zynseq_riff_b64"].encode("utf-8")
                 binary_riff_data = base64.decodebytes(b64_bytes)
-                self.zynseq.restore_riff_data(binary_riff_data)
+                with zynloadprof.phase("sequences"):
+                    self.zynseq.restore_riff_data(binary_riff_data)
 
             if fpath == self.last_snapshot_fpath and "last_state_fpath" in state:
                 self.last_snapshot_fpath = state["last_snapshot_fpath"]
@@ -1051,8 +1267,9 @@ class zynthian_state_manager:
             self.set_busy_error("ERROR: Invalid snapshot", e)
             sleep(2)
 
-        zynautoconnect.request_midi_connect()
-        zynautoconnect.request_audio_connect(True)
+        with zynloadprof.phase("autoconnect"):
+            zynautoconnect.request_midi_connect()
+            zynautoconnect.request_audio_connect(True)
 
         # Restore mute state
         self.zynmixer.set_mute(self.zynmixer.MAX_NUM_CHANNELS - 1, mute)
@@ -1168,6 +1385,7 @@ class zynthian_state_manager:
         except:
             tstate["restore"] = False
 
+    @zynloadprof.timed("zs3", named=True)
     def load_zs3(self, zs3_id):
         """Restore a ZS3
         
@@ -1191,86 +1409,102 @@ class zynthian_state_manager:
         restored_cc_mapping = []
         if "chains" in zs3_state:
             self.set_busy_details("restoring chains state")
-            for chain_id, chain_state in zs3_state["chains"].items():
-                chain_id = int(chain_id)
+            with zynloadprof.phase("routing"):
+                for chain_id, chain_state in zs3_state["chains"].items():
+                    chain_id = int(chain_id)
 
-                try:
-                    restore_flag = chain_state["restore"]
-                except:
-                    restore_flag = True
+                    try:
+                        restore_flag = chain_state["restore"]
+                    except:
+                        restore_flag = True
 
-                if not restore_flag:
-                    continue
+                    if not restore_flag:
+                        continue
 
-                chain = self.chain_manager.get_chain(chain_id)
-                if chain:
-                    restored_chains.append(chain_id)
-                else:
-                    continue
+                    chain = self.chain_manager.get_chain(chain_id)
+                    if chain:
+                        restored_chains.append(chain_id)
+                    else:
+                        continue
 
-                if "midi_chan" in chain_state:
-                    if chain.midi_chan is not None and chain.midi_chan != chain_state['midi_chan']:
-                        self.chain_manager.set_midi_chan(chain_id, chain_state['midi_chan'])
+                    # Current routing, to rebuild chain's graph only when it changes
+                    routing = chain.get_routing_state()
 
-                if chain.zmop_index is not None:
-                    if "note_low" in chain_state:
-                        lib_zyncore.zmop_set_note_low(chain.zmop_index, chain_state["note_low"])
-                    else:
-                        lib_zyncore.zmop_set_note_low(chain.zmop_index, 0)
-                    if "note_high" in chain_state:
-                        lib_zyncore.zmop_set_note_high(chain.zmop_index, chain_state["note_high"])
-                    else:
-                        lib_zyncore.zmop_set_note_high(chain.zmop_index, 127)
-                    if "transpose_octave" in chain_state:
-                        lib_zyncore.zmop_set_transpose_octave(chain.zmop_index, chain_state["transpose_octave"])
-                    else:
-                        lib_zyncore.zmop_set_transpose_octave(chain.zmop_index, 0)
-                    if "transpose_semitone" in chain_state:
-                        lib_zyncore.zmop_set_transpose_semitone(chain.zmop_index, chain_state["transpose_semitone"])
-                    else:
-                        lib_zyncore.zmop_set_transpose_semitone(chain.zmop_index, 0)
-                if "midi_in" in chain_state:
-                    chain.midi_in = chain_state["midi_in"]
-                if "midi_out" in chain_state:
-                    chain.midi_out = chain_state["midi_out"]
-                if "midi_thru" in chain_state:
-                    chain.midi_thru = chain_state["midi_thru"]
-                if "audio_in" in chain_state:
-                    chain.audio_in = chain_state["audio_in"]
-                chain.audio_out = []
-                if "audio_out" in chain_state:
-                    for out in chain_state["audio_out"]:
-                        try:
-                            chain.audio_out.append(f"{self.chain_manager.processors[out[0]].jackname}:{out[1]}")
-                        except:
-                            chain.audio_out.append(out)
+                    if "midi_chan" in chain_state:
+                        if chain.midi_chan is not None and chain.midi_chan != chain_state['midi_chan']:
+                            self.chain_manager.set_midi_chan(chain_id, chain_state['midi_chan'])
+
+                    if chain.zmop_index is not None:
+                        if "note_low" in chain_state:
+                            lib_zyncore.zmop_set_note_low(chain.zmop_index, chain_state["note_low"])
+                        else:
+                            lib_zyncore.zmop_set_note_low(chain.zmop_index, 0)
+                        if "note_high" in chain_state:
+                            lib_zyncore.zmop_set_note_high(chain.zmop_index, chain_state["note_high"])
+                        else:
+                            lib_zyncore.zmop_set_note_high(chain.zmop_index, 127)
+                        if "transpose_octave" in chain_state:
+                            lib_zyncore.zmop_set_transpose_octave(chain.zmop_index, chain_state["transpose_octave"])
+                        else:
+                            lib_zyncore.zmop_set_transpose_octave(chain.zmop_index, 0)
+                        if "transpose_semitone" in chain_state:
+                            lib_zyncore.zmop_set_transpose_semitone(chain.zmop_index, chain_state["transpose_semitone"])
+                        else:
+                            lib_zyncore.zmop_set_transpose_semitone(chain.zmop_index, 0)
+                    if "midi_in" in chain_state:
+                        chain.midi_in = chain_state["midi_in"]
+                    if "midi_out" in chain_state:
+                        chain.midi_out = chain_state["midi_out"]
+                    if "midi_thru" in chain_state:
+                        chain.midi_thru = chain_state["midi_thru"]
+                    if "audio_in" in chain_state:
+                        chain.audio_in = chain_state["audio_in"]
+                    chain.audio_out = []
+                    if "audio_out" in chain_state:
+                        for out in chain_state["audio_out"]:
+                            try:
+                                chain.audio_out.append(f"{self.chain_manager.processors[out[0]].jackname}:{out[1]}")
+                            except:
+                                chain.audio_out.append(out)
                     
-                if "audio_thru" in chain_state:
-                    chain.audio_thru = chain_state["audio_thru"]
-                chain.rebuild_graph()
-                if "midi_cc" in chain_state:
-                    for cc, cfg in chain_state["midi_cc"].items():
-                        for proc_id, symbol in cfg:
-                            if proc_id in self.chain_manager.processors:
-                                restored_cc_mapping.append((proc_id, int(cc), symbol))
+                    if "audio_thru" in chain_state:
+                        chain.audio_thru = chain_state["audio_thru"]
+                    if chain.get_routing_state() != routing:
+                        chain.rebuild_graph()
+                    if "midi_cc" in chain_state:
+                        for cc, cfg in chain_state["midi_cc"].items():
+                            for proc_id, symbol in cfg:
+                                if proc_id in self.chain_manager.processors:
+                                    restored_cc_mapping.append((proc_id, int(cc), symbol))
 
         if "processors" in zs3_state:
-            for proc_id, proc_state in zs3_state["processors"].items():
-                try:
-                    processor = self.chain_manager.processors[int(proc_id)]
-                    if processor.chain_id in restored_chains:
-                        self.set_busy_details(f"restoring {processor.get_basepath()} state")
-                        processor.set_state(proc_state)
-                except Exception as e:
-                    logging.error(f"Failed to restore processor {proc_id} state => {e}")
+            # Changed controllers are sent in bulk to each engine, after loading presets
+            pending_zctrls = {}
+            with zynloadprof.phase("processors"):
+                for proc_id, proc_state in zs3_state["processors"].items():
+                    try:
+                        processor = self.chain_manager.processors[int(proc_id)]
+                        if processor.chain_id in restored_chains:
+                            self.set_busy_details(f"restoring {processor.get_basepath()} state")
+                            processor.set_state(proc_state, pending_zctrls)
+                    except Exception as e:
+                        logging.error(f"Failed to restore processor {proc_id} state => {e}")
+            with zynloadprof.phase("controller_send"):
+                for engine, zctrls in pending_zctrls.items():
+                    try:
+                        engine.send_controller_values(zctrls)
+                    except Exception as e:
+                        logging.error(f"Failed to send controller values to {engine.get_name()} => {e}")
 
-        for cc_map in restored_cc_mapping:
-            processor = self.chain_manager.processors[cc_map[0]]
-            try:
-                zctrl = processor.controllers_dict[cc_map[2]]
-                self.chain_manager.add_midi_learn(processor.midi_chan, cc_map[1], zctrl)
-            except:
-                logging.warning(f"Failed to restore MIDI learning {cc_map[1]} => {cc_map[2]}")
+        with zynloadprof.phase("midi_learn"):
+            for cc_map in restored_cc_mapping:
+                processor = self.chain_manager.processors[cc_map[0]]
+                try:
+                    zctrl = processor.controllers_dict[cc_map[2]]
+                    if not self.chain_manager.is_midi_learned(processor.midi_chan, cc_map[1], zctrl):
+                        self.chain_manager.add_midi_learn(processor.midi_chan, cc_map[1], zctrl)
+                except:
+                    logging.warning(f"Failed to restore MIDI learning {cc_map[1]} => {cc_map[2]}")
 
         if "active_chain" in zs3_state:
             self.chain_manager.set_active_chain_by_id(zs3_state["active_chain"])
@@ -1282,7 +1516,8 @@ class zynthian_state_manager:
                 restore_flag = True
             if restore_flag:
                 self.set_busy_details("restoring mixer state")
-                self.zynmixer.set_state(zs3_state["mixer"])
+                with zynloadprof.phase("mixer"):
+                    self.zynmixer.set_state(zs3_state["mixer"])
 
         if "midi_capture" in zs3_state:
             self.set_busy_details("restoring midi capture state")
@@ -1752,6 +1987,7 @@ class zynthian_state_manager:
         if midi_profile_fpath:
             zynconf.load_config(True, midi_profile_fpath)
             zynthian_gui_config.set_midi_config()
+            self.init_midi_dispatcher()
             self.init_midi()
             self.init_midi_services()
             zynautoconnect.request_midi_connect()
@@ -1832,6 +2068,7 @@ class zynthian_state_manager:
                 elif not key.startswith("MASTER_"):  # Drop Master Channel config, as it's global
                     os.environ["ZYNTHIAN_MIDI_" + key] = state[key]
             zynthian_gui_config.set_midi_config()
+            self.init_midi_dispatcher()
             self.init_midi()
             self.init_midi_services()
             self.set_transport_clock_source()
@@ -1906,6 +2143,7 @@ class zynthian_state_manager:
         if not libsmf.isRecording():
             libsmf.unload(self.smf_recorder)
             libsmf.startRecording()
+            self.status_midi_recorder = True
             zynsigman.send(zynsigman.S_STATE_MAN, self.SS_MIDI_RECORDER_STATE, state=True)
             return True
         else:
@@ -1923,6 +2161,7 @@ class zynthian_state_manager:
                 self.last_midi_file = fpath
                 result = True
 
+            self.status_midi_recorder = False
             zynsigman.send(zynsigman.S_STATE_MAN, self.SS_MIDI_RECORDER_STATE, state=False)
 
         return result
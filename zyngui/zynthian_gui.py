@@ -46,6 +46,8 @@ from zynlibs.zynseq import *
 
 from zyngine import zynthian_state_manager
 from zyngine.zynthian_signal_manager import zynsigman
+from zyngine.zynthian_scheduler import zynsched
+from zyngine.zynthian_load_profiler import zynloadprof
 
 from zyngui import zynthian_gui_config
 from zyngui import zynthian_gui_keyboard
@@ -131,9 +133,11 @@ class zynthian_gui:
 		self.chain_manager = self.state_manager.chain_manager
 
 		self.debug_thread = None
-		self.busy_thread = None
-		self.control_thread = None
-		self.status_thread = None
+		self.busy_task = None
+		self.busy_timeout = 0
+		self.control_task = None
+		self.control_refresh_task = None
+		self.status_task = None
 		self.cuia_thread = None
 		self.cuia_queue = self.state_manager.cuia_queue
 		self.zynread_wait_flag = False
@@ -484,9 +488,9 @@ class zynthian_gui:
 
 		# Start processing signals, threads & polling
 		self.register_signals()
-		self.start_busy_thread()
-		self.start_control_thread()
-		self.start_status_thread()
+		self.start_busy_task()
+		self.start_control_task()
+		self.start_status_task()
 		self.start_cuia_thread()
 		self.start_zynpot_thread()
 		self.start_polling()
@@ -1097,6 +1101,37 @@ class zynthian_gui:
 	def cuia_stop_workflow_capture(self, params=None):
 		self.stop_capture_log()
 
+	def cuia_signal_stats(self, params=None):
+		"""Signal manager statistics: ON, OFF, RESET or dump report to log (no params)"""
+		if params:
+			cmd = str(params[0]).upper()
+			if cmd == "ON":
+				zynsigman.enable_stats(True)
+			elif cmd == "OFF":
+				zynsigman.enable_stats(False)
+			elif cmd == "RESET":
+				zynsigman.reset_stats()
+		else:
+			for line in zynsigman.get_stats_report():
+				logging.warning(line)
+
+	def cuia_scheduler_stats(self, params=None):
+		"""Dump scheduler task statistics (runs, overruns, delay & execution time) to log"""
+		for line in zynsched.get_stats_report():
+			logging.warning(line)
+
+	def cuia_load_stats(self, params=None):
+		"""Snapshot/ZS3 load timing: RESET or dump phase times of last loads to log (param: number of loads, default 4)"""
+		if params and str(params[0]).upper() == "RESET":
+			zynloadprof.reset()
+			return
+		try:
+			last = int(params[0])
+		except:
+			last = 4
+		for line in zynloadprof.get_report(last=last):
+			logging.warning(line)
+
 
 	# Panic Actions
 	def cuia_all_notes_off(self, params=None):
@@ -2148,45 +2183,37 @@ class zynthian_gui:
 						logging.exception(err)
 
 	# ------------------------------------------------------------------
-	# Control Thread
+	# Control Tasks
 	# ------------------------------------------------------------------
 
-	def start_control_thread(self):
-		self.control_thread = Thread(target=self.control_thread_task, args=())
-		self.control_thread.name = "Control"
-		self.control_thread.daemon = True  # thread dies with the program
-		self.control_thread.start()
-
-	def control_thread_task(self):
-		j = 0
-		while not self.exit_flag:
-			# Read zynswitches & OSC events
-			self.zynswitch_read()
-			self.osc_receive()
+	def start_control_task(self):
+		self.control_task = zynsched.add_periodic(0.01, self.control_task_cb, name="gui.control", lane=zynsched.LANE_HIGH)
+		self.control_refresh_task = zynsched.add_periodic(0.05, self.control_refresh_task_cb, name="gui.control_refresh", lane=zynsched.LANE_HIGH)
 
-			# Every 4 cycles...
-			if j > 4:
-				j = 0
-
-				# Refresh GUI Controllers
-				try:
-					self.screens[self.current_screen].plot_zctrls()
-				except AttributeError:
-					pass
-				except Exception as e:
-					logging.error(e)
-
-				# Power Save Check
-				self.state_manager.power_save_check()
-			else:
-				j += 1
+	def stop_control_task(self):
+		for task in (self.control_task, self.control_refresh_task):
+			if task:
+				task.cancel(wait=True)
+		self.control_task = None
+		self.control_refresh_task = None
+		self.osc_end()
 
-			# Wait a little bit...
-			sleep(0.01)
+	def control_task_cb(self):
+		# Read zynswitches & OSC events
+		self.zynswitch_read()
+		self.osc_receive()
 
-		# End Thread task
-		self.osc_end()
+	def control_refresh_task_cb(self):
+		# Refresh GUI Controllers
+		try:
+			self.screens[self.current_screen].plot_zctrls()
+		except AttributeError:
+			pass
+		except Exception as e:
+			logging.error(e)
 
+		# Power Save Check
+		self.state_manager.power_save_check()
 
 	def cb_touch(self, event):
 		#logging.debug("CB EVENT TOUCH!!!")
@@ -2205,88 +2232,79 @@ class zynthian_gui:
 			return "break"
 
 	# ------------------------------------------------------------------
-	# "Busy" Animated Icon Thread
+	# "Busy" Animated Icon Task
 	# ------------------------------------------------------------------
 
-	def start_busy_thread(self):
-		self.busy_thread = Thread(target=self.busy_thread_task, args=())
-		self.busy_thread.name = "Busy"
-		self.busy_thread.daemon = True  # thread dies with the program
-		self.busy_thread.start()
-		#logging.debug(f"START BUSY {self.busy_thread}")
+	def start_busy_task(self):
+		self.busy_timeout = 0
+		self.busy_task = zynsched.add_periodic(0.1, self.busy_task_cb, name="gui.busy")
 
-	def busy_thread_task(self):
-		busy_timeout = 0
+	def busy_task_cb(self):
 		busy_warn_time = 300
-		while not self.exit_flag:
-			if self.state_manager.is_busy():
-				busy_timeout += 1
-				busy_message = self.state_manager.get_busy_message()
-				busy_details = self.state_manager.get_busy_details()
-				# Show loading screen if busy and busy message
-				if self.current_screen != "loading":
-					if busy_message:
-						self.show_loading(busy_message, busy_details)
+		if self.state_manager.is_busy():
+			self.busy_timeout += 1
+			busy_message = self.state_manager.get_busy_message()
+			busy_details = self.state_manager.get_busy_details()
+			# Show loading screen if busy and busy message
+			if self.current_screen != "loading":
+				if busy_message:
+					self.show_loading(busy_message, busy_details)
+			else:
+				busy_error = self.state_manager.get_busy_error()
+				if busy_error:
+					self.screens['loading'].set_error(busy_error)
 				else:
-					busy_error = self.state_manager.get_busy_error()
-					if busy_error:
-						self.screens['loading'].set_error(busy_error)
+					busy_warning = self.state_manager.get_busy_warning()
+					if busy_warning:
+						self.screens['loading'].set_warning(busy_warning)
 					else:
-						busy_warning = self.state_manager.get_busy_warning()
-						if busy_warning:
-							self.screens['loading'].set_warning(busy_warning)
-						else:
-							busy_success = self.state_manager.get_busy_success()
-							if busy_success:
-								self.screens['loading'].set_success(busy_success)
-							elif busy_message:
-								self.screens['loading'].set_title(busy_message)
-					if busy_details:
-						self.screens['loading'].set_details(busy_details)
+						busy_success = self.state_manager.get_busy_success()
+						if busy_success:
+							self.screens['loading'].set_success(busy_success)
+						elif busy_message:
+							self.screens['loading'].set_title(busy_message)
+				if busy_details:
+					self.screens['loading'].set_details(busy_details)
+		else:
+			self.busy_timeout = 0
+			self.screen_lock.acquire()
+			if self.current_screen == "loading":
+				self.screen_lock.release()
+				self.close_screen("loading")
 			else:
-				busy_timeout = 0
-				self.screen_lock.acquire()
-				if self.current_screen == "loading":
-					self.screen_lock.release()
-					self.close_screen("loading")
-				else:
-					self.screen_lock.release()
-
-			try:
-				if self.current_screen:
-					self.screens[self.current_screen].refresh_loading()
-			except Exception as err:
-				logging.error(f"refresh_loading() on screen '{self.current_screen}' => {err}")
+				self.screen_lock.release()
 
-			if busy_timeout == busy_warn_time:
-				logging.warning(f"Clients have been busy for longer than {int(busy_warn_time / 10)}s: {self.state_manager.busy}")
+		try:
+			if self.current_screen:
+				self.screens[self.current_screen].refresh_loading()
+		except Exception as err:
+			logging.error(f"refresh_loading() on screen '{self.current_screen}' => {err}")
 
-			sleep(0.1)
+		if self.busy_timeout == busy_warn_time:
+			logging.warning(f"Clients have been busy for longer than {int(busy_warn_time / 10)}s: {self.state_manager.busy}")
 
 	# ------------------------------------------------------------------
-	# Status Refresh Thread
+	# Status Refresh Task
 	# ------------------------------------------------------------------
 
-	def start_status_thread(self):
-		self.status_thread = Thread(target=self.status_thread_task, args=())
-		self.status_thread.name = "Status"
-		self.status_thread.daemon = True  # thread dies with the program
-		self.status_thread.start()
+	def start_status_task(self):
+		self.status_task = zynsched.add_periodic(0.2, self.status_task_cb, name="gui.status")
 
-	def status_thread_task(self):
-		while not self.exit_flag:
-			# When in power save mode:
-			# + Make LED refresh faster so the fading effect looks smooth
-			# + Don't need to refresh status info because it's not shown
-			if self.state_manager.power_save_mode:
-				if self.wsleds:
-					self.wsleds.update()
-				sleep(0.05)
-			else:
-				self.refresh_status()
-				if self.wsleds:
-					self.wsleds.update()
-				sleep(0.2)
+	def status_task_cb(self):
+		# When in power save mode:
+		# + Make LED refresh faster so the fading effect looks smooth
+		# + Don't need to refresh status info because it's not shown
+		if self.state_manager.power_save_mode:
+			if self.wsleds:
+				self.wsleds.update()
+			interval = 0.05
+		else:
+			self.refresh_status()
+			if self.wsleds:
+				self.wsleds.update()
+			interval = 0.2
+		if self.status_task.interval != interval:
+			self.status_task.reschedule(interval=interval)
 
 	def refresh_status(self):
 		# Refresh on-screen status
@@ -2444,6 +2462,12 @@ class zynthian_gui:
 		self.exit_flag = True
 		self.exit_wait_count = 0
 
+		# Stop GUI periodic tasks
+		for task in (self.busy_task, self.status_task):
+			if task:
+				task.cancel(wait=True)
+		self.stop_control_task()
+
 		# End signal manager queue processing
 		zynsigman.stop()
 
@@ -2460,6 +2484,9 @@ class zynthian_gui:
 		# Stop State manager
 		self.state_manager.stop()
 
+		# Stop scheduler threads
+		zynsched.stop()
+
 		# Signal cuia thread so it can unlock and finish normally
 		self.cuia_queue.put_nowait("__EXIT__")
 
@@ -2469,9 +2496,11 @@ class zynthian_gui:
 	def stop(self):
 		# Get threads still running
 		running_thread_names = []
-		for t in [self.control_thread, self.status_thread, self.busy_thread, self.cuia_thread, self.state_manager.slow_thread, self.state_manager.fast_thread, self.multitouch.thread, self.zynpot_thread]:
+		for t in [self.cuia_thread, self.state_manager.fast_thread, self.multitouch.thread, self.zynpot_thread]:
 			if t and t.is_alive():
 				running_thread_names.append(t.name)
+		if zynsched.is_running():
+			running_thread_names.append("Scheduler")
 		if zynautoconnect.is_running():
 			running_thread_names.append("Autoconnect")
 
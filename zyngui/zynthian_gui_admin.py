@@ -198,6 +198,7 @@ class zynthian_gui_admin(zynthian_gui_selector):
 			self.list_data.append((self.workflow_capture_start, 0, "\u2610 Capture Workflow"))
 		if self.state_manager.update_available:
 			self.list_data.append((self.update_software, 0, "Update Software"))
+		self.list_data.append((self.generate_presets_cache, 0, "Regenerate LV2 Presets Cache"))
 		#self.list_data.append((self.update_system, 0, "Update Operating System"))
 		#self.list_data.append((None, 0, "> POWER"))
 		#self.list_data.append((self.restart_gui, 0, "Restart UI"))
@@ -551,6 +552,13 @@ class zynthian_gui_admin(zynthian_gui_selector):
 		self.state_manager.update_available = False
 		self.update_available = False
 
+	def generate_presets_cache(self):
+		logging.info("REGENERATE LV2 PRESETS CACHE")
+		thread = Thread(target=self.state_manager.generate_presets_cache, args=())
+		thread.name = "presets cache"
+		thread.daemon = True
+		thread.start()
+
 	def update_system(self):
 		logging.info("UPDATE SYSTEM")
 		self.last_state_action()
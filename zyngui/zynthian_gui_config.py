@@ -356,7 +356,7 @@ def set_midi_config():
 	global midi_filter_rules, midi_sys_enabled, midi_usb_by_port
 	global midi_network_enabled, midi_rtpmidi_enabled, midi_netump_enabled
 	global midi_touchosc_enabled, bluetooth_enabled, ble_controller, midi_aubionotes_enabled
-	global transport_clock_source
+	global transport_clock_source, midi_cc_thinning, midi_cc_thinning_ms
 	global master_midi_channel, master_midi_change_type, master_midi_note_cuia
 	global master_midi_program_change_up, master_midi_program_change_down
 	global master_midi_program_base, master_midi_bank_change_ccnum
@@ -378,6 +378,9 @@ def set_midi_config():
 	bluetooth_enabled = int(os.environ.get('ZYNTHIAN_MIDI_BLE_ENABLED', "0"))
 	ble_controller = os.environ.get('ZYNTHIAN_MIDI_BLE_CONTROLLER', "")
 	midi_aubionotes_enabled = int(os.environ.get('ZYNTHIAN_MIDI_AUBIONOTES_ENABLED', "0"))
+	# Keep only the last value of each CC (per device, channel & number): per read batch or time window (ms)
+	midi_cc_thinning = int(os.environ.get('ZYNTHIAN_MIDI_CC_THINNING', "0"))
+	midi_cc_thinning_ms = int(os.environ.get('ZYNTHIAN_MIDI_CC_THINNING_MS', "0"))
 	transport_clock_source = int(os.environ.get('ZYNTHIAN_MIDI_TRANSPORT_CLOCK_SOURCE', "0"))
 
 	# Filter Rules
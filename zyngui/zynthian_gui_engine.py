@@ -71,6 +71,8 @@ class zynthian_gui_engine(zynthian_gui_selector):
 		self.engine_cats = None
 		self.context_index = {}
 		self.show_all = False
+		self.search_prefix = ""  # Incremental search of engines by title
+		self.search_range = None
 		self.info_canvas = None
 		super().__init__('Engine', True, False)
 
@@ -242,6 +244,9 @@ class zynthian_gui_engine(zynthian_gui_selector):
 		self.engines_by_cat = self.chain_manager.filtered_engines_by_cat(self.proc_type, all=self.show_all)
 		self.engine_cats = list(self.engines_by_cat.keys())
 		logging.debug(f"CATEGORIES => {self.engine_cats}")
+		# Catalog may have been rebuilt => search again
+		if self.search_prefix:
+			self.search_range = zynthian_lv2.get_engine_catalog().search(self.proc_type, self.search_prefix, not self.show_all)
 		#self.engines_by_cat = sorted(self.engines_by_cat.items(), key=lambda kv: "!" if kv[0] is None else kv[0])
 
 	def recall_context_index(self):
@@ -256,6 +261,8 @@ class zynthian_gui_engine(zynthian_gui_selector):
 
 	def build_view(self):
 		self.show_all = False
+		self.search_prefix = ""
+		self.search_range = None
 		self.get_engines_by_cat()
 		self.recall_context_index()
 		return super().build_view()
@@ -273,8 +280,22 @@ class zynthian_gui_engine(zynthian_gui_selector):
 		if self.proc_type in ("MIDI Tool", "Audio Effect"):
 			self.list_data.append(("None", 0, "None", "None"))
 
-		# Show a single category or all
-		if self.engine_cats:
+		# Show search results or a single category or all
+		if self.search_prefix:
+			cats = []
+			for eng in zynthian_lv2.get_engine_catalog().get_search_results(self.proc_type, self.search_range, not self.show_all):
+				if eng in self.chain_manager.single_processor_engines and eng in self.chain_manager.zyngines:
+					continue
+				i = len(self.list_data)
+				info = self.engine_info[eng]
+				if self.show_all:
+					if info["ENABLED"]:
+						self.list_data.append((eng, i, "\u2612 " + info["TITLE"], info["NAME"]))
+					else:
+						self.list_data.append((eng, i, "\u2610 " + info["TITLE"], info["NAME"]))
+				else:
+					self.list_data.append((eng, i, info["TITLE"], info["NAME"]))
+		elif self.engine_cats:
 			if self.cat_index < 0:
 				cats = self.engine_cats
 			else:
@@ -345,6 +366,8 @@ class zynthian_gui_engine(zynthian_gui_selector):
 				if self.show_all:
 					self.engine_info[engine]['ENABLED'] = not self.engine_info[engine]['ENABLED']
 					self.engine_info_dirty = True
+					# Enabled-only catalog indexes are stale now
+					zynthian_lv2.invalidate_engine_catalog()
 					self.update_list()
 				else:
 					self.zyngui.modify_chain_status["engine"] = engine
@@ -410,13 +433,36 @@ class zynthian_gui_engine(zynthian_gui_selector):
 				self.show_details()
 				return True
 
+	def cuia_engine_search(self, params=None):
+		"""Show engines whose title starts with the text in params (case insensitive). No text shows all engines again."""
+		if params:
+			self.set_search(str(params[0]))
+		else:
+			self.set_search("")
+		return True
+
+	def set_search(self, prefix):
+		# Typing more characters only needs searching among the current results
+		if self.search_prefix and self.search_range and prefix.startswith(self.search_prefix):
+			irange = self.search_range
+		else:
+			irange = None
+		self.search_prefix = prefix
+		if prefix:
+			self.search_range = zynthian_lv2.get_engine_catalog().search(self.proc_type, prefix, not self.show_all, irange)
+		else:
+			self.search_range = None
+		self.index = 0
+		self.update_list()
+		self.set_select_path()
+
 	def cb_add_parallel(self, option, value):
 		self.zyngui.modify_chain_status['parallel'] = value
 		self.zyngui.modify_chain()
 
 	def set_selector(self, zs_hidden=False):
 		super().set_selector(zs_hidden)
-		self.zselector.zctrl.engine = self
+		self.zselector.zctrl.set_engine(self)
 		if self.zsel2:
 			self.zsel2.zctrl.set_options({'symbol': "cat_index", 'name': "Category", 'short_name': "Category", 'value_min': 0, 'value_max': len(self.engine_cats) - 1, 'value': self.cat_index})
 			self.zsel2.config(self.zsel2.zctrl)
@@ -435,6 +481,8 @@ class zynthian_gui_engine(zynthian_gui_selector):
 
 	def set_cat(self, cat_index):
 		self.cat_index = cat_index
+		self.search_prefix = ""
+		self.search_range = None
 		self.recall_context_index()
 		self.update_list()
 		self.set_select_path()
@@ -482,7 +530,9 @@ class zynthian_gui_engine(zynthian_gui_selector):
 			#path = f"{chain}#{path}"
 		except:
 			pass
-		if self.engine_cats:
+		if self.search_prefix:
+			path = path + "/" + self.search_prefix + "*"
+		elif self.engine_cats:
 			path = path + "/" + self.engine_cats[self.cat_index]
 		self.select_path.set(path)
 
@@ -48,6 +48,7 @@ class zynthian_widget_base(tkinter.Frame):
 		self.processor = None
 		self.widget_canvas = None
 		self.monitors = None
+		self.monitors_engine = None  # Engine refreshing monitors for this widget
 		self.bind('<Configure>', self.on_size)
 
 	def on_size(self, event):
@@ -63,10 +64,12 @@ class zynthian_widget_base(tkinter.Frame):
 	def show(self):
 		if not self.shown:
 			self.shown = True
+			self.subscribe_monitors()
 
 	def hide(self):
 		if self.shown:
 			self.shown = False
+			self.unsubscribe_monitors()
 
 	def update(self):
 		if self.shown and self.zyngui_control.shown:
@@ -74,7 +77,21 @@ class zynthian_widget_base(tkinter.Frame):
 			self.refresh_gui()
 
 	def set_processor(self, processor):
+		self.unsubscribe_monitors()
 		self.processor = processor
+		if self.shown:
+			self.subscribe_monitors()
+
+	def subscribe_monitors(self):
+		# While widget is shown, engine refreshes monitors in background, so get_monitors doesn't wait for it
+		if self.monitors_engine is None and self.processor:
+			self.monitors_engine = self.processor.engine
+			self.monitors_engine.subscribe_monitors()
+
+	def unsubscribe_monitors(self):
+		if self.monitors_engine:
+			self.monitors_engine.unsubscribe_monitors()
+			self.monitors_engine = None
 
 	def get_monitors(self):
 		self.monitors = self.processor.engine.get_monitors_dict()
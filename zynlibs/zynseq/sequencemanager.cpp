@@ -18,6 +18,7 @@ void SequenceManager::init()
 }
 
 void SequenceManager::resetBanks() {
+    std::lock_guard<std::recursive_mutex> lock(m_mutexBanks);
     for (auto itBank = m_mBanks.begin(); itBank != m_mBanks.end(); ++itBank)
         for(auto itSeq = itBank->second.begin(); itSeq != itBank->second.end(); ++itSeq)
             delete (*itSeq);
@@ -141,7 +142,11 @@ void SequenceManager::copyPattern(uint32_t source, uint32_t destination)
 
 Sequence* SequenceManager::getSequence(uint8_t bank, uint8_t sequence)
 {
+    Sequence* pSequence = findSequence(bank, sequence);
+    if(pSequence)
+        return pSequence;
     // Add missing sequences
+    std::lock_guard<std::recursive_mutex> lock(m_mutexBanks);
     while(m_mBanks[bank].size() <= sequence) {
         m_mBanks[bank].push_back(new Sequence());
         addPattern(bank, m_mBanks[bank].size() - 1, 0, 0, createPattern(), false);
@@ -149,6 +154,19 @@ Sequence* SequenceManager::getSequence(uint8_t bank, uint8_t sequence)
     return m_mBanks[bank][sequence];
 }
 
+Sequence* SequenceManager::findSequence(uint8_t bank, uint8_t sequence)
+{
+    auto itBank = m_mBanks.find(bank);
+    if(itBank == m_mBanks.end() || sequence >= itBank->second.size())
+        return NULL;
+    return itBank->second[sequence];
+}
+
+std::recursive_mutex& SequenceManager::getBankMutex()
+{
+    return m_mutexBanks;
+}
+
 bool SequenceManager::addPattern(uint8_t bank, uint8_t sequence, uint32_t track, uint32_t position, uint32_t pattern, bool force)
 {
     Sequence* pSequence = getSequence(bank, sequence);
@@ -212,9 +230,8 @@ size_t SequenceManager::clock(std::pair<double,double> timeinfo, std::multimap<u
         }
         if(nEventType & 2)
         {
-            // Change of state
-            // uint8_t nTrigger = getTriggerNote(it->first, it->second);
-            // It's currently polled from python
+            // Change of state - flag it so that zynseq can notify clients
+            m_bStateChanged = true;
         }
         ++it;
     }
@@ -246,6 +263,14 @@ void SequenceManager::setSequencePlayState(uint8_t bank, uint8_t sequence, uint8
             m_vPlayingSequences.push_back(std::pair<uint32_t,uint32_t>(bank,sequence));
     }
     pSequence->setPlayState(state);
+    m_bStateChanged = true;
+}
+
+bool SequenceManager::getStateChanged()
+{
+    bool bChanged = m_bStateChanged;
+    m_bStateChanged = false;
+    return bChanged;
 }
 
 uint8_t SequenceManager::getTriggerNote(uint8_t bank, uint8_t sequence)
@@ -338,6 +363,7 @@ void SequenceManager::setSequencesInBank(uint8_t bank, uint8_t sequences)
 {
     if(sequences == 0)
         return;
+    std::lock_guard<std::recursive_mutex> lock(m_mutexBanks);
     // Remove excessive sequences
     size_t nSize = m_mBanks[bank].size();
     while(nSize > sequences)
@@ -354,11 +380,15 @@ void SequenceManager::setSequencesInBank(uint8_t bank, uint8_t sequences)
 
 uint32_t SequenceManager::getSequencesInBank(uint32_t bank)
 {
-    return m_mBanks[bank].size();
+    auto itBank = m_mBanks.find(bank);
+    if(itBank == m_mBanks.end())
+        return 0;
+    return itBank->second.size();
 }
 
 bool SequenceManager::moveSequence(uint8_t bank, uint8_t sequence, uint8_t position)
 {
+    std::lock_guard<std::recursive_mutex> lock(m_mutexBanks);
     if(sequence >= getSequencesInBank(bank))
         setSequencesInBank(bank, sequence + 1);
     if(position >= getSequencesInBank(bank))
@@ -381,12 +411,14 @@ bool SequenceManager::moveSequence(uint8_t bank, uint8_t sequence, uint8_t posit
 
 void SequenceManager::insertSequence(uint8_t bank, uint8_t sequence)
 {
+    std::lock_guard<std::recursive_mutex> lock(m_mutexBanks);
     m_mBanks[bank].insert(m_mBanks[bank].begin() + sequence, new Sequence());
     addPattern(bank, sequence, 0, 0, createPattern(), false);
 }
 
 void SequenceManager::removeSequence(uint8_t bank, uint8_t sequence)
 {
+    std::lock_guard<std::recursive_mutex> lock(m_mutexBanks);
     if(sequence < m_mBanks[bank].size())
     {
         delete(m_mBanks[bank][sequence]);
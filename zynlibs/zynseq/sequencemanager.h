@@ -3,6 +3,7 @@
 #include "sequence.h"
 #include "track.h"
 #include <map>
+#include <mutex>
 
 #define DEFAULT_TRACK_COUNT 4
 
@@ -93,6 +94,20 @@ class SequenceManager
         */
        Sequence* getSequence(uint8_t bank, uint8_t sequence);
 
+        /** @brief  Get pointer to existing sequence without creating it
+        *   @param  bank Index of bank containing sequence
+        *   @param  sequence Index of sequence within bank
+        *   @retval Sequence* Pointer to sequence or NULL if it does not exist
+        *   @note   Does not modify bank structure so may be used whilst holding getBankMutex() from another thread
+        */
+        Sequence* findSequence(uint8_t bank, uint8_t sequence);
+
+        /** @brief  Get mutex protecting bank structure
+        *   @retval std::recursive_mutex& Mutex held whilst sequences are added, removed, moved or deleted
+        *   @note   Hold this when reading sequences from a thread other than the one editing them. Not used by jack process thread.
+        */
+        std::recursive_mutex& getBankMutex();
+
         /** @brief  Add pattern to sequence
         *   @param  bank Index of bank
         *   @param  sequence Index of sequence
@@ -228,6 +243,12 @@ class SequenceManager
         */
         uint32_t getBanks();
 
+        /** @brief  Check if any sequence play state has changed since last check
+        *   @retval bool True if state changed
+        *   @note   Resets the change flag
+        */
+        bool getStateChanged();
+
     private:
 
         int fileWrite32(uint32_t value, FILE *pFile);
@@ -238,6 +259,7 @@ class SequenceManager
         uint8_t fileRead8(FILE* pFile);
         bool checkBlock(FILE* pFile, uint32_t nActualSize,  uint32_t nExpectedSize);
 
+        bool m_bStateChanged = false; // True if a sequence play state has changed since last check
         uint8_t m_nTriggerDevice = 0xFF; // MIDI device to receive sequence triggers (note-on)
         uint8_t m_nTriggerChannel = 0xFF; // MIDI channel to receive sequence triggers (note-on)
 
@@ -246,4 +268,5 @@ class SequenceManager
         std::vector<std::pair<uint32_t,uint32_t>> m_vPlayingSequences; //Vector of <bank,sequence> pairs for currently playing sequences (used to optimise play control)
         std::map<uint8_t, uint16_t> m_mTriggers; // Map of bank<<8|sequence indexed by MIDI note triggers
         std::map<uint32_t, std::vector<Sequence*>> m_mBanks; // Map of banks: vectors of pointers to sequences indexed by bank
+        std::recursive_mutex m_mutexBanks; // Held whilst bank structure changes (sequences added, removed, moved or deleted)
 };
@@ -24,6 +24,8 @@
  */
 
 #include <set>
+#include <atomic>
+#include <mutex>
 #include <queue>
 #include <vector>
 #include <string>
@@ -32,6 +34,8 @@
 #include <stdio.h>				// provides printf
 #include <stdlib.h>				// provides exit
 #include <thread>				// provides thread for timer
+#include <semaphore.h>			// provides semaphore to wake notification thread
+#include <time.h>				// provides clock_gettime for timed semaphore wait
 #include <jack/jack.h>			// provides JACK interface
 #include <jack/midiport.h>		// provides JACK MIDI interface
 
@@ -108,6 +112,16 @@ float g_fPlayChance = 1.0;							// Probability for playing notes (0 = Notes are
 size_t g_nMetronomePtr = -1; // Position within metronome click wav data
 float g_fMetronomeLevel = 1.0; // Factor to scale metronome level (volume)
 bool g_bMetronome = false; // True to enable metronome
+
+// State notification variables
+std::atomic<seq_state_cb_fn_t*> g_pStateCb(NULL);	// Pointer to callback function for sequence state changes
+std::atomic<seq_progress_cb_fn_t*> g_pProgressCb(NULL);	// Pointer to callback function for sequence progress changes
+sem_t g_semNotify;									// Semaphore posted to wake notification thread
+std::thread* g_pNotifyThread = NULL;				// Thread sending state notifications (not JACK process thread)
+std::atomic<bool> g_bNotifyRunning(false);			// True whilst notification thread is running
+std::atomic<uint8_t> g_nNotifyBank(1);				// Bank to send notifications for
+uint8_t g_aLastProgress[256];						// Last notified progress of each sequence in notify bank (0xFF for unknown) - notification thread only
+uint32_t g_aLastState[256];							// Last notified state of each sequence in notify bank (0xFFFFFFFF for unknown) - notification thread only
 struct metro_wav_t g_metro_pip;
 struct metro_wav_t g_metro_peep;
 struct metro_wav_t * g_pMetro = &g_metro_pip; // Pointer to the current metronome sound (pip/peep)
@@ -312,6 +326,81 @@ void onJackTimebase(jack_transport_state_t nState, jack_nframes_t nFramesInPerio
     }
 }
 
+// Wake notification thread to check for state changes
+void notifyStateChange()
+{
+    if(g_bNotifyRunning)
+        sem_post(&g_semNotify);
+}
+
+// Send sequence state and progress notifications within this thread, not jack process
+void notifyThreadFn()
+{
+    uint8_t nBank = 0;
+    while(g_bNotifyRunning)
+    {
+        if(g_nPlayingSequences)
+        {
+            // Wake periodically to report progress of playing sequences
+            struct timespec ts;
+            clock_gettime(CLOCK_REALTIME, &ts);
+            ts.tv_nsec += 100000000;
+            if(ts.tv_nsec >= 1000000000)
+            {
+                ts.tv_nsec -= 1000000000;
+                ++ts.tv_sec;
+            }
+            sem_timedwait(&g_semNotify, &ts);
+        }
+        else
+            sem_wait(&g_semNotify);
+        while(sem_trywait(&g_semNotify) == 0); // Coalesce pending posts
+        if(!g_bNotifyRunning)
+            break;
+        if(nBank != g_nNotifyBank)
+        {
+            nBank = g_nNotifyBank;
+            memset(g_aLastProgress, 0xFF, sizeof(g_aLastProgress));
+            memset(g_aLastState, 0xFF, sizeof(g_aLastState));
+        }
+        // Snapshot state and progress whilst holding bank mutex so sequences cannot be resized or deleted under us
+        uint32_t aState[256];
+        uint8_t aProgress[256];
+        uint32_t nSequences;
+        {
+            std::lock_guard<std::recursive_mutex> lock(g_seqMan.getBankMutex());
+            nSequences = g_seqMan.getSequencesInBank(nBank);
+            if(nSequences > 256)
+                nSequences = 256;
+            for(uint32_t nSequence = 0; nSequence < nSequences; ++nSequence)
+            {
+                Sequence* pSequence = g_seqMan.findSequence(nBank, nSequence);
+                aState[nSequence] = pSequence->getState() & 0xffffff;
+                uint32_t nLength = pSequence->getLength();
+                aProgress[nSequence] = nLength ? (100 * pSequence->getPlayPosition() / nLength) & 0xff : 0xFF;
+            }
+        }
+        // Callbacks are called without the lock held so they may call back into the library
+        for(uint32_t nSequence = 0; nSequence < nSequences; ++nSequence)
+        {
+            // Compare with last notified state rather than isModified() which would clear flags used by getStateChange()
+            if(aState[nSequence] != g_aLastState[nSequence])
+            {
+                g_aLastState[nSequence] = aState[nSequence];
+                seq_state_cb_fn_t* pStateCb = g_pStateCb;
+                if(pStateCb)
+                    pStateCb(nBank, nSequence, aState[nSequence]);
+            }
+            if(aProgress[nSequence] == 0xFF || aProgress[nSequence] == g_aLastProgress[nSequence])
+                continue;
+            g_aLastProgress[nSequence] = aProgress[nSequence];
+            seq_progress_cb_fn_t* pProgressCb = g_pProgressCb;
+            if(pProgressCb)
+                pProgressCb(nBank, nSequence, aProgress[nSequence]);
+        }
+    }
+}
+
 /*  Process jack cycle - must complete within single jack period
     nFrames: Quantity of frames in this period
     pArgs: Parameters passed to function by main thread (not used here)
@@ -631,6 +720,8 @@ int onJackProcess(jack_nframes_t nFrames, void *pArgs)
         g_mSchedule.erase(g_mSchedule.begin(), it);
     }
     g_bMutex = false;
+    if(g_seqMan.getStateChanged())
+        notifyStateChange(); // sem_post is safe to call from RT thread
     return 0;
 }
 
@@ -654,6 +745,7 @@ int onJackXrun(void *pArgs)
 void end()
 {
     DPRINTF("zynseq exit\n");
+    setNotifyCallbacks(NULL, NULL);
     std::this_thread::sleep_for(std::chrono::milliseconds(10));
     for(auto it : g_mSchedule)
     {
@@ -2158,6 +2250,7 @@ void setPlayMode(uint8_t bank, uint8_t sequence, uint8_t mode)
     pSequence->setPlayMode(mode);
     if(bank + sequence)
         g_bDirty = true;
+    notifyStateChange();
 }
 
 uint8_t getPlayState(uint8_t bank, uint8_t sequence)
@@ -2184,6 +2277,7 @@ void setPlayState(uint8_t bank, uint8_t sequence, uint8_t state)
             state = STOPPED;
     }
     g_seqMan.setSequencePlayState(bank, sequence, state);
+    notifyStateChange();
     /*
     if(sequence == 0)
     {
@@ -2255,6 +2349,36 @@ uint8_t getProgress(uint8_t bank, uint8_t start, uint8_t end, uint16_t* progress
 void stop()
 {
     g_seqMan.stop();
+    notifyStateChange();
+}
+
+void setNotifyCallbacks(seq_state_cb_fn_t* pStateCb, seq_progress_cb_fn_t* pProgressCb)
+{
+    g_pStateCb = pStateCb;
+    g_pProgressCb = pProgressCb;
+    if((pStateCb || pProgressCb) && !g_bNotifyRunning)
+    {
+        sem_init(&g_semNotify, 0, 0);
+        memset(g_aLastProgress, 0xFF, sizeof(g_aLastProgress));
+        memset(g_aLastState, 0xFF, sizeof(g_aLastState));
+        g_bNotifyRunning = true;
+        g_pNotifyThread = new std::thread(notifyThreadFn);
+    }
+    else if(!pStateCb && !pProgressCb && g_bNotifyRunning)
+    {
+        g_bNotifyRunning = false;
+        sem_post(&g_semNotify);
+        g_pNotifyThread->join();
+        delete g_pNotifyThread;
+        g_pNotifyThread = NULL;
+        sem_destroy(&g_semNotify);
+    }
+}
+
+void setNotifyBank(uint8_t bank)
+{
+    g_nNotifyBank = bank;
+    notifyStateChange();
 }
 
 uint32_t getPlayPosition(uint8_t bank, uint8_t sequence)
@@ -2279,6 +2403,7 @@ void clearSequence(uint8_t bank, uint8_t sequence)
     Sequence* pSequence = g_seqMan.getSequence(bank, sequence);
     pSequence->clear();
     g_bDirty = true;
+    notifyStateChange();
 }
 
 size_t getPlayingSequences()
@@ -2294,6 +2419,7 @@ void setSequencesInBank(uint8_t bank, uint8_t sequences)
     g_seqMan.setSequencesInBank(bank, sequences);
     g_bMutex = false;
     g_pSequence = g_seqMan.getSequence(0, 0);
+    notifyStateChange();
 }
 
 uint32_t getSequencesInBank(uint32_t bank)
@@ -2318,8 +2444,9 @@ uint8_t getGroup(uint8_t bank, uint8_t sequence)
 void setGroup(uint8_t bank, uint8_t sequence, uint8_t group)
 {
     Sequence* pSequence = g_seqMan.getSequence(bank, sequence);
-    return pSequence->setGroup(group);
+    pSequence->setGroup(group);
     g_bDirty = true;
+    notifyStateChange();
 }
 
 bool hasSequenceChanged(uint8_t bank, uint8_t sequence)
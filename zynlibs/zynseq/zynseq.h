@@ -783,6 +783,33 @@ uint8_t getStateChange(uint8_t bank, uint8_t start, uint8_t end, uint32_t* state
 */
 uint8_t getProgress(uint8_t bank, uint8_t start, uint8_t end, uint16_t* progress);
 
+/** @brief  Callback function type for sequence state changes
+*   @param  bank Index of bank
+*   @param  sequence Index of sequence
+*   @param  state Sequence state encoded as 24-bit word: [group, mode, play state]
+*/
+typedef void seq_state_cb_fn_t(uint8_t bank, uint8_t sequence, uint32_t state);
+
+/** @brief  Callback function type for sequence progress changes
+*   @param  bank Index of bank
+*   @param  sequence Index of sequence
+*   @param  progress Play position as percentage of sequence length
+*/
+typedef void seq_progress_cb_fn_t(uint8_t bank, uint8_t sequence, uint8_t progress);
+
+/** @brief  Register callback functions for sequence state and progress changes
+*   @param  pStateCb Pointer to state callback function, NULL to unregister
+*   @param  pProgressCb Pointer to progress callback function, NULL to unregister
+*   @note   Callbacks are called from a notification thread, not JACK process thread
+*   @note   Progress is only notified when it changes, checked every 100ms whilst sequences are playing
+*/
+void setNotifyCallbacks(seq_state_cb_fn_t* pStateCb, seq_progress_cb_fn_t* pProgressCb);
+
+/** @brief  Set the bank that state and progress notifications are sent for
+*   @param  bank Index of bank
+*/
+void setNotifyBank(uint8_t bank);
+
 /** @brief  Get quantity of tracks in a sequence
 *   @param  bank Index of bank
 *   @param  sequence Index of sequence
@@ -75,6 +75,10 @@ SEQ_LASTPLAYSTATUS = 5
 
 PLAY_MODES = ['Disabled', 'Oneshot', 'Loop', 'Oneshot all', 'Loop all', 'Oneshot sync', 'Loop sync']
 
+# Callbacks called by libseq from its notification thread
+SEQ_STATE_CB = ctypes.CFUNCTYPE(None, ctypes.c_uint8, ctypes.c_uint8, ctypes.c_uint32)
+SEQ_PROGRESS_CB = ctypes.CFUNCTYPE(None, ctypes.c_uint8, ctypes.c_uint8, ctypes.c_uint8)
+
 
 class zynseq(zynthian_engine):
 
@@ -116,6 +120,16 @@ class zynseq(zynthian_engine):
 			self.libseq = None
 			print("Can't initialise zynseq library: %s" % str(e))
 
+		# Register state & progress callbacks. If not available, state must be polled with update_state()
+		self.notify_cb_enabled = False
+		self.state_cb = SEQ_STATE_CB(self.cb_state)
+		self.progress_cb = SEQ_PROGRESS_CB(self.cb_progress)
+		try:
+			self.libseq.setNotifyCallbacks(self.state_cb, self.progress_cb)
+			self.notify_cb_enabled = True
+		except AttributeError:
+			logging.warning("zynseq library doesn't support notification callbacks. Polling state.")
+
 		self.zctrl_tempo = zynthian_controller(self, 'tempo', {
 			'is_integer': False,
 			'value_min': 10.0,
@@ -130,6 +144,9 @@ class zynseq(zynthian_engine):
 	# Destroy instance of shared library
 	def destroy(self):
 		if self.libseq:
+			if self.notify_cb_enabled:
+				self.libseq.setNotifyCallbacks(None, None)
+				self.notify_cb_enabled = False
 			ctypes.dlclose(self.libseq._handle)
 		self.libseq = None
 
@@ -145,6 +162,18 @@ class zynseq(zynthian_engine):
 			zynsigman.send(zynsigman.S_STEPSEQ, self.SS_SEQ_PLAY_STATE, bank=self.bank, seq=seq, state=state, mode=mode, group=group)
 		self.update_progress()
 
+	# Callback from libseq when a sequence state changes
+	def cb_state(self, bank, seq, state):
+		if bank != self.bank:
+			return
+		zynsigman.send(zynsigman.S_STEPSEQ, self.SS_SEQ_PLAY_STATE, bank=bank, seq=seq, state=state & 0xff, mode=(state >> 8) & 0xff, group=(state >> 16) & 0xff)
+
+	# Callback from libseq when a sequence progress changes
+	def cb_progress(self, bank, seq, progress):
+		if bank != self.bank:
+			return
+		zynsigman.send(zynsigman.S_STEPSEQ, self.SS_SEQ_PROGRESS, bank=bank, seq=seq, progress=progress)
+
 	def update_progress(self):
 		num_seq = self.col_in_bank ** 2
 		progress = (ctypes.c_uint16 * num_seq)()
@@ -172,6 +201,8 @@ class zynseq(zynthian_engine):
 		# WARNING!!! Limited to 8 to avoid issues with GUI zynpad that have 8x8 = 64 pads
 		self.col_in_bank = min(8, int(sqrt(self.seq_in_bank)))
 		self.bank = bank
+		if self.notify_cb_enabled:
+			self.libseq.setNotifyBank(bank)
 		zynsigman.send(zynsigman.S_STEPSEQ, self.SS_SEQ_REFRESH)
 		self.changing_bank = False
 
@@ -10,6 +10,8 @@
 #include <jack/jack.h> //provides interface to JACK
 #include <jack/midiport.h> //provides interface to JACK MIDI ports
 #include <map> //provides std::map
+#include <thread> //provides thread for state notifications
+#include <semaphore.h> //provides semaphore to wake notification thread
 
 #define DPRINTF(fmt, args...) if(g_bDebug) fprintf(stderr, fmt, ## args)
 
@@ -40,6 +42,11 @@ bool g_aRecNotes[16][128];
 int8_t g_nTranspose = 0; // +/- notes to transpose playback
 bool g_bClearHanging = false; // True to request hanging notes are cleared in next process cycle
 
+state_cb_fn_t* g_pStateCb = NULL; // Pointer to callback function for play / record state changes
+sem_t g_semNotify; // Semaphore posted to wake notification thread
+std::thread* g_pNotifyThread = NULL; // Thread sending state notifications (not JACK process thread)
+bool g_bNotifyRunning = false; // True whilst notification thread is running
+
 Smf* g_pPlayerSmf = NULL; // Pointer to the SMF object that is attached to player
 Smf* g_pRecorderSmf = NULL; // Pointer to the SMF object that is attached to recorder
 Smf* g_pSmf = NULL; // Pointer to the SMF containing g_pEvent (current event)
@@ -74,6 +81,35 @@ auto g_pvSmf = g_Smf.getVector();
 
 /*** Private functions not exposed as external C functions (not declared in header) ***/
 
+// Wake notification thread to check for state changes
+void notifyStateChange()
+{
+	if(g_bNotifyRunning)
+		sem_post(&g_semNotify);
+}
+
+// Send state change notifications within this thread, not jack process
+void notifyThreadFn()
+{
+	uint8_t nLastPlayState = g_nPlayState;
+	bool bLastRecording = g_bRecording;
+	while(g_bNotifyRunning)
+	{
+		sem_wait(&g_semNotify);
+		if(!g_bNotifyRunning)
+			break;
+		uint8_t nPlayState = g_nPlayState;
+		bool bRecording = g_bRecording;
+		if(nPlayState == nLastPlayState && bRecording == bLastRecording)
+			continue;
+		nLastPlayState = nPlayState;
+		bLastRecording = bRecording;
+		state_cb_fn_t* pStateCb = g_pStateCb;
+		if(pStateCb)
+			pStateCb(nPlayState, bRecording);
+	}
+}
+
 // return true if pointer is in list
 bool isSmfValid(Smf* pSmf)
 {
@@ -313,6 +349,16 @@ static int onJackProcess(jack_nframes_t nFrames, void *notused)
 	static uint8_t nData1;
 	static uint8_t nData2;
 
+	// Wake notification thread if play / record state changed since previous period
+	static uint8_t nNotifiedPlayState = STOPPED;
+	static bool bNotifiedRecording = false;
+	if(g_nPlayState != nNotifiedPlayState || g_bRecording != bNotifiedRecording)
+	{
+		nNotifiedPlayState = g_nPlayState;
+		bNotifiedRecording = g_bRecording;
+		notifyStateChange();
+	}
+
 	if(g_pMidiInputPort == NULL && g_pMidiOutputPort == NULL)
 		return 0;
 	static jack_transport_state_t nPreviousTransportState = JackTransportStopped;
@@ -595,6 +641,7 @@ void startPlayback()
 		return;
 	g_dPosition = 0.0;
 	g_nPlayState = STARTING;
+	notifyStateChange();
 }
 
 void stopPlayback()
@@ -604,6 +651,7 @@ void stopPlayback()
 	g_nPlayState = STOPPING;
 	if(g_pPlayerSmf)
 		g_pPlayerSmf->setPosition(0);
+	notifyStateChange();
 }
 
 uint8_t getPlayState()
@@ -611,6 +659,26 @@ uint8_t getPlayState()
 	return g_nPlayState;
 }
 
+void setStateCallback(state_cb_fn_t* pCb)
+{
+	g_pStateCb = pCb;
+	if(pCb && !g_bNotifyRunning)
+	{
+		sem_init(&g_semNotify, 0, 0);
+		g_bNotifyRunning = true;
+		g_pNotifyThread = new std::thread(notifyThreadFn);
+	}
+	else if(!pCb && g_bNotifyRunning)
+	{
+		g_bNotifyRunning = false;
+		sem_post(&g_semNotify);
+		g_pNotifyThread->join();
+		delete g_pNotifyThread;
+		g_pNotifyThread = NULL;
+		sem_destroy(&g_semNotify);
+	}
+}
+
 bool attachRecorder(Smf* pSmf)
 {
 	if(!isSmfValid(pSmf))
@@ -661,6 +729,7 @@ void startRecording()
 	g_dRecorderTicksPerFrame = double(g_pRecorderSmf->getTicksPerQuarterNote()) / ((double(g_nMicrosecondsPerQuarterNote) / 1000000) * double(g_nSamplerate));
 	addTempo(g_pRecorderSmf, 0, 60000000.0 / g_nMicrosecondsPerQuarterNote);
 	g_bRecording = true;
+	notifyStateChange();
 }
 
 void stopRecording()
@@ -668,6 +737,7 @@ void stopRecording()
 	if(!g_bRecording)
 		return;
 	g_bRecording = false;
+	notifyStateChange();
 	// Add note-off for any currently held notes
 	for(int chan = 0; chan < 16; ++chan) {
 		for(int note = 0; note < 128; ++note) {
@@ -188,6 +188,18 @@ void stopPlayback();
 */
 uint8_t getPlayState();
 
+/** @brief  Callback function type for play / record state changes
+*   @param  nPlayState Play state [STOPPED|STARTING|PLAYING|STOPPING]
+*   @param  bRecording True if recording
+*/
+typedef void state_cb_fn_t(uint8_t nPlayState, uint8_t bRecording);
+
+/** @brief  Register callback function for play / record state changes
+*   @param  pCb Pointer to callback function, NULL to unregister
+*   @note   Callback is called from a notification thread, not JACK process thread
+*/
+void setStateCallback(state_cb_fn_t* pCb);
+
 /** @brief  Create a JACK client if it does note exist and attach JACK recorder to a SMF
 *   @param  pSmf Pointer to the SMF
 *   @retval bool True on success
@@ -28,6 +28,10 @@ from _ctypes import dlclose
 from os.path import dirname, realpath
 
 libsmf = None
+state_cb = None  # Reference to ctypes callback wrapper, to avoid garbage collection
+
+# Callback called by libsmf on play / record state changes: (play_state, recording)
+STATE_CB = ctypes.CFUNCTYPE(None, ctypes.c_uint8, ctypes.c_uint8)
 
 EVENT_TYPE_NONE				= 0x00
 EVENT_TYPE_MIDI				= 0x01
@@ -115,6 +119,7 @@ def init():
 def destroy():
 	global libsmf
 	if libsmf:
+		set_state_cb(None)
 		dlclose(libsmf._handle)
 	libsmf = None
 
@@ -138,4 +143,24 @@ def save(smf, filename):
 		return libsmf.save(ctypes.c_ulong(smf), bytes(filename, "utf-8"))
 	return False
 
+
+# Register callback for play / record state changes
+#  cb: Python function cb(play_state, recording) or None to unregister
+#  Returns: True on success, False if not supported by library
+def set_state_cb(cb):
+	global state_cb
+	if not libsmf:
+		return False
+	try:
+		if cb:
+			wrapper = STATE_CB(cb)
+			libsmf.setStateCallback(wrapper)
+			state_cb = wrapper
+		else:
+			libsmf.setStateCallback(None)
+			state_cb = None
+		return True
+	except AttributeError:
+		return False
+
 # -------------------------------------------------------------------------------
@@ -1,7 +1,11 @@
-from zyncoder.zyncore import lib_zyncore_init
-from zyngui import zynthian_gui_config
-from zyngine import zynthian_state_manager
-import autoconnect
+from zyngine.zynthian_load_profiler import zynloadprof
+
+with zynloadprof.record("boot"):
+    with zynloadprof.phase("imports"):
+        from zyncoder.zyncore import lib_zyncore_init
+        from zyngui import zynthian_gui_config
+        from zyngine import zynthian_state_manager
+        import autoconnect
 
 import logging
 from time import sleep
@@ -25,8 +29,12 @@ class zyn_headless:
         except Exception as e:
             logging.error("ERROR configuring control I/O subsytem: {}".format(e))
 
-        self.state_manager = zynthian_state_manager.zynthian_state_manager()
-        self.chain_manager = self.state_manager.chain_manager
+        with zynloadprof.record("boot"):
+            with zynloadprof.phase("state_manager"):
+                self.state_manager = zynthian_state_manager.zynthian_state_manager()
+                self.chain_manager = self.state_manager.chain_manager
+        for line in zynloadprof.get_report(kind="boot"):
+            logging.info(line)
 
         if zynthian_gui_config.restore_last_state:
             snapshot_loaded = self.state_manager.load_snapshot("/zynthian/zynthian-my-data/snapshots/last_state.zss")
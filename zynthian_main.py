@@ -29,23 +29,33 @@ import ctypes
 import logging
 from tkinter import EventType
 
-# Zynthian specific modules
-from zyngui import zynthian_gui_config
-from zyngine.zynthian_chain import *
-from zyncoder.zyncore import get_lib_zyncore
-from zyngui.zynthian_gui import zynthian_gui
-from zyngui import zynthian_gui_keybinding
-from zynlibs.zynseq import *
-
-# ******************************************************************************
-# ------------------------------------------------------------------------------
-# Start Zynthian!
-# ------------------------------------------------------------------------------
-# ******************************************************************************
-
-logging.info("STARTING ZYNTHIAN-UI ...")
-zynthian_gui_config.zyngui = zyngui = zynthian_gui()
-zyngui.create_screens()
+# Boot phases are timed by load profiler (see cuia_load_stats)
+from zyngine.zynthian_load_profiler import zynloadprof
+
+with zynloadprof.record("boot"):
+	# Zynthian specific modules
+	with zynloadprof.phase("imports"):
+		from zyngui import zynthian_gui_config
+		from zyngine.zynthian_chain import *
+		from zyncoder.zyncore import get_lib_zyncore
+		from zyngui.zynthian_gui import zynthian_gui
+		from zyngui import zynthian_gui_keybinding
+		from zynlibs.zynseq import *
+
+	# ******************************************************************************
+	# ------------------------------------------------------------------------------
+	# Start Zynthian!
+	# ------------------------------------------------------------------------------
+	# ******************************************************************************
+
+	logging.info("STARTING ZYNTHIAN-UI ...")
+	with zynloadprof.phase("gui_init"):
+		zynthian_gui_config.zyngui = zyngui = zynthian_gui()
+	with zynloadprof.phase("create_screens"):
+		zyngui.create_screens()
+
+for line in zynloadprof.get_report(kind="boot", last=1):
+	logging.info(line)
 zyngui.run_start_thread()
 
 # ------------------------------------------------------------------------------